@@ -0,0 +1,117 @@
+"""Recall@k and latency of HNSW / IVF operating points against the exact flat index.
+
+Vectors come from a saved flat index (--index-dir) when present, otherwise the
+filings in data/ are chunked and embedded. Queries are the decomposed
+sub-queries of main.TEST_QUERIES plus noisy copies of sampled chunk vectors.
+
+    python benchmarks/bench_ann.py [--k 5] [--n-queries 500]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from agent import decompose_query
+from embeddings import embed_texts
+from ingest import process_filing
+from main import TEST_QUERIES
+from vectorstore import VectorStore
+
+EF_SEARCH_GRID = (8, 16, 32, 64, 128, 256)
+NPROBE_GRID = (1, 2, 4, 8, 16, 32, 64)
+
+def load_vectors(index_dir, data_dir):
+    index_path = Path(index_dir)
+    if (index_path / "vectorstore.json").exists():
+        vs = VectorStore.load(index_path, mmap=False)
+        if vs.vectors is not None and vs.index.ntotal:
+            # compressed index: take the exact copies of the live ids
+            print(f"Using {vs.index.ntotal} vectors from '{index_dir}'")
+            return np.asarray(vs.vectors[faiss.vector_to_array(vs.index.id_map)])
+        if vs.index_type == "flat" and vs.index.ntotal:
+            print(f"Using {vs.index.ntotal} vectors from '{index_dir}'")
+            return vs.index.index.reconstruct_n(0, vs.index.ntotal)
+    
+    texts = []
+    for fname in sorted(p.name for p in Path(data_dir).glob("*.html")):
+        texts.extend(process_filing(data_dir, fname)[0])
+    print(f"Embedding {len(texts)} chunks from '{data_dir}'")
+    return np.asarray(embed_texts(texts), dtype='float32')
+
+def make_queries(vectors, n_queries, seed=0):
+    sub_queries = [sq for q in TEST_QUERIES for sq in decompose_query(q)]
+    queries = [np.asarray(embed_texts(sub_queries), dtype='float32')]
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)]
+    noise = rng.normal(scale=np.linalg.norm(sample, axis=1, keepdims=True).mean() * 0.05, size=sample.shape)
+    queries.append((sample + noise).astype('float32'))
+    return np.vstack(queries)
+
+def run(vs, queries, k):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = vs.search(q, k=k)
+        latencies.append(time.perf_counter() - start)
+        ids.append([chunk_id for chunk_id, _ in hits])
+    return ids, np.array(latencies) * 1000
+
+def recall_at_k(truth, found):
+    return float(np.mean([len(set(t) & set(f)) / max(len(t), 1) for t, f in zip(truth, found)]))
+
+def report(name, param, truth, found, latencies, build_s=None):
+    build = f"{build_s:>9.2f}" if build_s is not None else f"{'':>9}"
+    print(f"{name:<6}{param:<14}{recall_at_k(truth, found):>10.3f}"
+          f"{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}{build}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default="index")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--n-queries", type=int, default=500)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (default: 4 * sqrt(n))")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.index_dir, args.data_dir)
+    queries = make_queries(vectors, args.n_queries)
+    dim = vectors.shape[1]
+    nlist = args.nlist or max(1, int(4 * np.sqrt(len(vectors))))
+    print(f"{len(vectors)} vectors, dim {dim}, {len(queries)} queries, k={args.k}\n")
+
+    print(f"{'index':<6}{'param':<14}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'build s':>9}")
+    flat = VectorStore(dim, "flat")
+    start = time.perf_counter()
+    flat.add(vectors)
+    flat_build = time.perf_counter() - start
+    truth, latencies = run(flat, queries, args.k)
+    report("flat", "exact", truth, truth, latencies, flat_build)
+
+    hnsw = VectorStore(dim, "hnsw", hnsw_m=args.hnsw_m)
+    start = time.perf_counter()
+    hnsw.add(vectors)
+    hnsw_build = time.perf_counter() - start
+    for ef in EF_SEARCH_GRID:
+        hnsw.set_search_params(ef_search=ef)
+        found, latencies = run(hnsw, queries, args.k)
+        report("hnsw", f"efSearch={ef}", truth, found, latencies, hnsw_build if ef == EF_SEARCH_GRID[0] else None)
+
+    ivf = VectorStore(dim, "ivf", nlist=nlist)
+    start = time.perf_counter()
+    ivf.add(vectors)
+    ivf_build = time.perf_counter() - start
+    for nprobe in NPROBE_GRID:
+        if nprobe > nlist:
+            break
+        ivf.set_search_params(nprobe=nprobe)
+        found, latencies = run(ivf, queries, args.k)
+        report("ivf", f"nprobe={nprobe}", truth, found, latencies, ivf_build if nprobe == NPROBE_GRID[0] else None)
+
+if __name__ == "__main__":
+    main()
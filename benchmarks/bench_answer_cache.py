@@ -0,0 +1,91 @@
+"""Hit rate and latency saved by the answer cache on repeated and paraphrased questions.
+
+Runs the TEST_QUERIES against the index three times through one in-memory
+cache: cold (every answer generated), repeated with different case and
+punctuation (exact tier) and reworded (semantic tier). Fact-table answers are
+turned off so every query goes through retrieval and generation.
+
+    python benchmarks/bench_answer_cache.py [--llm-mode stub] [--threshold 0.95] [--min-overlap 0.8]
+"""
+import argparse
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from answer_cache import AnswerCache
+from main import DEFAULT_MODELS, INDEX_DIR, TEST_QUERIES, load_or_build_index, run_query
+
+PARAPHRASES = [
+    "What was the total revenue of Microsoft in 2023?",
+    "What was NVIDIA's total revenue for fiscal 2024?",
+    "How much did NVIDIA's data center revenue grow between 2022 and 2023?",
+    "By how much did Microsoft's cloud revenue grow from 2022 to 2023?",
+    "Which company had the highest operating margin in 2023?",
+    "Of the three companies, which had the highest gross margin in 2023?",
+    "What share of Google's revenue came from cloud in 2023?",
+    "What percentage of Google's revenue in 2023 came from advertising?",
+    "Compare the AI investments mentioned by all three companies in their 2024 10-K filings",
+    "Compare R&D spending as a percentage of revenue across the three companies in 2023",
+    "What main AI risks does each company mention and how do they differ?",
+]
+
+def run_phase(vs, file_map, queries, cache, llm_mode, model_name):
+    before = cache.metrics()
+    latencies, tiers = [], []
+    for query in queries:
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = run_query(vs, file_map, query, llm_mode=llm_mode, model_name=model_name,
+                               use_facts=False, answer_cache=cache)
+        latencies.append((time.perf_counter() - start) * 1000)
+        tiers.append(result.get("cache"))
+    after = cache.metrics()
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "total_s": sum(latencies) / 1000,
+        "exact": tiers.count("exact"),
+        "semantic": tiers.count("semantic"),
+        "saved_s": after["saved_s"] - before["saved_s"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--llm-mode", default="stub", choices=sorted(DEFAULT_MODELS))
+    parser.add_argument("--model-name", default=None)
+    parser.add_argument("--threshold", type=float, default=0.95, help="query cosine similarity for a semantic hit")
+    parser.add_argument("--min-overlap", type=float, default=0.8, help="retrieved chunk id Jaccard overlap for a semantic hit")
+    args = parser.parse_args()
+    model_name = args.model_name or DEFAULT_MODELS[args.llm_mode]
+
+    vs, file_map = load_or_build_index(args.data_dir, args.index_dir)
+    if vs is None:
+        return
+    cache = AnswerCache(threshold=args.threshold, min_overlap=args.min_overlap)
+    phases = [
+        ("cold", TEST_QUERIES),
+        ("repeated", [q.upper().rstrip("?") + " ?" for q in TEST_QUERIES]),
+        ("paraphrased", PARAPHRASES),
+    ]
+
+    print(f"\n{len(TEST_QUERIES)} queries per phase, {args.llm_mode} / {model_name}, "
+          f"threshold {args.threshold}, min overlap {args.min_overlap}")
+    print(f"{'phase':<13}{'exact':>7}{'semantic':>10}{'p50 ms':>10}{'total s':>9}{'saved s':>9}")
+    for name, queries in phases:
+        stats = run_phase(vs, file_map, queries, cache, args.llm_mode, model_name)
+        print(f"{name:<13}{stats['exact']:>7}{stats['semantic']:>10}{stats['p50_ms']:>10.1f}"
+              f"{stats['total_s']:>9.2f}{stats['saved_s']:>9.2f}")
+
+    stats = cache.metrics()
+    print(f"\nOverall hit rate {stats['hit_rate']:.0%} ({stats['exact_hits']} exact, {stats['semantic_hits']} semantic, "
+          f"{stats['misses']} misses), {stats['saved_s']:.2f}s saved")
+
+if __name__ == "__main__":
+    main()
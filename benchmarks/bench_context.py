@@ -0,0 +1,92 @@
+"""Prompt tokens and evidence coverage of MMR context packing against the old first-3-chunks context.
+
+For every labelled query in benchmarks/labelled_queries.json the retrieved
+chunks are turned into a prompt twice: the old way (the first 3 retrieved
+texts, and for hf the prompt cut at 1000 characters) and with
+main.assemble_prompt (deduplicated, every sub-query covered, MMR up to
+CONTEXT_TOKENS). Tokens are counted with the --llm-mode / --model-name
+tokenizer. Reported per query: prompt tokens, sub-queries with at least one
+chunk in the prompt, and labelled evidence strings that made it into the prompt.
+
+    python benchmarks/bench_context.py [--llm-mode hf|openai|stub] [--model-name ...] [--budget 800]
+"""
+import argparse
+import io
+import json
+import sys
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from bench_suite import LABELS_FILE, _norm, reachable
+from context import get_token_counter
+from main import (CONTEXT_TOKENS, DEFAULT_MODELS, INDEX_DIR, assemble_prompt, build_prompt, load_or_build_index,
+                  retrieve_for_query)
+
+OLD_CHUNKS = 3
+OLD_HF_PROMPT_CHARS = 1000
+
+def old_prompt(query, retrieved, llm_mode):
+    system_prompt, user_prompt = build_prompt(query, [t for texts in retrieved for t in texts][:OLD_CHUNKS])
+    if llm_mode == "hf" and len(user_prompt) > OLD_HF_PROMPT_CHARS:
+        user_prompt = user_prompt[:OLD_HF_PROMPT_CHARS] + "..."
+    return system_prompt, user_prompt
+
+def prompt_tokens(counter, prompt, llm_mode):
+    return counter.count(prompt[1]) + (counter.count(prompt[0]) if llm_mode == "openai" else 0)
+
+def coverage(prompt, retrieved, labels):
+    text = _norm(prompt[1])
+    sub_queries = sum(any(_norm(t)[:200] in text for t in texts) for texts in retrieved if texts)
+    evidence = sum(_norm(label["evidence"]) in text for label in labels)
+    return sub_queries, evidence
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--labels", default=str(LABELS_FILE))
+    parser.add_argument("--llm-mode", default="hf", choices=sorted(DEFAULT_MODELS))
+    parser.add_argument("--model-name", default=None)
+    parser.add_argument("--budget", type=int, default=CONTEXT_TOKENS, help="context tokens (CONTEXT_TOKENS)")
+    args = parser.parse_args()
+    model_name = args.model_name or DEFAULT_MODELS[args.llm_mode]
+
+    vs, file_map = load_or_build_index(args.data_dir, args.index_dir)
+    if vs is None:
+        return
+    with open(args.labels, "r", encoding="utf-8") as f:
+        labelled = json.load(f)
+    counter = get_token_counter(args.llm_mode, model_name)
+    print(f"\n{len(labelled)} queries, {args.llm_mode} / {model_name}, tokenizer: {counter.name}, budget {args.budget}")
+    print(f"{'sub-qs':>7}{'tokens':>15}{'chunks':>11}{'covered':>11}{'evidence':>12}  query")
+    print(f"{'':>7}{'old  new':>15}{'old  new':>11}{'old  new':>11}{'old  new':>12}")
+
+    totals = np.zeros(6)
+    for item in labelled:
+        labels = [label for label in item["relevant"] if reachable(file_map, label)]
+        with redirect_stdout(io.StringIO()):
+            result, retrieved = retrieve_for_query(vs, file_map, item["query"], args.llm_mode)
+        before = old_prompt(item["query"], retrieved, args.llm_mode)
+        after, stats = assemble_prompt(item["query"], retrieved, args.llm_mode, model_name, args.budget)
+        row = [prompt_tokens(counter, before, args.llm_mode), stats["prompt_tokens"],
+               *coverage(before, retrieved, labels), *coverage(after, retrieved, labels)]
+        old_tokens, new_tokens, old_sq, old_ev, new_sq, new_ev = row
+        totals += [old_tokens, new_tokens, old_sq, new_sq, old_ev, new_ev]
+        n_sq = len(result["sub_queries"])
+        print(f"{n_sq:>7}{old_tokens:>9}{new_tokens:>6}{min(OLD_CHUNKS, stats['retrieved']):>6}{stats['chunks']:>5}"
+              f"{old_sq:>4}/{n_sq:<2}{new_sq:>2}/{n_sq:<2}{old_ev:>5}/{len(labels):<2}{new_ev:>2}/{len(labels):<2}"
+              f"  {item['query'][:60]}")
+
+    n = len(labelled)
+    print(f"\nMean prompt tokens: {totals[0] / n:.0f} old, {totals[1] / n:.0f} new")
+    print(f"Sub-queries covered: {totals[2]:.0f} old, {totals[3]:.0f} new; "
+          f"evidence in prompt: {totals[4]:.0f} old, {totals[5]:.0f} new")
+
+if __name__ == "__main__":
+    main()
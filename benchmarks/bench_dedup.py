@@ -0,0 +1,69 @@
+"""How much near-duplicate elimination shrinks the chunk set and embedding time on data/.
+
+Chunks every filing, runs the MinHash/LSH dedup stage at several similarity
+thresholds, then embeds the full and the deduplicated chunk lists at the
+--threshold setting.
+
+    python benchmarks/bench_dedup.py [--thresholds 0.7 0.8 0.9] [--threshold 0.8]
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from dedup import NearDuplicateIndex
+from embeddings import embed_texts, get_model
+from ingest import process_filing
+
+def dedup(texts, threshold):
+    index = NearDuplicateIndex(threshold)
+    start = time.perf_counter()
+    keep, canonical = index.split(texts, 0)
+    return keep, canonical, time.perf_counter() - start
+
+def timed_embed(texts):
+    start = time.perf_counter()
+    embed_texts(texts)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.9, 1.0])
+    parser.add_argument("--threshold", type=float, default=0.8, help="setting used for the embedding comparison")
+    args = parser.parse_args()
+
+    texts, metas = [], []
+    for fname in sorted(p.name for p in Path(args.data_dir).glob("*.html")):
+        file_texts, file_metas, _ = process_filing(args.data_dir, fname)
+        texts.extend(file_texts)
+        metas.extend(file_metas)
+    if not texts:
+        print(f"No chunks from '{args.data_dir}'")
+        return
+
+    print(f"\n{len(texts)} chunks from {len({m['filename'] for m in metas})} filings")
+    print(f"{'threshold':>10}{'unique':>9}{'dups':>7}{'saved':>8}{'dedup s':>9}")
+    for threshold in args.thresholds:
+        keep, _, seconds = dedup(texts, threshold)
+        dups = len(texts) - len(keep)
+        print(f"{threshold:>10.2f}{len(keep):>9}{dups:>7}{dups / len(texts):>8.1%}{seconds:>9.2f}")
+
+    keep, canonical, dedup_s = dedup(texts, args.threshold)
+    pairs = Counter((metas[keep[c]]["filename"], metas[i]["filename"])
+                    for i, c in enumerate(canonical) if c >= 0)
+    print(f"\nDuplicates at {args.threshold} by (stored in, also in):")
+    for (first, second), n in pairs.most_common():
+        print(f"  {first:<18} {second:<18} {n:>5}")
+
+    get_model()  # keep model loading out of the timings
+    full_s = timed_embed(texts)
+    unique_s = timed_embed([texts[i] for i in keep])
+    print(f"\nEmbedding: {full_s:.2f}s for {len(texts)} chunks, {unique_s:.2f}s + {dedup_s:.2f}s dedup "
+          f"for {len(keep)} unique ({1 - (unique_s + dedup_s) / full_s:.1%} saved)")
+
+if __name__ == "__main__":
+    main()
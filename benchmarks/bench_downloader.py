@@ -0,0 +1,71 @@
+"""Downloader throughput against the local fake EDGAR server (no network).
+
+Downloads --companies x --years filings by scraping search pages with 1
+worker and with --workers workers under the same rate limit, re-runs to check
+that every request comes back 304 Not Modified, then locates the same filings
+from the submissions JSON and the full-index files. --fail-rate injects
+429/503 responses.
+
+    python benchmarks/bench_downloader.py [--companies 10] [--workers 8] [--rate 20] [--latency 0.2]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from downloader import download_all_filings, download_filings
+from fake_edgar import start_fake_edgar
+
+def run(server, data_dir, companies, years, workers, rate, source="scrape"):
+    before = dict(server.counts)
+    start = time.perf_counter()
+    if source == "scrape":
+        download_all_filings(data_dir, companies, years, workers=workers, rate=rate, base_url=server.base_url)
+    else:
+        download_filings(list(companies), years, data_dir, source, workers=workers, rate=rate,
+                         base_url=server.base_url)
+    elapsed = time.perf_counter() - start
+    counts = {key: server.counts[key] - before[key] for key in before}
+    n_files = len(list(Path(data_dir).glob("*.html")))
+    return elapsed, counts, n_files
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--years", nargs="+", default=["2022", "2023", "2024"])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20, help="requests per second cap")
+    parser.add_argument("--latency", type=float, default=0.2, help="server seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = start_fake_edgar(latency=args.latency, fail_rate=args.fail_rate, n_companies=args.companies)
+    companies = {f"T{i:03d}": str(1000 + i) for i in range(args.companies)}
+
+    report = []
+    for workers in (1, args.workers):
+        with tempfile.TemporaryDirectory() as data_dir:
+            report.append((f"{workers} worker(s)", *run(server, data_dir, companies, args.years, workers, args.rate)))
+            if workers == args.workers:
+                report.append(("re-run", *run(server, data_dir, companies, args.years, workers, args.rate)))
+    for source in ("submissions", "full-index"):
+        with tempfile.TemporaryDirectory() as data_dir:
+            report.append((source, *run(server, data_dir, companies, args.years, args.workers, args.rate, source)))
+
+    # the limiter must hold the request rate under the cap across all workers
+    times = sorted(server.request_times)
+    peak = max(sum(1 for t in times[i:] if t - times[i] < 1.0) for i in range(len(times)))
+
+    print(f"\n{'run':<14}{'seconds':>9}{'requests':>10}{'429/503':>9}{'304':>6}{'files':>7}")
+    for name, elapsed, counts, n_files in report:
+        print(f"{name:<14}{elapsed:>9.2f}{counts['requests']:>10}{counts['failures']:>9}"
+              f"{counts['not_modified']:>6}{n_files:>7}")
+    print(f"\nPeak requests in any 1s window: {peak} (cap {args.rate:g}/s)")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Bulk embedding throughput and memory: one encode() call against the length-bucketed EmbeddingEngine.
+
+Chunks every filing in data/ once, then encodes all chunks into a flat index in
+a fresh process per setting, so peak RSS covers only that run:
+
+  single     the old path: embed_texts(all chunks), then one VectorStore.add
+  engine     EmbeddingEngine with --workers processes (0 = in-process) and
+             --batch-sizes, streaming each finished batch into the index
+
+Reports chunks/s, peak RSS of the run's main process and of its largest
+encoder worker, and the padding overhead of the batches (padded word slots /
+real words; the length-sorted batches are what keep it low).
+
+    python benchmarks/bench_embed.py [--workers 0 2 4] [--batch-sizes 32 64 128] [--threads 0]
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from embed_engine import EmbeddingEngine
+from ingest import process_filing
+
+def _rss_mb(who):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def padding_overhead(texts, batches):
+    words = [len(t.split()) for t in texts]
+    padded = sum(max(words[i] for i in rows) * len(rows) for rows in batches)
+    return padded / sum(words) - 1
+
+def _run(texts, mode, workers, batch_size, threads):
+    # runs in a fresh process
+    from embeddings import embed_texts, get_model
+    from vectorstore import VectorStore
+    get_model()  # model load is the same for every setting; keep it out of the timing
+    start = time.perf_counter()
+    if mode == "single":
+        embeddings = embed_texts(texts)
+        vs = VectorStore(len(embeddings[0]))
+        vs.add(embeddings)
+    else:
+        vs = None
+        with EmbeddingEngine(workers, batch_size, threads) as engine:
+            for rows, embeddings in engine.embed(texts):
+                if vs is None:
+                    vs = VectorStore(embeddings.shape[1])
+                vs.add(embeddings, rows)
+    seconds = time.perf_counter() - start
+    return seconds, vs.index.ntotal, _rss_mb(resource.RUSAGE_SELF), _rss_mb(resource.RUSAGE_CHILDREN)
+
+def run(texts, mode, workers=0, batch_size=32, threads=0):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_run, texts, mode, workers, batch_size, threads).result()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--threads", type=int, default=0, help="threads per worker (0 = cores / workers)")
+    args = parser.parse_args()
+
+    texts = []
+    for fname in sorted(p.name for p in Path(args.data_dir).glob("*.html")):
+        texts.extend(process_filing(args.data_dir, fname)[0])
+    if not texts:
+        print(f"No chunks from '{args.data_dir}'")
+        return
+    print(f"\n{len(texts)} chunks, {multiprocessing.cpu_count()} CPUs")
+
+    print(f"{'setting':<24}{'chunks/s':>10}{'speedup':>9}{'RSS MB':>9}{'worker MB':>11}{'padding':>9}")
+    unsorted = [np.arange(i, min(i + 32, len(texts))) for i in range(0, len(texts), 32)]
+    seconds, n, rss, _ = run(texts, "single")
+    baseline = n / seconds
+    print(f"{'single encode() call':<24}{baseline:>10.1f}{1:>8.2f}x{rss:>9.0f}{'-':>11}"
+          f"{padding_overhead(texts, unsorted):>9.0%}")
+    for workers in args.workers:
+        for batch_size in args.batch_sizes:
+            seconds, n, rss, worker_rss = run(texts, "engine", workers, batch_size, args.threads)
+            batches = EmbeddingEngine(batch_size=batch_size).batches(texts)
+            label = f"engine w={workers} b={batch_size}"
+            worker = f"{worker_rss:.0f}" if workers else "-"
+            print(f"{label:<24}{n / seconds:>10.1f}{n / seconds / baseline:>8.2f}x{rss:>9.0f}{worker:>11}"
+                  f"{padding_overhead(texts, batches):>9.0%}")
+    print("\nPadding for the single call is shown for unsorted batches of 32; "
+          "sentence-transformers also sorts by length inside one encode() call.")
+
+if __name__ == "__main__":
+    main()
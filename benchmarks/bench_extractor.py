@@ -0,0 +1,73 @@
+"""Compare the BeautifulSoup extractor with the streaming lxml extractor on data/.
+
+Each (engine, file) run happens in a fresh process so peak RSS is not polluted
+by earlier runs.
+
+    python benchmarks/bench_extractor.py [--data-dir data] [--repeat 3]
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from extractor import extract_text_html, iter_text_blocks_html
+
+def _max_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _run(engine, path):
+    base_rss = _max_rss_mb()
+    start = time.perf_counter()
+    if engine == "bs4":
+        n_chars = len(extract_text_html(path))
+    else:
+        # consume the stream block by block, as ingestion would
+        n_chars = sum(len(block) for block in iter_text_blocks_html(path))
+    elapsed = time.perf_counter() - start
+    return elapsed, n_chars, _max_rss_mb() - base_rss
+
+def measure(engine, path, repeat):
+    best = None
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(_run, engine, str(path)).result()
+        if best is None or result[0] < best[0]:
+            best = result
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = sorted(Path(args.data_dir).glob("*.html"))
+    if not files:
+        print(f"No HTML filings in '{args.data_dir}'")
+        return
+
+    print(f"{'file':<18}{'MB':>7}  {'engine':<6}{'sec':>8}{'MB/s':>8}{'chars':>11}{'peak RSS +MB':>14}")
+    totals = {"bs4": 0.0, "lxml": 0.0}
+    total_mb = 0.0
+    for path in files:
+        size_mb = os.path.getsize(path) / 1e6
+        total_mb += size_mb
+        for engine in ("bs4", "lxml"):
+            elapsed, n_chars, rss = measure(engine, path, args.repeat)
+            totals[engine] += elapsed
+            print(f"{path.name:<18}{size_mb:>7.2f}  {engine:<6}{elapsed:>8.3f}{size_mb / elapsed:>8.1f}{n_chars:>11,}{rss:>14.1f}")
+
+    print("-" * 72)
+    for engine, elapsed in totals.items():
+        print(f"{'total':<18}{total_mb:>7.2f}  {engine:<6}{elapsed:>8.3f}{total_mb / elapsed:>8.1f}")
+    print(f"speedup (bs4 / lxml): {totals['bs4'] / totals['lxml']:.1f}x")
+
+if __name__ == "__main__":
+    main()
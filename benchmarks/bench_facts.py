@@ -0,0 +1,61 @@
+"""LLM calls avoided by answering main.TEST_QUERIES from the fact table.
+
+Loads (or builds) the saved index, answers each query from the extracted
+financial facts and reports hits and lookup latency. With --llm-mode the
+fact-table hits are also generated through RAG to measure the time saved.
+
+    python benchmarks/bench_facts.py [--index-dir index] [--llm-mode hf|openai]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from facts import answer_from_facts
+from main import TEST_QUERIES, load_or_build_index, retrieve_for_query, assemble_prompt
+from generators import generate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default="index")
+    parser.add_argument("--repeat", type=int, default=1000, help="lookups per query for latency")
+    parser.add_argument("--llm-mode", choices=("hf", "openai"), default=None,
+                        help="also time generation for the queries the fact table answers")
+    args = parser.parse_args()
+
+    vs, file_map = load_or_build_index(args.data_dir, args.index_dir)
+    if file_map is None:
+        sys.exit("No index available")
+    print(f"\n{len(file_map.facts)} facts for {', '.join(file_map.facts.companies())}\n")
+
+    hits = []
+    latencies = []
+    for query in TEST_QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            answer = answer_from_facts(query, file_map.facts)
+        latencies.append((time.perf_counter() - start) / args.repeat * 1e6)
+        status = "fact" if answer else "rag "
+        print(f"[{status}] {latencies[-1]:8.1f} us  {query}")
+        if answer:
+            print(f"        {answer['answer']}")
+            hits.append(query)
+
+    latencies = np.array(latencies)
+    print(f"\nLLM calls avoided: {len(hits)}/{len(TEST_QUERIES)}")
+    print(f"Fact lookup latency: p50 {np.percentile(latencies, 50):.1f} us, max {latencies.max():.1f} us")
+
+    if args.llm_mode and hits:
+        prompts = [assemble_prompt(query, retrieve_for_query(vs, file_map, query, args.llm_mode)[1], args.llm_mode)[0]
+                   for query in hits]
+        _, gen_time = generate(prompts, args.llm_mode)
+        print(f"Generation time saved ({args.llm_mode}): {gen_time:.2f}s "
+              f"for {len(hits)} queries ({gen_time / len(hits):.2f}s each)")
+
+if __name__ == "__main__":
+    main()
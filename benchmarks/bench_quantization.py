@@ -0,0 +1,95 @@
+"""Memory saved and recall lost by compressed vector codes (fp16 / int8 / PQ), with and without re-ranking.
+
+Vectors and queries are the same as bench_ann.py. Every setting is compared
+with the exact float32 flat index: recall@k of the top-k ids, p50 latency and
+the size of the in-memory index. Re-ranking re-scores rerank * k candidates
+against the float32 vectors, which live in a memory-mapped file rather than
+in the index. Chunk text storage is compared the same way: a list of Python
+strings against the UTF-8 blob that ChunkStore maps from disk.
+
+    python benchmarks/bench_quantization.py [--index-type flat] [--k 5] [--rerank 4] [--pq-m 48]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_ann import load_vectors, make_queries, recall_at_k, run
+from chunkstore import ChunkStore
+from ingest import process_filing
+from vectorstore import COMPRESSIONS, VectorStore
+
+def index_mb(vs):
+    return len(faiss.serialize_index(vs.index)) / 1e6
+
+def load_texts(index_dir, data_dir):
+    if (Path(index_dir) / "chunks.npz").exists():
+        store = ChunkStore.load(index_dir)
+        return [store.text(i) for i in store.ids().tolist()]
+    texts = []
+    for fname in sorted(p.name for p in Path(data_dir).glob("*.html")):
+        texts.extend(process_filing(data_dir, fname)[0])
+    return texts
+
+def text_report(texts):
+    # list of str: object headers + characters + one pointer per entry
+    as_strings = (sum(sys.getsizeof(t) for t in texts) + sys.getsizeof(texts)) / 1e6
+    blob = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+    offsets = len(texts) * (8 + 4) / 1e6  # int64 offset + int32 length per chunk
+    print(f"\nChunk texts ({len(texts)} chunks):")
+    print(f"  Python strings          {as_strings:>8.2f} MB resident")
+    print(f"  UTF-8 blob + offsets    {blob:>8.2f} MB on disk, {offsets:.2f} MB resident offsets"
+          f" (blob pages mapped on demand; saves {as_strings - offsets:.2f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default="index")
+    parser.add_argument("--index-type", default="flat", choices=("flat", "hnsw", "ivf"))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--n-queries", type=int, default=500)
+    parser.add_argument("--rerank", type=int, default=4, help="shortlist size as a multiple of k")
+    parser.add_argument("--pq-m", type=int, default=0, help="PQ sub-quantizers, i.e. bytes per vector (default: dim / 8)")
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.index_dir, args.data_dir)
+    queries = make_queries(vectors, args.n_queries)
+    dim = vectors.shape[1]
+    nlist = max(1, int(4 * np.sqrt(len(vectors))))
+    pq_m = args.pq_m or dim // 8
+    print(f"{len(vectors)} vectors, dim {dim}, {len(queries)} queries, k={args.k}, {args.index_type} index\n")
+
+    exact = VectorStore(dim, "flat")
+    exact.add(vectors)
+    truth, _ = run(exact, queries, args.k)
+    vectors_mb = vectors.nbytes / 1e6
+
+    print(f"{'codes':<7}{'rerank':<8}{'index MB':>10}{'saved':>8}{'recall@k':>10}{'lost':>8}{'p50 ms':>9}{'build s':>9}")
+    baseline_mb = None
+    for compression in COMPRESSIONS:
+        vs = VectorStore(dim, args.index_type, nlist=nlist, compression=compression, pq_m=pq_m)
+        start = time.perf_counter()
+        vs.add(vectors)
+        build_s = time.perf_counter() - start
+        size_mb = index_mb(vs)
+        if baseline_mb is None:
+            baseline_mb = size_mb
+        for rerank in ((0,) if compression == "none" else (0, args.rerank)):
+            vs.set_search_params(rerank=rerank)
+            found, latencies = run(vs, queries, args.k)
+            recall = recall_at_k(truth, found)
+            label = f"x{rerank}" if rerank else "-"
+            print(f"{compression:<7}{label:<8}{size_mb:>10.2f}{1 - size_mb / baseline_mb:>8.0%}{recall:>10.3f}"
+                  f"{1 - recall:>8.3f}{np.percentile(latencies, 50):>9.3f}{build_s:>9.2f}")
+    print(f"\nRe-ranking reads shortlisted rows from the {vectors_mb:.2f} MB float32 vector file (memory-mapped).")
+
+    text_report(load_texts(args.index_dir, args.data_dir))
+
+if __name__ == "__main__":
+    main()
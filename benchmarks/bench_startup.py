@@ -0,0 +1,122 @@
+"""CLI startup cost: import time per entry point, heavy modules loaded at import, and time to first prompt.
+
+Each entry point is imported in a fresh interpreter under `python -X importtime`;
+the report lists its total import time and the modules that cost the most
+(cumulative, i.e. including what they import). Heavy backends (torch,
+sentence_transformers, faiss, transformers, openai, the HTML/PDF parsers) and
+the ingestion modules must not be imported by the query path until first
+use. Time to first prompt is measured on `src/ask.py` in interactive mode, and
+one cold question end to end when an index exists.
+
+    python benchmarks/bench_startup.py [--index-dir index] [--llm-mode stub] [--max-prompt-ms 1000]
+
+Exits with status 1 if a limit is exceeded or a heavy module is imported eagerly.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+ENTRY_POINTS = ("ask", "main", "server")
+# imported on first use only, never by importing an entry point
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "faiss", "openai", "tiktoken",
+                 "bs4", "lxml", "pdfplumber", "requests", "ingest", "extractor", "chunker", "downloader",
+                 "embed_engine")
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(SRC_DIR)] + [p for p in [env.get("PYTHONPATH")] if p])
+    env["PYTHONUNBUFFERED"] = "1"
+    return env
+
+def import_profile(module):
+    """Fresh `import module`: (total ms, [(cumulative ms, name)] of what it imported, heavy modules loaded)."""
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                          env=_env(), cwd=SRC_DIR)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, len(name) - len(name.lstrip()), name.strip()))
+    # a module's own imports are the deeper-indented rows logged just before it
+    end = next(i for i in range(len(rows) - 1, -1, -1) if rows[i][2] == module)
+    start = end
+    while start > 0 and rows[start - 1][1] > rows[end][1]:
+        start -= 1
+    loaded = set(json.loads(proc.stdout.strip().splitlines()[-1]))
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+    return rows[end][0], [(ms, name) for ms, _, name in rows[start:end]], heavy
+
+def time_to_prompt(index_dir, llm_mode):
+    """Milliseconds from process start until ask.py prints its interactive prompt."""
+    cmd = [sys.executable, str(SRC_DIR / "ask.py"), "--index-dir", index_dir, "--llm-mode", llm_mode]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            env=_env())
+    seen = b""
+    while "❓".encode("utf-8") not in seen:
+        byte = proc.stdout.read(1)
+        if not byte:
+            break
+        seen += byte
+    elapsed = (time.perf_counter() - start) * 1000
+    proc.stdin.close()
+    proc.wait()
+    return elapsed
+
+def time_to_answer(index_dir, llm_mode, query):
+    """Milliseconds for `ask.py "<query>"` from process start to exit."""
+    cmd = [sys.executable, str(SRC_DIR / "ask.py"), "--index-dir", index_dir, "--llm-mode", llm_mode, query]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, env=_env())
+    return (time.perf_counter() - start) * 1000 if proc.returncode == 0 else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index-dir", default="index")
+    parser.add_argument("--llm-mode", default="stub", choices=("hf", "openai", "stub"))
+    parser.add_argument("--query", default="How did NVIDIA's data center revenue grow from 2022 to 2023?")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports listed per entry point")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (best is reported)")
+    parser.add_argument("--max-prompt-ms", type=float, default=1000)
+    parser.add_argument("--max-import-ms", type=float, default=None, help="limit for `import ask`")
+    args = parser.parse_args()
+    index_dir = str(Path(args.index_dir).resolve())
+
+    failures = []
+    for module in ENTRY_POINTS:
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        total, rows, heavy = min(profiles, key=lambda p: p[0])
+        warning = f"  ⚠️  eager heavy imports: {', '.join(heavy)}" if heavy else ""
+        print(f"\nimport {module}: {total:.0f} ms{warning}")
+        for ms, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"  {ms:>8.1f} ms  {name}")
+        if heavy:
+            failures.append(f"import {module} loads {', '.join(heavy)}")
+        if module == "ask" and args.max_import_ms and total > args.max_import_ms:
+            failures.append(f"import ask took {total:.0f} ms (limit {args.max_import_ms:.0f})")
+
+    prompt_ms = min(time_to_prompt(index_dir, args.llm_mode) for _ in range(args.repeat))
+    print(f"\nTime to first prompt (ask.py): {prompt_ms:.0f} ms")
+    if prompt_ms > args.max_prompt_ms:
+        failures.append(f"time to first prompt {prompt_ms:.0f} ms (limit {args.max_prompt_ms:.0f})")
+    if (Path(index_dir) / "manifest.json").exists():
+        answer_ms = time_to_answer(index_dir, args.llm_mode, args.query)
+        if answer_ms is not None:
+            print(f"Cold single question (ask.py, {args.llm_mode}): {answer_ms:.0f} ms")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("\n✅ Startup within limits")
+
+if __name__ == "__main__":
+    main()
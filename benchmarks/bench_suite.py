@@ -0,0 +1,327 @@
+"""Offline benchmark suite: ingestion throughput, query latency per stage and retrieval quality.
+
+Builds a fresh index from data/ in a child process (so peak RSS covers only
+ingestion), then runs the labelled queries in benchmarks/labelled_queries.json
+against it: per-stage p50/p95 latency from the pipeline spans, and recall@k /
+MRR of the retrieved sources. Everything lands in one JSON report; with
+--baseline each metric is compared against a stored report and regressions
+beyond the tolerance are flagged (exit status 1).
+
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json [--repeat 5] [--k 10]
+    python benchmarks/bench_suite.py --seed-labels draft.json   # draft labels from query_*_result.json
+
+A labelled chunk is any chunk of the labelled company/year filing whose text
+contains the evidence string (whitespace and case are ignored), so labels
+survive chunker changes. Evidence that no indexed chunk contains (e.g. a
+company missing from data/) is left out of recall and reported as unreachable.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+# canned answers with no artificial delay, so generation does not swamp the retrieval stages
+os.environ.setdefault("STUB_LLM_DELAY_MS", "0")
+
+import tracing
+from embeddings import MODEL_NAME, clear_query_cache
+from index_store import load_index
+from main import (INGEST_WORKERS, RETRIEVAL_MODE, chunker_params, index_params, load_or_build_index,
+                  retrieve_for_query, run_query, search_params)
+
+LABELS_FILE = BENCH_DIR / "labelled_queries.json"
+REPORT_VERSION = 1
+# (metric, direction): "higher" is better or "lower" is better
+HEADLINE_METRICS = [
+    ("ingest.extract_mb_per_s", "higher"),
+    ("ingest.chunks_per_s", "higher"),
+    ("ingest.embeddings_per_s", "higher"),
+    ("ingest.peak_rss_mb", "lower"),
+    ("ingest.index_mb", "lower"),
+    ("quality.recall_at_k", "higher"),
+    ("quality.mrr", "higher"),
+]
+# sub-millisecond stages jitter by more than any sane relative tolerance
+LATENCY_SLACK_MS = 0.5
+
+def _max_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _dir_mb(path):
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file()) / 1e6
+
+def _ingest(data_dir, index_dir):
+    # runs in a fresh process
+    tracing.enable()
+    start = time.perf_counter()
+    vs, _ = load_or_build_index(data_dir, index_dir, rebuild=True)
+    wall = time.perf_counter() - start
+    if vs is None:
+        return None
+    return wall, tracing.summary(), dict(tracing.counters), _max_rss_mb()
+
+def bench_ingest(data_dir, index_dir):
+    files = sorted(Path(data_dir).glob("*.html"))
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        outcome = pool.submit(_ingest, data_dir, index_dir).result()
+    if outcome is None:
+        raise SystemExit(f"Could not build an index from '{data_dir}'")
+    wall, stages, counters, peak_rss = outcome
+
+    def stage_s(name):
+        return stages.get(name, {}).get("total_s", 0.0)
+
+    def rate(n, seconds):
+        return round(n / seconds, 2) if seconds else None
+
+    n_chunks = counters.get("chunks", 0)
+    return {
+        "files": len(files),
+        "input_mb": round(sum(p.stat().st_size for p in files) / 1e6, 2),
+        "wall_s": round(wall, 3),
+        "chunks": int(n_chunks),
+        "extract_mb_per_s": rate(counters.get("extract_bytes", 0) / 1e6, stage_s("extract")),
+        "chunks_per_s": rate(n_chunks, wall),
+        "embeddings_per_s": rate(counters.get("embedded_texts", 0), stage_s("encode")),
+        "peak_rss_mb": round(peak_rss, 1),
+        "index_mb": round(_dir_mb(index_dir), 2),
+        "stage_s": {name: s["total_s"] for name, s in stages.items()},
+        "workers": INGEST_WORKERS,
+    }
+
+def bench_latency(vs, file_map, queries, repeat, llm_mode, model_name):
+    """p50/p95 milliseconds per stage over `repeat` passes; the query embedding cache is cleared per pass."""
+    samples = defaultdict(list)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        clear_query_cache()
+        for query in queries:
+            with redirect_stdout(io.StringIO()):
+                result = run_query(vs, file_map, query, llm_mode, model_name)
+            for key, seconds in result["timings"].items():
+                samples[key[:-2] if key.endswith("_s") else key].append(seconds * 1000)
+    wall = time.perf_counter() - start
+    stages = {name: {"count": len(ms), "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                     "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+              for name, ms in sorted(samples.items())}
+    return {"queries_per_s": round(repeat * len(queries) / wall, 2), "llm_mode": llm_mode, "stages": stages}
+
+def _norm(text):
+    return " ".join(text.split()).lower()
+
+def _matches(file_map, chunk_id, label):
+    return (file_map.value("company", chunk_id) == label["company"]
+            and file_map.value("year", chunk_id) == label["year"]
+            and _norm(label["evidence"]) in _norm(file_map.text(chunk_id)))
+
+def reachable(file_map, label):
+    """Whether any indexed chunk satisfies the label."""
+    ids = np.flatnonzero(file_map.mask(company=label["company"], year=label["year"]))
+    return any(_matches(file_map, int(i), label) for i in ids)
+
+def score_query(file_map, ranked_ids, labels, k):
+    """(recall@k, reciprocal rank of the first relevant chunk) for one query's ranked chunk ids."""
+    top = ranked_ids[:k]
+    found = sum(any(_matches(file_map, i, label) for i in top) for label in labels)
+    rr = next((1 / rank for rank, i in enumerate(top, 1) if any(_matches(file_map, i, label) for label in labels)), 0.0)
+    return found / len(labels), rr
+
+def bench_quality(vs, file_map, labelled, k):
+    per_query = []
+    for item in labelled:
+        labels = [label for label in item["relevant"] if reachable(file_map, label)]
+        row = {"query": item["query"], "labels": len(item["relevant"]), "reachable": len(labels)}
+        if labels:
+            with redirect_stdout(io.StringIO()):
+                result, _ = retrieve_for_query(vs, file_map, item["query"])
+            ranked = [src["chunk_id"] for src in result["sources"]]
+            recall, rr = score_query(file_map, ranked, labels, k)
+            row.update({"recall": round(recall, 4), "rr": round(rr, 4)})
+        per_query.append(row)
+
+    judged = [row for row in per_query if "recall" in row]
+    return {
+        "k": k,
+        "retrieval_mode": RETRIEVAL_MODE,
+        "judged_queries": len(judged),
+        "unreachable_labels": sum(row["labels"] - row["reachable"] for row in per_query),
+        "recall_at_k": round(float(np.mean([row["recall"] for row in judged])), 4) if judged else None,
+        "mrr": round(float(np.mean([row["rr"] for row in judged])), 4) if judged else None,
+        "per_query": per_query,
+    }
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=BENCH_DIR, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def metadata(data_dir):
+    return {
+        "report_version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "data_dir": str(data_dir),
+        "config": {"embedding_model": MODEL_NAME, "chunker": chunker_params(), "index": index_params(),
+                   "retrieval_mode": RETRIEVAL_MODE},
+    }
+
+def _lookup(report, dotted):
+    value = report
+    for key in dotted.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def compare(report, baseline, tolerance, quality_tolerance):
+    """[(metric, baseline, current, regressed), ...] for every metric present in both reports.
+
+    Throughput, memory, size and latency regress when they are more than
+    `tolerance` (relative) worse; recall and MRR when they drop by more than
+    `quality_tolerance` (absolute).
+    """
+    metrics = list(HEADLINE_METRICS)
+    for stage in (_lookup(report, "latency.stages") or {}):
+        metrics += [(f"latency.stages.{stage}.p50_ms", "lower"), (f"latency.stages.{stage}.p95_ms", "lower")]
+
+    rows = []
+    for name, direction in metrics:
+        old, new = _lookup(baseline, name), _lookup(report, name)
+        if old is None or new is None:
+            continue
+        if name.startswith("quality."):
+            regressed = old - new > quality_tolerance
+        elif direction == "higher":
+            regressed = new < old * (1 - tolerance)
+        else:
+            slack = LATENCY_SLACK_MS if name.startswith("latency.") else 0.0
+            regressed = new > old * (1 + tolerance) and new - old > slack
+        rows.append((name, old, new, regressed))
+    return rows
+
+def print_report(report):
+    ingest = report.get("ingest")
+    if ingest:
+        print(f"\nIngestion: {ingest['files']} files, {ingest['input_mb']} MB in {ingest['wall_s']}s")
+        print(f"  extract {ingest['extract_mb_per_s']} MB/s | {ingest['chunks']} chunks, {ingest['chunks_per_s']} chunks/s"
+              f" | {ingest['embeddings_per_s']} embeddings/s")
+        print(f"  peak RSS {ingest['peak_rss_mb']} MB | index on disk {ingest['index_mb']} MB")
+
+    latency = report["latency"]
+    print(f"\nQuery latency ({latency['llm_mode']} LLM, {latency['queries_per_s']} queries/s):")
+    print(f"  {'stage':<18}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, s in latency["stages"].items():
+        print(f"  {name:<18}{s['count']:>6}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}")
+
+    quality = report["quality"]
+    print(f"\nRetrieval quality ({quality['retrieval_mode']}, {quality['judged_queries']} judged queries, "
+          f"{quality['unreachable_labels']} unreachable labels):")
+    print(f"  recall@{quality['k']} {quality['recall_at_k']} | MRR {quality['mrr']}")
+
+def print_comparison(rows, baseline):
+    meta = baseline.get("meta", {})
+    print(f"\nAgainst baseline (commit {meta.get('commit')}, {meta.get('created')}):")
+    print(f"  {'metric':<38}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, old, new, regressed in rows:
+        change = f"{(new - old) / old:+.1%}" if old else "n/a"
+        print(f"  {name:<38}{old:>12.4g}{new:>12.4g}{change:>9}" + ("  <-- REGRESSION" if regressed else ""))
+
+def seed_labels(results_dir, out_path, evidence_chars=80):
+    """Draft a label file from saved query_*_result.json sources, to be pruned by hand."""
+    drafts = []
+    for path in sorted(Path(results_dir).glob("query_*_result.json"), key=lambda p: int(p.stem.split("_")[1])):
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+        relevant = [{"company": src["company"], "year": src["year"],
+                     "evidence": src["excerpt"].removesuffix("...")[:evidence_chars].strip()}
+                    for src in result.get("sources", [])]
+        drafts.append({"query": result["query"], "seed": path.name, "relevant": relevant})
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(drafts, f, indent=2)
+    print(f"Wrote {len(drafts)} draft queries to '{out_path}'")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--labels", default=str(LABELS_FILE))
+    parser.add_argument("--k", type=int, default=10, help="cut-off for recall@k and MRR (sources are capped at 10)")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the query set for latency")
+    parser.add_argument("--llm-mode", default="stub")
+    parser.add_argument("--model-name", default="stub")
+    parser.add_argument("--index-dir", help="benchmark queries against this saved index and skip ingestion")
+    parser.add_argument("--out", default="bench_report.json")
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--save-baseline", help="also write this run's report here")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="relative slack for throughput/memory/latency")
+    parser.add_argument("--quality-tolerance", type=float, default=0.01, help="absolute slack for recall/MRR")
+    parser.add_argument("--seed-labels", metavar="OUT", help="draft labels from query_*_result.json and exit")
+    args = parser.parse_args()
+
+    if args.seed_labels:
+        seed_labels(".", args.seed_labels)
+        return
+
+    with open(args.labels, encoding="utf-8") as f:
+        labelled = json.load(f)
+
+    report = {"meta": metadata(args.data_dir)}
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = args.index_dir
+        if index_dir is None:
+            index_dir = str(Path(tmp) / "index")
+            print(f"Building a fresh index from '{args.data_dir}'...")
+            report["ingest"] = bench_ingest(args.data_dir, index_dir)
+
+        vs, file_map, _ = load_index(index_dir, mmap=True, **search_params())
+        if vs is None:
+            raise SystemExit(f"No saved index in '{index_dir}'")
+        queries = [item["query"] for item in labelled]
+        report["latency"] = bench_latency(vs, file_map, queries, args.repeat, args.llm_mode, args.model_name)
+        report["quality"] = bench_quality(vs, file_map, labelled, args.k)
+
+    print_report(report)
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to '{path}'")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("config") != report["meta"]["config"]:
+            print("\n⚠️  Baseline was recorded with a different model/chunker/index/retrieval config")
+        rows = compare(report, baseline, args.tolerance, args.quality_tolerance)
+        print_comparison(rows, baseline)
+        regressions = [name for name, _, _, regressed in rows if regressed]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
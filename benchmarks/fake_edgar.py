@@ -0,0 +1,206 @@
+"""Local stand-in for the EDGAR pages the downloader touches, for offline runs.
+
+Serves browse-edgar search pages, filing index pages and generated 10-K
+documents for any CIK/year, plus fixture bulk indexes for a synthetic
+universe of companies (ticker T000 = CIK 1000, ...): company_tickers.json,
+quarterly full-index master.idx files and per-company submissions JSON.
+Responses carry ETag/Last-Modified validators (304 on a matching conditional
+request), with optional per-request latency and an injected rate of 429/503s.
+
+    python benchmarks/fake_edgar.py [--port 8800] [--fail-rate 0.1]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+
+FIXTURE_YEARS = range(2015, 2025)
+
+def accession(cik, year, seq=1):
+    return f"{int(cik):010d}-{int(year) % 100:02d}-{seq:06d}"
+
+def fixture_ciks(n_companies):
+    return [str(1000 + i) for i in range(n_companies)]
+
+def fixture_filings(cik):
+    """(form, filing date, accession) per year: one 10-K, three 10-Qs and an 8-K."""
+    rows = []
+    for year in FIXTURE_YEARS:
+        rows.append(("10-K", f"{year}-02-15", accession(cik, year)))
+        rows.extend(("10-Q", f"{year}-{month:02d}-01", accession(cik, year, seq))
+                    for seq, month in ((2, 5), (3, 8), (4, 11)))
+        rows.append(("8-K", f"{year}-06-30", accession(cik, year, 5)))
+    return rows
+
+def company_tickers(n_companies):
+    return {str(i): {"cik_str": int(cik), "ticker": f"T{i:03d}", "title": f"Test Company {i} Inc."}
+            for i, cik in enumerate(fixture_ciks(n_companies))}
+
+def master_index(n_companies, year, quarter):
+    lines = ["Description:           Master Index of EDGAR Dissemination Feed",
+             f"Last Data Received:    {year} QTR{quarter}", "",
+             "CIK|Company Name|Form Type|Date Filed|Filename",
+             "-" * 80]
+    months = range(3 * quarter - 2, 3 * quarter + 1)
+    for i, cik in enumerate(fixture_ciks(n_companies)):
+        for form, date, acc in fixture_filings(cik):
+            if date.startswith(str(year)) and int(date[5:7]) in months:
+                lines.append(f"{cik}|Test Company {i} Inc.|{form}|{date}|edgar/data/{cik}/{acc}.txt")
+    return "\n".join(lines) + "\n"
+
+def submissions(cik, index):
+    rows = sorted(fixture_filings(cik), key=lambda row: row[1], reverse=True)
+    # like EDGAR, the newest filings are inline and older ones are paged out to an extra file
+    recent, older = rows[:20], rows[20:]
+    def table(rows):
+        return {
+            "accessionNumber": [acc for _, _, acc in rows],
+            "filingDate": [date for _, date, _ in rows],
+            "form": [form for form, _, _ in rows],
+            "primaryDocument": [f"doc{acc.replace('-', '')}.htm" for _, _, acc in rows],
+        }
+    extra_name = f"CIK{int(cik):010d}-submissions-001.json"
+    return {
+        "cik": cik,
+        "name": f"Test Company {index} Inc.",
+        "filings": {
+            "recent": table(recent),
+            "files": [{"name": extra_name, "filingFrom": older[-1][1], "filingTo": older[0][1]}] if older else [],
+        },
+    }, table(older)
+
+def search_page(cik, year):
+    acc = accession(cik, year)
+    href = f"/Archives/edgar/data/{int(cik)}/{acc.replace('-', '')}/{acc}-index.htm"
+    return (f"<html><body><table><tr><th>Filings</th><th>Format</th><th>Description</th><th>Filed</th></tr>"
+            f"<tr><td>10-K</td><td><a href=\"{href}\" id=\"documentsbutton\">&nbsp;Documents</a></td>"
+            f"<td>Annual report</td><td>{year}-02-01</td></tr></table></body></html>")
+
+def index_page(cik, acc):
+    href = f"/Archives/edgar/data/{int(cik)}/{acc}/doc{acc}.htm"  # acc without dashes
+    return (f"<html><body><table><tr><th>Seq</th><th>Description</th><th>Document</th><th>Type</th></tr>"
+            f"<tr><td>1</td><td>10-K</td><td><a href=\"{href}\">doc{acc}.htm</a></td><td>10-K</td></tr>"
+            f"<tr><td>2</td><td>EX-21</td><td><a href=\"/ex21_ex.htm\">ex21_ex.htm</a></td><td>EX-21</td></tr>"
+            f"</table></body></html>")
+
+def document(cik, acc, size):
+    para = f"<p>Annual report of CIK {cik}, accession {acc}. Total revenue increased compared to the prior year.</p>\n"
+    return "<html><body>" + para * max(1, size // len(para)) + "</body></html>"
+
+class FakeEdgar(ThreadingHTTPServer):
+    request_queue_size = 128
+    daemon_threads = True
+
+    def __init__(self, address, doc_size=200_000, fail_rate=0.0, latency=0.0, seed=0, n_companies=50):
+        super().__init__(address, Handler)
+        self.doc_size = doc_size
+        self.n_companies = n_companies
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "failures": 0, "not_modified": 0}
+        self.request_times = []
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def inject_failure(self):
+        with self.lock:
+            return self.rng.random() < self.fail_rate
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+class Handler(BaseHTTPRequestHandler):
+    def _body(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/cgi-bin/browse-edgar":
+            return "text/html", search_page(query["CIK"][0], query["dateb"][0][:4])
+        match = re.fullmatch(r"/Archives/edgar/data/(\d+)/(\d+)/([\d-]+)-index\.htm", url.path)
+        if match and match.group(3).replace("-", "") == match.group(2):
+            return "text/html", index_page(*match.groups()[:2])
+        match = re.fullmatch(r"/Archives/edgar/data/(\d+)/(\d+)/doc\2\.htm", url.path)
+        if match:
+            return "text/html", document(*match.groups(), self.server.doc_size)
+        n_companies = self.server.n_companies
+        if url.path == "/files/company_tickers.json":
+            return "application/json", json.dumps(company_tickers(n_companies))
+        match = re.fullmatch(r"/Archives/edgar/full-index/(\d{4})/QTR([1-4])/master\.idx", url.path)
+        if match and int(match.group(1)) in FIXTURE_YEARS:
+            return "text/plain", master_index(n_companies, int(match.group(1)), int(match.group(2)))
+        match = re.fullmatch(r"/submissions/CIK(\d{10})(-submissions-001)?\.json", url.path)
+        if match and str(int(match.group(1))) in fixture_ciks(n_companies):
+            cik = str(int(match.group(1)))
+            recent, older = submissions(cik, fixture_ciks(n_companies).index(cik))
+            return "application/json", json.dumps(older if match.group(2) else recent)
+        return None
+
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+        with server.lock:
+            server.request_times.append(time.monotonic())
+        if server.latency:
+            time.sleep(server.latency)
+        if server.inject_failure():
+            server.count("failures")
+            self.send_response(server.rng.choice((429, 503)))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        found = self._body()
+        if found is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        content_type, body = found
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            server.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_edgar(port=0, **kwargs):
+    """Run a FakeEdgar on localhost in a daemon thread; returns the server (see .base_url)."""
+    server = FakeEdgar(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--companies", type=int, default=50, help="size of the fixture ticker universe")
+    args = parser.parse_args()
+    server = FakeEdgar(("127.0.0.1", args.port), fail_rate=args.fail_rate, latency=args.latency,
+                       n_companies=args.companies)
+    print(f"Fake EDGAR on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,67 @@
+"""Load generator for src/server.py: throughput and tail latency under concurrent clients.
+
+Start the server first (e.g. `python src/server.py --llm-mode stub`), then
+
+    python benchmarks/load_server.py [--clients 16] [--requests 500] [--distinct]
+
+Queries cycle through main.TEST_QUERIES; --distinct appends the request number
+so every query misses the embedding cache and exercises micro-batching.
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from main import TEST_QUERIES
+
+def post_query(url, query):
+    body = json.dumps({"query": query}).encode("utf-8")
+    request = urllib.request.Request(url + "/query", data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+def get_json(url, path):
+    with urllib.request.urlopen(url + path, timeout=10) as response:
+        return json.load(response)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--distinct", action="store_true", help="make every query text unique")
+    args = parser.parse_args()
+
+    print(f"Server: {get_json(args.url, '/health')}")
+    queries = [TEST_QUERIES[i % len(TEST_QUERIES)] + (f" (request {i})" if args.distinct else "")
+               for i in range(args.requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        outcomes = list(pool.map(lambda q: post_query(args.url, q), queries))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([seconds for seconds, _ in outcomes]) * 1000
+    errors = sum(not ok for _, ok in outcomes)
+    print(f"\n{args.requests} requests, {args.clients} clients, {errors} errors in {wall:.2f}s")
+    print(f"Throughput: {args.requests / wall:.1f} req/s")
+    print("Latency (ms): " + ", ".join(f"p{p} {np.percentile(latencies, p):.1f}" for p in (50, 95, 99))
+          + f", max {latencies.max():.1f}")
+    metrics = get_json(args.url, "/metrics")
+    print(f"Embedding batches: {metrics['embed_batching']}")
+
+if __name__ == "__main__":
+    main()
@@ -52,3 +52,44 @@ def decompose_query(query):
         sub_queries = [query]
     
     return sub_queries
+
+COMPANY_ALIASES = {
+    "microsoft": "Microsoft",
+    "msft": "Microsoft",
+    "google": "Google",
+    "alphabet": "Google",
+    "googl": "Google",
+    "nvidia": "NVIDIA",
+    "nvda": "NVIDIA"
+}
+
+def route_query(sub_query, parent_query=None):
+    """Pull company and filing-year constraints out of a sub-query.
+
+    Constraints the sub-query does not mention are taken from parent_query
+    (decompose_query drops the year from "which company" sub-queries).
+    A 10-K for fiscal year Y is filed in Y or Y+1 depending on the company's
+    fiscal calendar, so a year Y mention allows filings from both years.
+    """
+    text = sub_query.lower()
+    companies = []
+    for alias, company in COMPANY_ALIASES.items():
+        if re.search(rf"\b{alias}\b", text) and company not in companies:
+            companies.append(company)
+    
+    years = []
+    for year in re.findall(r'\b20\d{2}\b', text):
+        for y in (year, str(int(year) + 1)):
+            if y not in years:
+                years.append(y)
+    
+    route = {
+        "company": companies or None,
+        "year": years or None
+    }
+    if parent_query:
+        parent = route_query(parent_query)
+        for key, val in route.items():
+            if val is None:
+                route[key] = parent[key]
+    return route
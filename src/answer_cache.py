@@ -0,0 +1,180 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+ANSWER_CACHE_FILE = "answer_cache.json"
+
+_PUNCT = re.compile(r"[^\w\s%$.]")
+
+def normalize_query(query):
+    """Case, whitespace, quote style and trailing punctuation do not change the question."""
+    text = query.lower().replace("’", "'")
+    text = _PUNCT.sub(" ", text)
+    return " ".join(text.split()).rstrip(" .")
+
+def config_key(llm_mode, model_name, filters=None, retrieval_mode=None, use_router=True):
+    """Answers are only shared between requests with the same generation and retrieval settings."""
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    return json.dumps([llm_mode, model_name, filters, retrieval_mode, use_router], sort_keys=True)
+
+def _overlap(a, b):
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+class AnswerCache:
+    """Two-tier cache of generated answers.
+
+    The exact tier keys on (settings, normalized query) and skips retrieval as
+    well as generation. The semantic tier matches the query embedding against
+    cached queries with the same settings (cosine >= threshold) and is checked
+    after retrieval: a hit is only served when the freshly retrieved chunk ids
+    overlap the cached entry's by at least min_overlap (Jaccard). Every entry
+    records the index version it was generated from and is dropped once that
+    changes, so re-indexing invalidates answers automatically. Entries expire
+    after ttl seconds (0 = never); beyond max_entries the least recently used go.
+    """
+
+    def __init__(self, path=None, max_entries=1000, ttl=7 * 24 * 3600, threshold=0.95, min_overlap=0.8):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # (config, normalized query) -> entry
+        self._matrix = None  # (keys, normalized embeddings) for the semantic tier
+        self.stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                      "invalidated": 0, "evicted": 0, "saved_s": 0.0}
+        if self.path and self.path.exists():
+            self._load()
+
+    def _expired(self, entry, now):
+        return self.ttl and now - entry["created"] > self.ttl
+
+    def _drop(self, key, stat):
+        self.entries.pop(key, None)
+        self._matrix = None
+        self.stats[stat] += 1
+
+    def _valid(self, key, entry, file_map, now):
+        if entry["index_version"] != file_map.version or self._expired(entry, now):
+            self._drop(key, "invalidated")
+            return False
+        return True
+
+    def _hit(self, key, entry, tier):
+        self.entries.move_to_end(key)
+        self.stats[f"{tier}_hits"] += 1
+        # a semantic hit has already paid for retrieval
+        self.stats["saved_s"] += entry["generation_s"] + (entry["retrieval_s"] if tier == "exact" else 0.0)
+        result = copy.deepcopy(entry["result"])
+        result["cache"] = tier
+        return result
+
+    def get_exact(self, config, query, file_map):
+        """Cached result for the same question asked with the same settings, or None."""
+        key = (config, normalize_query(query))
+        with self.lock:
+            self.stats["lookups"] += 1
+            entry = self.entries.get(key)
+            if entry is None or not self._valid(key, entry, file_map, time.time()):
+                return None
+            # ids that were removed from the index since (e.g. a filing was dropped) invalidate too
+            if not all(chunk_id in file_map for chunk_id in entry["chunk_ids"]):
+                self._drop(key, "invalidated")
+                return None
+            result = self._hit(key, entry, "exact")
+            result["query"] = query
+            return result
+
+    def _semantic_matrix(self):
+        if self._matrix is None:
+            keys = [key for key, entry in self.entries.items() if entry["embedding"] is not None]
+            if not keys:
+                return keys, None
+            vectors = np.array([self.entries[key]["embedding"] for key in keys], dtype='float32')
+            self._matrix = (keys, vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12))
+        return self._matrix
+
+    def get_semantic(self, config, query_embedding, chunk_ids, file_map):
+        """Cached result of a differently worded question with the same settings and retrieved chunks, or None.
+
+        Call after get_exact() missed; counts the final miss.
+        """
+        with self.lock:
+            keys, vectors = self._semantic_matrix()
+            if query_embedding is not None and len(keys):
+                q = np.asarray(query_embedding, dtype='float32')
+                scores = vectors @ (q / max(np.linalg.norm(q), 1e-12))
+                now = time.time()
+                for i in np.argsort(-scores):
+                    if scores[i] < self.threshold:
+                        break
+                    key = keys[i]
+                    if key[0] != config or key not in self.entries:
+                        continue
+                    entry = self.entries[key]
+                    if not self._valid(key, entry, file_map, now):
+                        continue
+                    if _overlap(entry["chunk_ids"], chunk_ids) >= self.min_overlap:
+                        return self._hit(key, entry, "semantic")
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, config, query, query_embedding, result, file_map, retrieval_s, generation_s):
+        """Cache a generated result with the time it took to retrieve and to generate."""
+        entry = {
+            "result": copy.deepcopy(result),
+            "embedding": None if query_embedding is None else np.asarray(query_embedding, dtype='float32').tolist(),
+            "chunk_ids": list(result.get("chunk_ids", [])),
+            "index_version": file_map.version,
+            "created": time.time(),
+            "retrieval_s": round(retrieval_s, 4),
+            "generation_s": round(generation_s, 4),
+        }
+        key = (config, normalize_query(query))
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evicted"] += 1
+            self._matrix = None
+
+    def metrics(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        stats["hit_rate"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["saved_s"] = round(stats["saved_s"], 3)
+        return stats
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            now = time.time()
+            entries = [{"config": config, "query": query, **entry}
+                       for (config, query), entry in self.entries.items() if not self._expired(entry, now)]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        now = time.time()
+        for entry in entries[-self.max_entries:]:
+            key = (entry.pop("config"), entry.pop("query"))
+            if not self._expired(entry, now):
+                self.entries[key] = entry
@@ -0,0 +1,94 @@
+"""Query-only command line: answers questions from a prebuilt index without loading any ingestion code.
+
+    python src/ask.py "What was NVIDIA's total revenue in fiscal year 2024?" [--llm-mode stub]
+    python src/ask.py        # interactive; the index and models load in the background while you type
+
+Build or refresh the index with `python src/main.py` first.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROMPT = "❓ "
+
+def load(index_dir, llm_mode, model_name):
+    # everything heavy happens here, off the prompt path
+    start = time.perf_counter()
+    import main
+    from embeddings import get_model
+    from generators import get_generator
+    from index_store import load_index
+
+    vs, file_map, _ = load_index(index_dir, mmap=True, **main.search_params())
+    if vs is None:
+        return None
+    llm_mode = llm_mode or main.LLM_MODE
+    model_name = model_name or (main.LLM_MODEL if llm_mode == main.LLM_MODE else main.DEFAULT_MODELS[llm_mode])
+    get_model()
+    try:
+        get_generator(llm_mode, model_name)
+    except Exception:
+        pass  # generate() reports backend errors in the answer
+    answer_cache = main.open_answer_cache(index_dir) if main.ANSWER_CACHE else None
+    return {"main": main, "vs": vs, "file_map": file_map, "llm_mode": llm_mode, "model_name": model_name,
+            "answer_cache": answer_cache, "load_s": time.perf_counter() - start}
+
+def answer(state, query, json_out=None):
+    main = state["main"]
+    result = main.run_query(state["vs"], state["file_map"], query, llm_mode=state["llm_mode"],
+                            model_name=state["model_name"], answer_cache=state["answer_cache"])
+    if json_out is not None:
+        print(json.dumps(result), file=json_out, flush=True)
+    else:
+        main.pretty_print(result)
+        print(f"⏱️  {result.get('timings', {}).get('query_s', 0.0):.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", nargs="*", help="questions to answer; none starts an interactive prompt")
+    parser.add_argument("--index-dir", default="index")
+    parser.add_argument("--llm-mode", default=None, choices=("hf", "openai", "stub"))
+    parser.add_argument("--model-name", default=None)
+    parser.add_argument("--json", action="store_true", help="print each full result as one JSON line")
+    args = parser.parse_args()
+    json_out = None
+    if args.json:
+        # progress messages (from the background loader too) go to stderr so stdout stays parseable
+        json_out, sys.stdout = sys.stdout, sys.stderr
+
+    loader = ThreadPoolExecutor(max_workers=1)
+    pending = loader.submit(load, args.index_dir, args.llm_mode, args.model_name)
+    queries = iter(args.queries) if args.queries else None
+    if queries is None:
+        print("🏦 Financial Q&A (empty line or Ctrl-D to quit)")
+
+    state = None
+    try:
+        while True:
+            if queries is not None:
+                query = next(queries, None)
+            else:
+                try:
+                    query = input(PROMPT).strip() or None
+                except EOFError:
+                    query = None
+            if query is None:
+                break
+            if state is None:
+                state = pending.result()
+                if state is None:
+                    print(f"❌ No index in '{args.index_dir}'. Run `python src/main.py` to build it.")
+                    sys.exit(1)
+                print(f"📂 Index and models ready in {state['load_s']:.2f}s")
+            answer(state, query, json_out)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loader.shutdown(wait=False)
+        if state is not None and state["answer_cache"] is not None:
+            state["answer_cache"].save()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """Coalesces concurrent calls to fn(items) -> results into larger batches.
+
+    Callers block in submit() while a worker thread collects requests until the
+    batch holds max_batch items or max_wait seconds have passed since its first
+    request, then runs fn once and hands each caller its slice of the results.
+    """
+
+    def __init__(self, fn, max_batch=64, max_wait=0.005):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = {"batches": 0, "items": 0, "requests": 0, "largest_batch": 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        items = list(items)
+        if not items:
+            return []
+        future = Future()
+        self._queue.put((items, future))
+        return future.result()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.stats["batches"] += 1
+            self.stats["items"] += len(items)
+            self.stats["requests"] += len(batch)
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(items))
+            pos = 0
+            for request_items, future in batch:
+                future.set_result(results[pos:pos + len(request_items)])
+                pos += len(request_items)
@@ -0,0 +1,148 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+BM25_FILE = "bm25.npz"
+BM25_VOCAB_FILE = "bm25_vocab.json"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[&.][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "how",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "their", "this", "to", "was",
+    "were", "what", "which", "with"
+}
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+class BM25Index:
+    """Okapi BM25 over chunk ids with CSR postings.
+
+    Postings for term t are doc_ids[offsets[t]:offsets[t + 1]] (int32, sorted)
+    with matching term frequencies in tfs (uint16). Adds and removes are
+    buffered and merged into the arrays before the next search or save.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        self.offsets = np.zeros(1, dtype='int64')
+        self.doc_ids = np.zeros(0, dtype='int32')
+        self.tfs = np.zeros(0, dtype='uint16')
+        self.doc_len = np.zeros(0, dtype='int32')  # indexed by chunk id, 0 = not indexed
+        self._pending = []
+        self._dirty = False
+
+    def add(self, ids, texts):
+        ids = list(ids)
+        if not ids:
+            return
+        if max(ids) >= len(self.doc_len):
+            self.doc_len = np.concatenate([self.doc_len, np.zeros(max(ids) + 1 - len(self.doc_len), dtype='int32')])
+        for chunk_id, text in zip(ids, texts):
+            tokens = tokenize(text)
+            self.doc_len[chunk_id] = max(len(tokens), 1)
+            self._pending.append((chunk_id, Counter(tokens)))
+        self._dirty = True
+
+    def remove(self, ids):
+        ids = [i for i in ids if i < len(self.doc_len)]
+        self.doc_len[ids] = 0
+        self._dirty = True
+
+    def _merge(self):
+        if not self._dirty:
+            return
+        # existing postings as (term, doc, tf) triplets, minus removed docs
+        terms = np.repeat(np.arange(len(self.offsets) - 1, dtype='int64'), np.diff(self.offsets))
+        docs = self.doc_ids.astype('int64')
+        tfs = self.tfs.astype('int64')
+
+        new_terms, new_docs, new_tfs = [], [], []
+        for chunk_id, counts in self._pending:
+            for term, tf in counts.items():
+                term_id = self.vocab.setdefault(term, len(self.vocab))
+                new_terms.append(term_id)
+                new_docs.append(chunk_id)
+                new_tfs.append(min(tf, np.iinfo('uint16').max))
+        terms = np.concatenate([terms, np.array(new_terms, dtype='int64')])
+        docs = np.concatenate([docs, np.array(new_docs, dtype='int64')])
+        tfs = np.concatenate([tfs, np.array(new_tfs, dtype='int64')])
+
+        live = self.doc_len[docs] > 0
+        terms, docs, tfs = terms[live], docs[live], tfs[live]
+        order = np.lexsort((docs, terms))
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype='int64')
+        np.cumsum(np.bincount(terms, minlength=len(self.vocab)), out=self.offsets[1:])
+        self.doc_ids = docs.astype('int32')
+        self.tfs = tfs.astype('uint16')
+        self._pending = []
+        self._dirty = False
+
+    def search(self, query, k=5, allowed=None):
+        """Return [(chunk_id, bm25 score), ...] for the top-k chunks containing a query term."""
+        self._merge()
+        live = self.doc_len > 0
+        n_docs = int(live.sum())
+        if n_docs == 0:
+            return []
+        avg_len = self.doc_len[live].mean()
+
+        scores = np.zeros(len(self.doc_len), dtype='float32')
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            if start == end:
+                continue
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype('float32')
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / avg_len)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if allowed is not None:
+            scores[~np.asarray(allowed, dtype=bool)[:len(scores)]] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in candidates]
+
+    def save(self, path):
+        self._merge()
+        path = Path(path)
+        np.savez(path / BM25_FILE, offsets=self.offsets, doc_ids=self.doc_ids, tfs=self.tfs,
+                 doc_len=self.doc_len, params=np.array([self.k1, self.b]))
+        with open(path / BM25_VOCAB_FILE, "w", encoding="utf-8") as f:
+            json.dump(sorted(self.vocab, key=self.vocab.get), f)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        with np.load(path / BM25_FILE) as data:
+            index = cls(*data["params"].tolist())
+            index.offsets = data["offsets"]
+            index.doc_ids = data["doc_ids"]
+            index.tfs = data["tfs"]
+            index.doc_len = data["doc_len"]
+        with open(path / BM25_VOCAB_FILE, "r", encoding="utf-8") as f:
+            index.vocab = {term: i for i, term in enumerate(json.load(f))}
+        return index
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Merge ranked [(chunk_id, score), ...] lists by summing 1 / (k + rank)."""
+    fused = {}
+    for ranking in rankings:
+        for rank, (chunk_id, _) in enumerate(ranking, 1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
@@ -0,0 +1,262 @@
+import json
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+
+from bm25 import BM25Index
+from dedup import NearDuplicateIndex
+from facts import FactStore
+
+CHUNKS_FILE = "chunks.npz"
+VOCAB_FILE = "chunk_vocab.json"
+TEXT_BLOB_FILE = "chunk_texts.txt"
+
+# Low-cardinality metadata columns, stored as int codes into a per-column vocabulary
+COLUMNS = ("cik", "company", "year", "section", "filename")
+
+class ChunkStore:
+    """Columnar chunk metadata addressed directly by vector-store chunk id.
+
+    Each column is an int32 code array indexed by id; texts live in one UTF-8
+    blob with a byte (offset, length) table, memory-mapped from disk on load
+    so chunk texts are not held as Python strings. Removed ids are masked out
+    and their text is dropped on the next compact(). A BM25 index over the same ids is
+    kept in sync for lexical retrieval, and the filings' financial facts ride along.
+
+    Near-duplicate chunks (see dedup.py) are stored once; every further
+    occurrence is an occurrence row (canonical id, position and the same
+    metadata columns) that mask() and filing removal take into account.
+    """
+
+    def __init__(self):
+        self.vocab = {col: [] for col in COLUMNS}
+        self._lookup = {col: {} for col in COLUMNS}
+        self.codes = {col: np.zeros(0, dtype='int32') for col in COLUMNS}
+        self.position = np.zeros(0, dtype='int32')  # chunk index within its filing
+        self.valid = np.zeros(0, dtype=bool)
+        self.offsets = np.zeros(0, dtype='int64')
+        self.lengths = np.zeros(0, dtype='int32')
+        self.blob = bytearray()
+        self.dup_of = np.zeros(0, dtype='int64')
+        self.dup_position = np.zeros(0, dtype='int32')
+        self.dup_codes = {col: np.zeros(0, dtype='int32') for col in COLUMNS}
+        self.bm25 = BM25Index()
+        self.facts = FactStore()
+        self.dedup = NearDuplicateIndex()
+        self.version = None  # index_version() of the manifest this store was saved or loaded with
+
+    def __len__(self):
+        return int(self.valid.sum())
+
+    def __contains__(self, chunk_id):
+        return 0 <= chunk_id < len(self.valid) and bool(self.valid[chunk_id])
+
+    @property
+    def next_id(self):
+        return len(self.valid)
+
+    def _code(self, col, value):
+        lookup = self._lookup[col]
+        if value not in lookup:
+            lookup[value] = len(self.vocab[col])
+            self.vocab[col].append(value)
+        return lookup[value]
+
+    def _grow(self, size):
+        if size <= len(self.valid):
+            return
+        extra = size - len(self.valid)
+        for col in COLUMNS:
+            self.codes[col] = np.concatenate([self.codes[col], np.full(extra, -1, dtype='int32')])
+        self.position = np.concatenate([self.position, np.full(extra, -1, dtype='int32')])
+        self.valid = np.concatenate([self.valid, np.zeros(extra, dtype=bool)])
+        self.offsets = np.concatenate([self.offsets, np.zeros(extra, dtype='int64')])
+        self.lengths = np.concatenate([self.lengths, np.zeros(extra, dtype='int32')])
+
+    def add(self, ids, metas):
+        ids = np.array(list(ids), dtype='int64')
+        if len(ids) == 0:
+            return
+        self._grow(int(ids.max()) + 1)
+        if not isinstance(self.blob, bytearray):
+            # a mapped blob is read-only: copy it before appending
+            self.blob = bytearray(self.blob)
+        texts = []
+        for chunk_id, meta in zip(ids.tolist(), metas):
+            for col in COLUMNS:
+                self.codes[col][chunk_id] = self._code(col, meta.get(col))
+            self.position[chunk_id] = meta.get("chunk_id", -1)
+            data = meta["text"].encode("utf-8")
+            self.offsets[chunk_id] = len(self.blob)
+            self.lengths[chunk_id] = len(data)
+            self.valid[chunk_id] = True
+            self.blob += data
+            texts.append(meta["text"])
+        self.bm25.add(ids.tolist(), texts)
+
+    def add_duplicates(self, canonical_ids, metas):
+        """Record further occurrences of already stored chunks."""
+        if not len(canonical_ids):
+            return
+        self.dup_of = np.concatenate([self.dup_of, np.asarray(canonical_ids, dtype='int64')])
+        self.dup_position = np.concatenate([self.dup_position,
+                                            np.array([m.get("chunk_id", -1) for m in metas], dtype='int32')])
+        for col in COLUMNS:
+            codes = np.array([self._code(col, m.get(col)) for m in metas], dtype='int32')
+            self.dup_codes[col] = np.concatenate([self.dup_codes[col], codes])
+
+    def _keep_duplicates(self, keep):
+        self.dup_of = self.dup_of[keep]
+        self.dup_position = self.dup_position[keep]
+        self.dup_codes = {col: codes[keep] for col, codes in self.dup_codes.items()}
+
+    def remove(self, ids):
+        ids = np.array([i for i in ids if i in self], dtype='int64')
+        self.valid[ids] = False
+        self.bm25.remove(ids.tolist())
+        self.dedup.remove(ids.tolist())
+        self._keep_duplicates(~np.isin(self.dup_of, ids))
+        return len(ids)
+
+    def remove_filings(self, filenames):
+        """Drop every occurrence from the given filings; returns the ids of chunks no longer in any filing.
+
+        A stored chunk that still occurs in another filing takes over that
+        occurrence's metadata instead of being removed.
+        """
+        codes = [self._lookup["filename"][f] for f in filenames if f in self._lookup["filename"]]
+        self._keep_duplicates(~np.isin(self.dup_codes["filename"], codes))
+        stale = []
+        for chunk_id in np.flatnonzero(self.valid & np.isin(self.codes["filename"], codes)).tolist():
+            rows = np.flatnonzero(self.dup_of == chunk_id)
+            if not len(rows):
+                stale.append(chunk_id)
+                continue
+            row = rows[0]
+            for col in COLUMNS:
+                self.codes[col][chunk_id] = self.dup_codes[col][row]
+            self.position[chunk_id] = self.dup_position[row]
+            self._keep_duplicates(np.arange(len(self.dup_of)) != row)
+        self.remove(stale)
+        return stale
+
+    def ids(self):
+        return np.flatnonzero(self.valid)
+
+    def ids_for(self, col, values):
+        return np.flatnonzero(self.mask(**{col: list(values)}))
+
+    def mask(self, **filters):
+        """Boolean mask over chunk ids matching every given column filter.
+
+        Each filter is a value or a list of values, e.g. mask(company="NVIDIA", year=["2023", "2024"]).
+        """
+        mask = self.valid.copy()
+        dup_mask = np.ones(len(self.dup_of), dtype=bool)
+        for col, values in filters.items():
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            codes = [self._lookup[col][v] for v in values if v in self._lookup[col]]
+            mask &= np.isin(self.codes[col], codes)
+            dup_mask &= np.isin(self.dup_codes[col], codes)
+        # a deduplicated chunk also matches through any of its other occurrences
+        mask[self.dup_of[dup_mask]] = True
+        return mask & self.valid
+
+    def ids_by_position(self, filename):
+        """{chunk position within the filing: chunk id}, including deduplicated occurrences."""
+        code = self._lookup["filename"].get(filename)
+        ids = np.flatnonzero(self.valid & (self.codes["filename"] == code))
+        rows = np.flatnonzero(self.dup_codes["filename"] == code)
+        return {**dict(zip(self.dup_position[rows].tolist(), self.dup_of[rows].tolist())),
+                **dict(zip(self.position[ids].tolist(), ids.tolist()))}
+
+    def occurrences(self, chunk_id):
+        """[(company, year), ...] of every filing the chunk occurs in, its own first."""
+        rows = np.flatnonzero(self.dup_of == chunk_id)
+        found = [(self.value("company", chunk_id), self.value("year", chunk_id))]
+        for row in rows.tolist():
+            found.append((self.vocab["company"][self.dup_codes["company"][row]],
+                          self.vocab["year"][self.dup_codes["year"][row]]))
+        return list(dict.fromkeys(found))
+
+    def value(self, col, chunk_id):
+        return self.vocab[col][self.codes[col][chunk_id]]
+
+    def text(self, chunk_id):
+        start = int(self.offsets[chunk_id])
+        return self.blob[start:start + int(self.lengths[chunk_id])].decode("utf-8")
+
+    def get(self, chunk_id):
+        meta = {col: self.value(col, chunk_id) for col in COLUMNS}
+        meta["chunk_id"] = int(self.position[chunk_id])
+        meta["id"] = int(chunk_id)
+        meta["text"] = self.text(chunk_id)
+        return meta
+
+    def compact(self):
+        """Rewrite the text blob so it only holds texts of live chunks."""
+        blob = bytearray()
+        for chunk_id in self.ids().tolist():
+            start = int(self.offsets[chunk_id])
+            self.offsets[chunk_id] = len(blob)
+            blob += self.blob[start:start + int(self.lengths[chunk_id])]
+        self.offsets[~self.valid] = 0
+        self.lengths[~self.valid] = 0
+        self.blob = blob
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.compact()
+        # every file is written aside and swapped in: another process may be reading the old index,
+        # and the old blob may still be mapped
+        tmp_path = path / (CHUNKS_FILE + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, position=self.position, valid=self.valid,
+                     offsets=self.offsets, lengths=self.lengths,
+                     dup_of=self.dup_of, dup_position=self.dup_position,
+                     **{f"code_{col}": self.codes[col] for col in COLUMNS},
+                     **{f"dup_code_{col}": self.dup_codes[col] for col in COLUMNS})
+        os.replace(tmp_path, path / CHUNKS_FILE)
+        tmp_path = path / (VOCAB_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f)
+        os.replace(tmp_path, path / VOCAB_FILE)
+        tmp_path = path / (TEXT_BLOB_FILE + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self.blob)
+        os.replace(tmp_path, path / TEXT_BLOB_FILE)
+        self.bm25.save(path)
+        self.facts.save(path)
+        self.dedup.save(path)
+
+    @classmethod
+    def load(cls, path, mmap_texts=True):
+        path = Path(path)
+        store = cls()
+        with np.load(path / CHUNKS_FILE) as data:
+            store.position = data["position"]
+            store.valid = data["valid"]
+            store.offsets = data["offsets"]
+            store.lengths = data["lengths"]
+            store.codes = {col: data[f"code_{col}"] for col in COLUMNS}
+            store.dup_of = data["dup_of"]
+            store.dup_position = data["dup_position"]
+            store.dup_codes = {col: data[f"dup_code_{col}"] for col in COLUMNS}
+        with open(path / VOCAB_FILE, "r", encoding="utf-8") as f:
+            store.vocab = json.load(f)
+        store._lookup = {col: {v: i for i, v in enumerate(vals)} for col, vals in store.vocab.items()}
+        with open(path / TEXT_BLOB_FILE, "rb") as f:
+            if mmap_texts and os.fstat(f.fileno()).st_size:
+                store.blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                store.blob = bytearray(f.read())
+        store.bm25 = BM25Index.load(path)
+        store.facts = FactStore.load(path)
+        store.dedup = NearDuplicateIndex.load(path)
+        return store
@@ -0,0 +1,132 @@
+import numpy as np
+
+from dedup import shingle_hashes
+import tracing
+
+CHARS_PER_TOKEN = 4  # estimate when the target model's tokenizer is not available
+
+_counters = {}
+
+class TokenCounter:
+    """Counts prompt tokens with the target model's tokenizer.
+
+    hf models use their own tokenizer, openai models tiktoken (if installed);
+    anything else falls back to a CHARS_PER_TOKEN estimate. max_tokens is the
+    model's input limit, or None when it has none worth enforcing.
+    """
+
+    def __init__(self, llm_mode, model_name):
+        self.name = "estimate"
+        self.max_tokens = None
+        self._encode = None
+        if llm_mode == "hf":
+            try:
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(model_name)
+                self._encode = lambda text: tokenizer(text, add_special_tokens=False)["input_ids"]
+                self.name = model_name
+                limit = getattr(tokenizer, "model_max_length", None)
+                self.max_tokens = limit if isinstance(limit, int) and limit < 1_000_000 else None
+            except Exception as e:
+                print(f"⚠️  No tokenizer for '{model_name}' ({e}), estimating tokens")
+        elif llm_mode == "openai":
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model_name)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("cl100k_base")
+                self._encode = encoding.encode
+                self.name = encoding.name
+            except ImportError:
+                pass
+
+    def count(self, text):
+        if self._encode is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(self._encode(text))
+
+def get_token_counter(llm_mode, model_name):
+    key = (llm_mode, model_name)
+    if key not in _counters:
+        _counters[key] = TokenCounter(llm_mode, model_name)
+    return _counters[key]
+
+def _similarity(a, b):
+    if len(a) == 0 or len(b) == 0:
+        return 0.0
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / (len(a) + len(b) - shared)
+
+def pack_context(retrieved, counter, budget, mmr_lambda=0.7, dup_threshold=0.8):
+    """Choose the chunks that go into the prompt.
+
+    retrieved holds the ranked texts of each sub-query. Identical texts are
+    merged and texts whose shingle overlap with an already chosen one reaches
+    dup_threshold are dropped. First the best fitting chunk of every
+    sub-query is taken, so each sub-query is covered; the rest of the budget
+    goes by maximal marginal relevance: mmr_lambda * relevance (1 for a
+    sub-query's top hit, falling with rank) minus (1 - mmr_lambda) * highest
+    shingle similarity to the chunks already chosen. Chunks that no longer
+    fit the budget (in tokens) are skipped. Returns (texts in sub-query and
+    rank order, stats).
+    """
+    candidates = {}  # text -> [relevance, first (sub-query, rank)]
+    for sq, texts in enumerate(retrieved):
+        for rank, text in enumerate(texts):
+            relevance = 1.0 - rank / len(texts)
+            if text not in candidates:
+                candidates[text] = [relevance, (sq, rank)]
+            else:
+                candidates[text][0] = max(candidates[text][0], relevance)
+    texts = list(candidates)
+    relevance = np.array([candidates[t][0] for t in texts])
+    tokens = [counter.count(t) for t in texts]
+    shingles = [shingle_hashes(t) for t in texts]
+    index = {t: i for i, t in enumerate(texts)}
+    n_retrieved = sum(len(sq_texts) for sq_texts in retrieved)
+
+    chosen = []
+    redundancy = np.zeros(len(texts))  # highest similarity to a chosen chunk
+    open_ = np.ones(len(texts), dtype=bool)
+    used = 0
+
+    def choose(i):
+        nonlocal used
+        chosen.append(i)
+        used += tokens[i]
+        open_[i] = False
+        for j in np.flatnonzero(open_):
+            redundancy[j] = max(redundancy[j], _similarity(shingles[i], shingles[j]))
+        open_[redundancy >= dup_threshold] = False
+
+    for sq_texts in retrieved:
+        # coverage: this sub-query's best remaining chunk that fits, unless one is already in
+        rows = [index[t] for t in sq_texts]
+        if any(i in chosen for i in rows):
+            continue
+        for i in rows:
+            if open_[i] and used + tokens[i] <= budget:
+                choose(i)
+                break
+
+    while True:
+        fits = open_ & (np.array(tokens) <= budget - used)
+        if not fits.any():
+            break
+        scores = np.where(fits, mmr_lambda * relevance - (1 - mmr_lambda) * redundancy, -np.inf)
+        choose(int(np.argmax(scores)))
+
+    chosen.sort(key=lambda i: candidates[texts[i]][1])
+    covered = sum(any(index[t] in chosen for t in sq_texts) for sq_texts in retrieved if sq_texts)
+    stats = {
+        "retrieved": n_retrieved,
+        "unique": len(texts),
+        "chunks": len(chosen),
+        "tokens": used,
+        "retrieved_tokens": sum(tokens),
+        "budget": budget,
+        "sub_queries_covered": covered,
+    }
+    tracing.count("context_tokens", used)
+    return [texts[i] for i in chosen], stats
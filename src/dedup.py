@@ -0,0 +1,130 @@
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+DEDUP_FILE = "dedup.npz"
+
+SHINGLE_WORDS = 3
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates, then the threshold decides
+
+_TOKEN = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d[\d,.]*")
+_rng = np.random.default_rng(20240101)
+# multiply-add-shift hash family over 32-bit shingle hashes
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_ROWS = NUM_PERM // BANDS
+
+def shingle_hashes(text):
+    """32-bit hashes of the distinct SHINGLE_WORDS-word shingles of a text (lower-cased word tokens)."""
+    tokens = np.array([zlib.crc32(t.encode("utf-8")) for t in _TOKEN.findall(text.lower())], dtype=np.uint64)
+    n = len(tokens) - SHINGLE_WORDS + 1
+    if n < 1:
+        return np.unique(tokens)
+    shingles = tokens[:n].copy()
+    for j in range(1, SHINGLE_WORDS):
+        shingles = shingles * np.uint64(1_000_003) + tokens[j:n + j]  # wraps mod 2**64
+    return np.unique((shingles ^ (shingles >> np.uint64(32))) & np.uint64(0xFFFFFFFF))
+
+def minhash(text):
+    shingles = shingle_hashes(text)
+    if len(shingles) == 0:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    hashed = (shingles[:, None] * _A[None, :] + _B[None, :]) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32)
+
+def number_key(text):
+    """Fingerprint of the figures in a text; chunks that quote different numbers are never merged."""
+    return zlib.crc32(" ".join(_NUMBER.findall(text)).encode("utf-8"))
+
+class NearDuplicateIndex:
+    """MinHash signatures of stored chunks with banded LSH lookup.
+
+    A chunk duplicates a stored one when they share an LSH band, their
+    signatures agree on at least `threshold` of the positions (an estimate of
+    shingle Jaccard similarity) and they quote exactly the same numbers.
+    """
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.ids = np.zeros(0, dtype='int64')
+        self.signatures = np.zeros((0, NUM_PERM), dtype=np.uint32)
+        self.numbers = np.zeros(0, dtype=np.uint32)
+        self._buckets = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _index_rows(self, rows):
+        for row in rows:
+            sig = self.signatures[row]
+            for band, bucket in enumerate(self._buckets):
+                bucket.setdefault(sig[band * _ROWS:(band + 1) * _ROWS].tobytes(), []).append(row)
+
+    def _rebuild(self):
+        self._buckets = [{} for _ in range(BANDS)]
+        self._index_rows(range(len(self.ids)))
+
+    def find(self, signature, number):
+        """Chunk id of a stored near-duplicate, or None."""
+        seen = set()
+        for band, bucket in enumerate(self._buckets):
+            for row in bucket.get(signature[band * _ROWS:(band + 1) * _ROWS].tobytes(), ()):
+                if row in seen:
+                    continue
+                seen.add(row)
+                if (self.numbers[row] == number
+                        and np.mean(self.signatures[row] == signature) >= self.threshold):
+                    return int(self.ids[row])
+        return None
+
+    def add(self, chunk_ids, signatures, numbers):
+        start = len(self.ids)
+        self.ids = np.concatenate([self.ids, np.asarray(chunk_ids, dtype='int64')])
+        self.signatures = np.vstack([self.signatures, np.asarray(signatures, dtype=np.uint32).reshape(-1, NUM_PERM)])
+        self.numbers = np.concatenate([self.numbers, np.asarray(numbers, dtype=np.uint32)])
+        self._index_rows(range(start, len(self.ids)))
+
+    def remove(self, chunk_ids):
+        keep = ~np.isin(self.ids, np.asarray(list(chunk_ids), dtype='int64'))
+        if keep.all():
+            return
+        self.ids, self.signatures, self.numbers = self.ids[keep], self.signatures[keep], self.numbers[keep]
+        self._rebuild()
+
+    def split(self, texts, first_id):
+        """Match a batch against the index and against itself.
+
+        Returns (keep, canonical): keep lists the batch positions of new chunks,
+        which are indexed under ids first_id, first_id + 1, ... in that order;
+        canonical[i] is the chunk id batch position i duplicates, or -1.
+        """
+        keep, canonical = [], []
+        for i, text in enumerate(texts):
+            signature, number = minhash(text), number_key(text)
+            match = self.find(signature, number)
+            if match is None:
+                self.add([first_id + len(keep)], [signature], [number])
+                keep.append(i)
+                canonical.append(-1)
+            else:
+                canonical.append(match)
+        return keep, canonical
+
+    def save(self, path):
+        np.savez(Path(path) / DEDUP_FILE, ids=self.ids, signatures=self.signatures, numbers=self.numbers,
+                 threshold=self.threshold)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path) / DEDUP_FILE
+        if not path.exists():
+            return cls()
+        with np.load(path) as data:
+            index = cls(float(data["threshold"]))
+            index.ids, index.signatures, index.numbers = data["ids"], data["signatures"], data["numbers"]
+        index._rebuild()
+        return index
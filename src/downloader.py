@@ -1,8 +1,17 @@
-import requests
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import re
+from urllib.parse import urljoin
+
+import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 COMPANIES = {
     "GOOGL": "1652044",
@@ -12,89 +21,323 @@ COMPANIES = {
 
 YEARS = ["2022", "2023", "2024"]
 
-def download_10k_filing(cik, ticker, year, data_dir="data"):
-    Path(data_dir).mkdir(exist_ok=True)
-    
-    filename = f"{ticker}_{year}.html"
-    filepath = Path(data_dir) / filename
-    if filepath.exists():
-        print(f"📁 {filename} already exists, skipping...")
+SEC_BASE_URL = "https://www.sec.gov"
+SEC_DATA_URL = "https://data.sec.gov"
+COMPANY_TICKERS_PATH = "/files/company_tickers.json"
+# ticker -> company name for filings whose ticker ingest does not know
+COMPANY_NAMES_FILE = "companies.json"
+SOURCES = ("scrape", "submissions", "full-index")
+# SEC fair-access policy allows at most 10 requests/second per client
+SEC_MAX_RPS = 8
+DOWNLOAD_WORKERS = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHE_DIR_NAME = ".http_cache"
+
+HEADERS = {
+    'User-Agent': 'Financial-QA-System research-tool (contact@example.com)',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate'
+}
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # reserve a token; a negative balance is the queue of callers ahead of us
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+def write_atomic(path, data):
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".part")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class Fetcher:
+    """HTTP client shared by all download workers.
+
+    One pooled requests.Session, a global TokenBucket for the SEC rate cap,
+    exponential backoff with jitter on 429/5xx (honouring Retry-After), and
+    conditional requests from ETag/Last-Modified validators kept in cache_dir.
+    """
+
+    def __init__(self, base_url=SEC_BASE_URL, rate=SEC_MAX_RPS, workers=DOWNLOAD_WORKERS,
+                 cache_dir=None, max_retries=5, backoff=0.5, timeout=60, data_url=None):
+        self.base_url = base_url
+        # submissions JSON lives on data.sec.gov; a stand-in server serves both
+        self.data_url = data_url or (SEC_DATA_URL if base_url == SEC_BASE_URL else base_url)
+        self.limiter = TokenBucket(rate)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.stats = {"requests": 0, "retries": 0, "not_modified": 0, "bytes": 0}
+        self.lock = threading.Lock()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.validators = {}
+        if self.cache_dir and (self.cache_dir / "validators.json").exists():
+            with open(self.cache_dir / "validators.json", "r", encoding="utf-8") as f:
+                self.validators = json.load(f)
+
+    def url(self, path):
+        return urljoin(self.base_url, path)
+
+    def data(self, path):
+        return urljoin(self.data_url, path)
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def get(self, url, headers=None):
+        """GET with rate limiting and retries; returns the final response (which may still be an error)."""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            self._count("requests")
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    time.sleep(int(retry_after))
+                    self._count("retries")
+                    continue
+            self._count("retries")
+            time.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+    def has_validators(self, url):
+        with self.lock:
+            return url in self.validators
+
+    def _conditional_headers(self, url):
+        with self.lock:
+            cached = self.validators.get(url, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def _remember(self, url, response):
+        if not self.cache_dir:
+            return
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self.lock:
+            self.validators[url] = {"etag": etag, "last_modified": last_modified}
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            write_atomic(self.cache_dir / "validators.json", json.dumps(self.validators, indent=1).encode("utf-8"))
+
+    def fetch_to_file(self, url, path, as_text=False):
+        """Download url to path atomically; returns False if the server says the existing file is current.
+
+        as_text re-encodes the decoded response body as UTF-8 (used for filing documents).
+        """
+        path = Path(path)
+        headers = self._conditional_headers(url) if path.exists() else {}
+        response = self.get(url, headers=headers)
+        if response.status_code == 304:
+            self._count("not_modified")
+            return False
+        response.raise_for_status()
+        data = response.text.encode("utf-8") if as_text else response.content
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, data)
+        self._count("bytes", len(data))
+        self._remember(url, response)
         return True
-    
-    search_url = f"https://www.sec.gov/cgi-bin/browse-edgar?CIK={cik}&type=10-K&dateb={year}1231&count=10"
-    
-    headers = {
-        'User-Agent': 'Financial-QA-System research-tool (contact@example.com)',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Encoding': 'gzip, deflate'
-    }
-    
+
+    def fetch_page(self, url):
+        """Page content (bytes), revalidated against a local copy when cache_dir is set."""
+        if not self.cache_dir:
+            response = self.get(url)
+            response.raise_for_status()
+            self._count("bytes", len(response.content))
+            return response.content
+        path = self.cache_dir / (hashlib.sha1(url.encode("utf-8")).hexdigest() + ".page")
+        self.fetch_to_file(url, path)
+        return path.read_bytes()
+
+    def fetch_json(self, url):
+        return json.loads(self.fetch_page(url))
+
+def parse_years(spec):
+    """'2019-2024' or '2022,2023' -> ['2019', ..., '2024']"""
+    years = []
+    for part in spec.split(","):
+        start, _, end = part.strip().partition("-")
+        years.extend(str(y) for y in range(int(start), int(end or start) + 1))
+    return years
+
+def resolve_ciks(fetcher, tickers):
+    """{ticker: (cik, company title or None)} from COMPANIES, then EDGAR's company_tickers.json."""
+    tickers = [t.upper() for t in tickers]
+    resolved = {t: (COMPANIES[t], None) for t in tickers if t in COMPANIES}
+    if len(resolved) < len(tickers):
+        rows = fetcher.fetch_json(fetcher.url(COMPANY_TICKERS_PATH)).values()
+        by_ticker = {row["ticker"].upper(): (str(row["cik_str"]), row["title"]) for row in rows}
+        for t in tickers:
+            if t not in resolved and t in by_ticker:
+                resolved[t] = by_ticker[t]
+    return resolved
+
+def parse_master_index(text, ciks, form="10-K"):
+    """Rows of an EDGAR master.idx (CIK|Company Name|Form Type|Date Filed|Filename) for the given CIKs and form."""
+    filings = []
+    lines = iter(text.splitlines())
+    for line in lines:
+        if line.startswith("-----"):
+            break
+    for line in lines:
+        parts = line.split("|")
+        if len(parts) == 5 and parts[2] == form and parts[0] in ciks:
+            filings.append({"cik": parts[0], "company": parts[1], "date_filed": parts[3], "path": parts[4]})
+    return filings
+
+def _fetch_optional(fetcher, url):
+    try:
+        return fetcher.fetch_page(url)
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None  # quarter not published yet
+        raise
+
+def locate_from_full_index(fetcher, pool, ciks, years, form="10-K"):
+    """{(cik, year): filing index page URL} from the quarterly master.idx files, 4 requests per year."""
+    urls = [fetcher.url(f"/Archives/edgar/full-index/{year}/QTR{q}/master.idx") for year in years for q in range(1, 5)]
+    latest = {}
+    for page in pool.map(lambda url: _fetch_optional(fetcher, url), urls):
+        if page is None:
+            continue
+        for row in parse_master_index(page.decode("utf-8", errors="replace"), ciks, form):
+            key = (row["cik"], row["date_filed"][:4])
+            if key[1] in years and (key not in latest or row["date_filed"] > latest[key]["date_filed"]):
+                latest[key] = row
+
+    located = {}
+    for (cik, year), row in latest.items():
+        accession = Path(row["path"]).stem
+        located[(cik, year)] = fetcher.url(
+            f"/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}/{accession}-index.htm")
+    return located
+
+def locate_from_submissions(fetcher, pool, ciks, years, form="10-K"):
+    """{(cik, year): primary document URL} from each company's submissions JSON, 1 request per company."""
+    def company_filings(cik):
+        data = fetcher.fetch_json(fetcher.data(f"/submissions/CIK{int(cik):010d}.json"))
+        tables = [data["filings"]["recent"]]
+        # older filings are paged out into extra files covering [filingFrom, filingTo]
+        for extra in data["filings"].get("files", []):
+            if extra["filingTo"][:4] >= min(years) and extra["filingFrom"][:4] <= max(years):
+                tables.append(fetcher.fetch_json(fetcher.data(f"/submissions/{extra['name']}")))
+
+        found = {}
+        for table in tables:
+            for form_type, date, accession, document in zip(table["form"], table["filingDate"],
+                                                           table["accessionNumber"], table["primaryDocument"]):
+                year = date[:4]
+                if form_type == form and year in years and (year not in found or date > found[year][0]):
+                    url = fetcher.url(f"/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}/{document}")
+                    found[year] = (date, url)
+        return {(cik, year): url for year, (_, url) in found.items()}
+
+    located = {}
+    for found in pool.map(company_filings, ciks):
+        located.update(found)
+    return located
+
+def find_filing_index(fetcher, cik, year):
+    search_url = fetcher.url(f"/cgi-bin/browse-edgar?action=getcompany&CIK={cik}&type=10-K&dateb={year}1231&count=10")
+    soup = BeautifulSoup(fetcher.fetch_page(search_url), 'html.parser')
+    for row in soup.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) >= 4 and cells[0].get_text(strip=True) == '10-K':
+            for link in cells[1].find_all('a', href=True):
+                if 'Documents' in link.get_text():
+                    return fetcher.url(link['href'])
+    return None
+
+def find_primary_document(fetcher, index_url):
+    doc_soup = BeautifulSoup(fetcher.fetch_page(index_url), 'html.parser')
+    for row in doc_soup.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) >= 4:
+            doc_name = cells[2].get_text(strip=True)
+            if doc_name.endswith('.htm') and cells[3].get_text(strip=True) == '10-K':
+                link_elem = cells[2].find('a', href=True)
+                if link_elem:
+                    return fetcher.url(link_elem['href'])
+
+    for link in doc_soup.find_all('a', href=True):
+        href = link['href']
+        if href.endswith('.htm') and not href.endswith('_ex.htm'):
+            return fetcher.url(href)
+    return None
+
+def save_document(fetcher, doc_link, filepath):
+    if filepath.exists() and not fetcher.has_validators(doc_link):
+        # downloaded before validators were recorded; nothing to revalidate against
+        print(f"📁 {filepath.name} already exists, skipping...")
+        return True
+
+    if fetcher.fetch_to_file(doc_link, filepath, as_text=True):
+        print(f"✅ Downloaded {filepath.name} ({filepath.stat().st_size:,} bytes)")
+    else:
+        print(f"📁 {filepath.name} is up to date")
+    return True
+
+def download_document(fetcher, ticker, year, url, data_dir="data", is_index_page=False):
+    """Download one located filing; url is the primary document or, with is_index_page, its filing index."""
+    try:
+        doc_link = find_primary_document(fetcher, url) if is_index_page else url
+        if not doc_link:
+            print(f"❌ No HTML document found for {ticker} {year}")
+            return False
+        return save_document(fetcher, doc_link, Path(data_dir) / f"{ticker}_{year}.html")
+    except requests.exceptions.RequestException as e:
+        print(f"🌐 Network error downloading {ticker} {year}: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ Error downloading {ticker} {year}: {e}")
+        return False
+
+def download_10k_filing(cik, ticker, year, data_dir="data", fetcher=None):
+    Path(data_dir).mkdir(exist_ok=True)
+    fetcher = fetcher or Fetcher(cache_dir=Path(data_dir) / CACHE_DIR_NAME)
+
     try:
         print(f"🔍 Searching for {ticker} 10-K filing for {year}...")
-        response = requests.get(search_url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        filing_link = None
-        for row in soup.find_all('tr'):
-            cells = row.find_all('td')
-            if len(cells) >= 4:
-                doc_type = cells[0].get_text(strip=True)
-                if doc_type == '10-K':
-                    for link in cells[1].find_all('a', href=True):
-                        if 'Documents' in link.get_text():
-                            filing_link = 'https://www.sec.gov' + link['href']
-                            break
-                    if filing_link:
-                        break
-        
+        filing_link = find_filing_index(fetcher, cik, year)
         if not filing_link:
             print(f"❌ No 10-K filing found for {ticker} in {year}")
             return False
-        
-        time.sleep(1.5)
-        print(f"📄 Accessing filing documents...")
-        doc_response = requests.get(filing_link, headers=headers, timeout=30)
-        doc_response.raise_for_status()
-        
-        doc_soup = BeautifulSoup(doc_response.content, 'html.parser')
-        
-        doc_link = None
-        for row in doc_soup.find_all('tr'):
-            cells = row.find_all('td')
-            if len(cells) >= 3:
-                doc_name = cells[2].get_text(strip=True)
-                if doc_name.endswith('.htm') and cells[3].get_text(strip=True) == '10-K':
-                    link_elem = cells[2].find('a', href=True)
-                    if link_elem:
-                        doc_link = 'https://www.sec.gov' + link_elem['href']
-                        break
-        
-        if not doc_link:
-            for link in doc_soup.find_all('a', href=True):
-                href = link['href']
-                if href.endswith('.htm') and not href.endswith('_ex.htm'):
-                    doc_link = 'https://www.sec.gov' + href
-                    break
-        
-        if not doc_link:
-            print(f"❌ No HTML document found for {ticker} {year}")
-            return False
-        
-        # Download the actual 10-K HTML file
-        time.sleep(1.5)
-        print(f"⬇️  Downloading 10-K document...")
-        filing_response = requests.get(doc_link, headers=headers, timeout=60)
-        filing_response.raise_for_status()
-        
-        # Save the file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(filing_response.text)
-        
-        print(f"✅ Downloaded {filename} ({len(filing_response.text):,} characters)")
-        return True
-        
+        return download_document(fetcher, ticker, year, filing_link, data_dir, is_index_page=True)
+
     except requests.exceptions.Timeout:
         print(f"⏰ Timeout downloading {ticker} {year}")
         return False
@@ -105,29 +348,17 @@ def download_10k_filing(cik, ticker, year, data_dir="data"):
         print(f"❌ Error downloading {ticker} {year}: {e}")
         return False
 
-def download_all_filings(data_dir="data"):
-    """Download all required 10-K filings for the assignment"""
-    print("🏦 Financial Q&A System: SEC 10-K Filing Downloader")
-    print("📋 Companies: Google (GOOGL), Microsoft (MSFT), NVIDIA (NVDA)")
-    print("📅 Years: 2022, 2023, 2024")
-    print("=" * 60)
-    
-    success_count = 0
-    total_count = len(COMPANIES) * len(YEARS)
-    
-    for ticker, cik in COMPANIES.items():
-        company_name = {"GOOGL": "Google", "MSFT": "Microsoft", "NVDA": "NVIDIA"}[ticker]
-        print(f"\n🏢 Processing {company_name} ({ticker}) - CIK: {cik}")
-        
-        for year in YEARS:
-            if download_10k_filing(cik, ticker, year, data_dir):
-                success_count += 1
-            time.sleep(2)  # Be respectful to SEC servers
-    
-    print(f"\n" + "=" * 60)
-    print(f"📊 Download Summary:")
+def print_summary(labels, results, total_count, fetcher, elapsed):
+    success_count = sum(results)
+    print("\n" + "=" * 60)
+    print("📊 Download Summary:")
     print(f"✅ Successfully downloaded: {success_count}/{total_count} filings")
-    
+    print(f"⏱️  {elapsed:.1f}s, {fetcher.stats['requests']} requests "
+          f"({fetcher.stats['retries']} retries, {fetcher.stats['not_modified']} not modified)")
+    for label, ok in zip(labels, results):
+        if not ok:
+            print(f"   ❌ {label}")
+
     if success_count == total_count:
         print("🎉 All filings downloaded successfully!")
         print("▶️  You can now run: python src/main.py")
@@ -136,12 +367,103 @@ def download_all_filings(data_dir="data"):
         print("▶️  You can still run: python src/main.py")
     else:
         print("❌ No filings were downloaded. Please check your internet connection and try again.")
-    
-    return success_count > 0
+
+def print_header(companies, years, workers, rate):
+    print("🏦 Financial Q&A System: SEC 10-K Filing Downloader")
+    print(f"📋 Companies: {', '.join(companies) if len(companies) <= 10 else f'{len(companies)} tickers'}")
+    print(f"📅 Years: {', '.join(years)}")
+    print(f"⚙️  {workers} workers, {rate} requests/s")
+    print("=" * 60)
+
+def download_all_filings(data_dir="data", companies=None, years=None, workers=DOWNLOAD_WORKERS,
+                         rate=SEC_MAX_RPS, base_url=SEC_BASE_URL):
+    """Download 10-K filings for every (ticker, year) over a shared, rate-limited fetch pool"""
+    companies = COMPANIES if companies is None else companies
+    years = YEARS if years is None else years
+    print_header(companies, years, workers, rate)
+
+    Path(data_dir).mkdir(exist_ok=True)
+    fetcher = Fetcher(base_url, rate, workers, cache_dir=Path(data_dir) / CACHE_DIR_NAME)
+    jobs = [(cik, ticker, year) for ticker, cik in companies.items() for year in years]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda job: download_10k_filing(*job, data_dir, fetcher), jobs))
+    elapsed = time.perf_counter() - start
+
+    print_summary([f"{ticker} {year}" for _, ticker, year in jobs], results, len(jobs), fetcher, elapsed)
+    return sum(results) > 0
+
+def save_company_names(data_dir, names):
+    path = Path(data_dir) / COMPANY_NAMES_FILE
+    existing = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    existing.update({ticker: name for ticker, name in names.items() if name})
+    write_atomic(path, json.dumps(existing, indent=1, sort_keys=True).encode("utf-8"))
+
+def download_filings(tickers, years, data_dir="data", source="submissions", form="10-K",
+                     workers=DOWNLOAD_WORKERS, rate=SEC_MAX_RPS, base_url=SEC_BASE_URL, data_url=None):
+    """Download filings for any tickers/years, located from EDGAR bulk indexes instead of page scrapes.
+
+    source="submissions" reads one submissions JSON per company; "full-index"
+    reads the four quarterly master.idx files per year plus each filing's index
+    page. Either way the downloads run on the shared, rate-limited fetch pool.
+    """
+    print_header(tickers, years, workers, rate)
+    Path(data_dir).mkdir(exist_ok=True)
+    fetcher = Fetcher(base_url, rate, workers, cache_dir=Path(data_dir) / CACHE_DIR_NAME, data_url=data_url)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        companies = resolve_ciks(fetcher, tickers)
+        for ticker in tickers:
+            if ticker.upper() not in companies:
+                print(f"❓ Unknown ticker {ticker}")
+        cik_to_ticker = {cik: ticker for ticker, (cik, _) in companies.items()}
+
+        print(f"🗂️  Locating {form} filings from {source}...")
+        locate = locate_from_full_index if source == "full-index" else locate_from_submissions
+        located = locate(fetcher, pool, list(cik_to_ticker), years, form)
+        jobs = sorted((cik_to_ticker[cik], year, url) for (cik, year), url in located.items())
+        print(f"📍 Found {len(jobs)}/{len(companies) * len(years)} filings "
+              f"with {fetcher.stats['requests']} index requests")
+
+        results = list(pool.map(
+            lambda job: download_document(fetcher, *job, data_dir, is_index_page=source == "full-index"), jobs))
+    elapsed = time.perf_counter() - start
+
+    save_company_names(data_dir, {ticker: title for ticker, (_, title) in companies.items()})
+    print_summary([f"{ticker} {year}" for ticker, year, _ in jobs], results, len(jobs), fetcher, elapsed)
+    return sum(results) > 0
 
 if __name__ == "__main__":
-    success = download_all_filings()
+    parser = argparse.ArgumentParser(description="Download 10-K filings from SEC EDGAR")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--tickers", nargs="+", default=None, help="default: " + " ".join(COMPANIES))
+    parser.add_argument("--years", default=None, help="e.g. 2019-2024 or 2022,2023 (default: %s)" % ",".join(YEARS))
+    parser.add_argument("--source", choices=SOURCES, default="scrape",
+                        help="scrape browse-edgar pages per filing, or read the submissions JSON / full-index files")
+    parser.add_argument("--form", default="10-K")
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS)
+    parser.add_argument("--rate", type=float, default=SEC_MAX_RPS, help="max requests per second")
+    parser.add_argument("--base-url", default=SEC_BASE_URL, help="EDGAR host (e.g. a local fixture server)")
+    parser.add_argument("--data-url", default=None, help="host of the submissions JSON (default: data.sec.gov)")
+    args = parser.parse_args()
+    years = parse_years(args.years) if args.years else YEARS
+
+    if args.source == "scrape":
+        companies = None
+        if args.tickers:
+            resolver = Fetcher(args.base_url, args.rate, cache_dir=Path(args.data_dir) / CACHE_DIR_NAME)
+            companies = {ticker: cik for ticker, (cik, _) in resolve_ciks(resolver, args.tickers).items()}
+        success = download_all_filings(args.data_dir, companies, years, workers=args.workers,
+                                       rate=args.rate, base_url=args.base_url)
+    else:
+        success = download_filings(args.tickers or list(COMPANIES), years, args.data_dir, args.source, args.form,
+                                   args.workers, args.rate, args.base_url, args.data_url)
     if success:
-        print(f"\n🚀 Ready to run the Financial Q&A System!")
+        print("\n🚀 Ready to run the Financial Q&A System!")
     else:
-        print(f"\n🔧 Please fix download issues and try again.")
+        print("\n🔧 Please fix download issues and try again.")
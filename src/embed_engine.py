@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from embeddings import embed_texts, get_model
+import tracing
+
+def _available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def _set_threads(threads):
+    os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+def _init_worker(cores, threads):
+    # runs once per worker process: pin it, size its thread pool, load the model
+    mine = cores.get()
+    if mine and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, mine)
+    if threads:
+        _set_threads(threads)
+    get_model()
+
+def _encode_traced(texts, batch_size, trace):
+    # runs in a worker process: hand the spans and counters back to the parent
+    tracing.enable(trace)
+    embeddings = np.asarray(embed_texts(texts, batch_size), dtype='float32')
+    return embeddings, tracing.drain()
+
+class EmbeddingEngine:
+    """Bulk chunk encoder for ingestion.
+
+    Texts are sorted by length and cut into batches of batch_size, so each
+    batch pads to similar lengths. With workers > 0 the batches are encoded by
+    a pool of spawned processes, each holding its own model, limited to
+    `threads` intra-op threads (default: cores / workers) and, with pin_cores,
+    bound to its own slice of the CPUs. embed() yields (positions, embeddings)
+    per batch as soon as it is done, so callers can add vectors to the index
+    while later batches are still encoding; at most 2 batches per worker are
+    in flight. The pool is started on first use and kept until close().
+    """
+
+    def __init__(self, workers=0, batch_size=64, threads=0, pin_cores=True):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.threads = threads
+        self.pin_cores = pin_cores
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self):
+        cores = _available_cores()
+        threads = self.threads or max(1, len(cores) // self.workers)
+        # spawn keeps workers clear of the torch/faiss threads already running in the parent
+        ctx = multiprocessing.get_context("spawn")
+        slices = ctx.Queue()
+        for i in range(self.workers):
+            part = cores[i * len(cores) // self.workers:(i + 1) * len(cores) // self.workers]
+            slices.put(part if self.pin_cores else None)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                         initializer=_init_worker, initargs=(slices, threads))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def batches(self, texts):
+        """Position arrays of length-sorted batches, longest first."""
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def embed(self, texts):
+        batches = self.batches(texts)
+        if self.workers <= 0:
+            if self.threads:
+                _set_threads(self.threads)
+            for rows in batches:
+                yield rows, np.asarray(embed_texts([texts[i] for i in rows], self.batch_size), dtype='float32')
+            return
+
+        if self._pool is None:
+            self._start()
+        pending = {}
+        todo = iter(batches)
+        while True:
+            while len(pending) < 2 * self.workers:
+                rows = next(todo, None)
+                if rows is None:
+                    break
+                future = self._pool.submit(_encode_traced, [texts[i] for i in rows], self.batch_size,
+                                           tracing.enabled())
+                pending[future] = rows
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                embeddings, (events, counter_values) = future.result()
+                tracing.merge(events, counter_values)
+                yield pending.pop(future), embeddings
@@ -1,13 +1,98 @@
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from batching import MicroBatcher
+import tracing
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+QUERY_CACHE_SIZE = 4096
 
 _model = None
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+_query_batcher = None
+query_cache_stats = {"hits": 0, "misses": 0}
 
 def get_model():
     global _model
     if _model is None:
-        _model = SentenceTransformer('all-MiniLM-L6-v2')
+        # imported on first use: sentence_transformers pulls in torch, which dominates startup
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(MODEL_NAME)
     return _model
 
-def embed_texts(texts):
+def _count_tokens(model, texts):
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return None
+    encoded = tokenizer(list(texts), truncation=True, max_length=getattr(model, "max_seq_length", None))
+    return sum(len(ids) for ids in encoded["input_ids"])
+
+def embed_texts(texts, batch_size=32):
     model = get_model()
-    return model.encode(texts)
+    with tracing.span("encode", batch_size=len(texts)) as attrs:
+        start = time.perf_counter()
+        embeddings = model.encode(texts, batch_size=batch_size)
+        seconds = time.perf_counter() - start
+        attrs["texts_per_s"] = round(len(texts) / seconds, 1) if seconds else None
+    tracing.count("embedded_texts", len(texts))
+    if tracing.enabled():
+        # tokenizing again costs a little, so token throughput is only measured while tracing
+        tokens = _count_tokens(model, texts)
+        if tokens is not None:
+            attrs["tokens"] = tokens
+            attrs["tokens_per_s"] = round(tokens / seconds, 1) if seconds else None
+            tracing.count("embedded_tokens", tokens)
+    return embeddings
+
+def enable_query_batching(max_batch=64, max_wait=0.005):
+    """Route query-embedding cache misses through a MicroBatcher so concurrent callers share encoder calls."""
+    global _query_batcher
+    if _query_batcher is None:
+        _query_batcher = MicroBatcher(embed_texts, max_batch, max_wait)
+    return _query_batcher
+
+def _cache_key(text):
+    return (MODEL_NAME, " ".join(text.lower().split()))
+
+def embed_queries(queries):
+    """Embed query strings in one batched call, reusing an LRU cache of past queries.
+
+    Keys are (model name, lower-cased whitespace-normalized text); only cache
+    misses reach the encoder, via the micro-batcher once enable_query_batching()
+    has been called. Returns an (n, dim) float32 array.
+    """
+    keys = [_cache_key(q) for q in queries]
+    cached = {}
+    missing = []
+    with _query_cache_lock:
+        for key in keys:
+            if key in _query_cache:
+                _query_cache.move_to_end(key)
+                cached[key] = _query_cache[key]
+                query_cache_stats["hits"] += 1
+            else:
+                query_cache_stats["misses"] += 1
+                if key not in missing:
+                    missing.append(key)
+    
+    if missing:
+        encode = _query_batcher.submit if _query_batcher is not None else embed_texts
+        vectors = encode([text for _, text in missing])
+        fresh = dict(zip(missing, np.asarray(vectors, dtype='float32')))
+        cached.update(fresh)
+        with _query_cache_lock:
+            _query_cache.update(fresh)
+            while len(_query_cache) > QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+    
+    return np.stack([cached[key] for key in keys])
+
+def clear_query_cache():
+    with _query_cache_lock:
+        _query_cache.clear()
+    query_cache_stats["hits"] = 0
+    query_cache_stats["misses"] = 0
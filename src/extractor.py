@@ -1,14 +1,83 @@
-import pdfplumber
-from bs4 import BeautifulSoup
+import re
+
+# Elements whose text never reaches the reader (ix:header holds the hidden XBRL facts)
+SKIP_TAGS = {"script", "style", "head", "title", "noscript", "ix:header", "ix:hidden"}
+BLOCK_TAGS = {"p", "div", "table", "tr", "li", "ul", "ol", "br", "hr",
+              "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "blockquote", "pre"}
+CELL_TAGS = {"td", "th"}
+# Inline elements that separate the text around them without starting a block
+BREAK_TAGS = {"img", "input", "embed", "object", "svg", "area"}
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
 
 def extract_text_pdf(path):
+    import pdfplumber
     text = []
     with pdfplumber.open(path) as pdf:
         for page in pdf.pages:
             text.append(page.extract_text() or "")
     return "\n".join(text)
 
-def extract_text_html(path):
+def extract_text_html(path, engine="bs4"):
+    if engine == "lxml":
+        return "\n\n".join(iter_text_blocks_html(path))
+    from bs4 import BeautifulSoup
     with open(path, "r", encoding="utf-8") as f:
         soup = BeautifulSoup(f, "html.parser")
     return soup.get_text(separator=" ")
+
+class _BlockCollector:
+    """lxml parser target: turns start/end/data events into text blocks without building a tree."""
+
+    def __init__(self):
+        self.hidden = [False]
+        self.parts = []
+        self.blocks = []
+
+    def flush(self):
+        text = " ".join("".join(self.parts).split())
+        if text:
+            self.blocks.append(text)
+        self.parts = []
+
+    def start(self, tag, attrib):
+        hidden = self.hidden[-1] or tag in SKIP_TAGS or bool(HIDDEN_STYLE.search(attrib.get("style", "")))
+        self.hidden.append(hidden)
+        if not hidden and tag in BLOCK_TAGS:
+            self.flush()
+
+    def end(self, tag):
+        hidden = self.hidden.pop() if len(self.hidden) > 1 else self.hidden[-1]
+        if hidden:
+            return
+        if tag in BLOCK_TAGS:
+            self.flush()
+        elif tag in CELL_TAGS or tag in BREAK_TAGS:
+            self.parts.append(" ")
+
+    def data(self, data):
+        if not self.hidden[-1]:
+            self.parts.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self.flush()
+
+def iter_text_blocks_html(path, read_size=1 << 16):
+    """Stream paragraph/table-row text blocks from an HTML file.
+
+    The file is fed to lxml's HTML parser in read_size pieces and no DOM is
+    kept, so memory stays flat regardless of document size.
+    """
+    from lxml import etree
+    collector = _BlockCollector()
+    parser = etree.HTMLParser(target=collector, recover=True, encoding="utf-8")
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(read_size), b""):
+            parser.feed(data)
+            if collector.blocks:
+                yield from collector.blocks
+                collector.blocks = []
+    parser.close()
+    yield from collector.blocks
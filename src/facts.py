@@ -0,0 +1,333 @@
+import json
+import re
+from pathlib import Path
+
+from agent import COMPANY_ALIASES
+
+FACTS_FILE = "facts.json"
+
+# Segment rows ("Google Cloud", "Data Center") also appear under operating income, costs, assets...
+NOT_REVENUE_CONTEXT = r"income|loss|expense|cost|asset|depreciation"
+
+# (metric, row-label pattern, section context that rules the row out or None)
+METRIC_ROWS = [
+    ("total_revenue", r"(total )?(net )?revenues?", None),
+    ("cost_of_revenue", r"(total )?cost of (revenues?|sales)", None),
+    ("gross_profit", r"gross (profit|margin)", None),
+    ("research_and_development", r"research and development", None),
+    ("operating_income", r"(total )?(income from operations|operating income)", None),
+    ("net_income", r"net income", None),
+    ("data_center_revenue", r"data center", NOT_REVENUE_CONTEXT),
+    ("gaming_revenue", r"gaming", NOT_REVENUE_CONTEXT),
+    ("google_cloud_revenue", r"google cloud", NOT_REVENUE_CONTEXT),
+    ("google_services_revenue", r"google services", NOT_REVENUE_CONTEXT),
+    ("google_advertising_revenue", r"(total )?google advertising", None),
+    ("microsoft_cloud_revenue", r"microsoft cloud( revenue)?", None),
+]
+METRIC_LABELS = {
+    "total_revenue": "total revenue",
+    "cost_of_revenue": "cost of revenue",
+    "gross_profit": "gross profit",
+    "research_and_development": "R&D spending",
+    "operating_income": "operating income",
+    "net_income": "net income",
+    "data_center_revenue": "data center revenue",
+    "gaming_revenue": "gaming revenue",
+    "google_cloud_revenue": "cloud revenue",
+    "google_services_revenue": "services revenue",
+    "google_advertising_revenue": "advertising revenue",
+    "microsoft_cloud_revenue": "cloud revenue",
+}
+UNIT_MULTIPLIERS = {"thousands": 1e3, "millions": 1e6, "billions": 1e9}
+
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+NUMBER_RE = re.compile(r"^\(?-?\$?\s*[\d,]+(?:\.\d+)?\)?$")
+DASHES = {"—", "–", "-", "— —"}
+
+def _cell_text(cell):
+    return " ".join("".join(cell.itertext()).split())
+
+def _table_rows(table):
+    rows = []
+    for tr in table.iter("tr"):
+        cells = [_cell_text(td) for td in tr if td.tag in ("td", "th")]
+        cells = [c for c in cells if c and c != "$"]
+        if cells:
+            rows.append(cells)
+    return rows
+
+def _parse_number(text):
+    if text in DASHES:
+        return 0.0
+    if not NUMBER_RE.match(text):
+        return None
+    negative = text.startswith("(") and text.endswith(")")
+    value = float(text.strip("()$ ").replace(",", ""))
+    return -value if negative else value
+
+def _header_years(row):
+    """Fiscal years of the value columns if row is a column header like ['Jan 28, 2024', 'Jan 29, 2023']."""
+    years = []
+    for cell in row:
+        found = YEAR_RE.findall(cell)
+        if len(found) != 1:
+            break
+        years.append(int(found[0]))
+    return years if len(years) >= 2 else []
+
+def _table_unit(rows):
+    text = " ".join(" ".join(r) for r in rows[:4]).lower()
+    for unit, mult in UNIT_MULTIPLIERS.items():
+        if f"in {unit}" in text:
+            return mult
+    return UNIT_MULTIPLIERS["millions"]
+
+def extract_table_facts(rows):
+    """[(metric, fiscal_year, value_usd, label, raw)] from one statement table, first match per key."""
+    if any(cell.endswith("%") for row in rows for cell in row):
+        return []  # percentage-of-revenue tables restate the statement as ratios
+
+    unit = _table_unit(rows)
+    years, context = [], ""
+    found = {}
+    for row in rows:
+        header = _header_years(row)
+        if header:
+            years = header
+            continue
+        values = [_parse_number(c) for c in row[1:]]
+        if not values or any(v is None for v in values):
+            context = row[0].lower()
+            continue
+        if len(values) != len(years):
+            continue
+        label = row[0].rstrip(":").lower()
+        for metric, pattern, excluded_context in METRIC_ROWS:
+            if not re.fullmatch(pattern, label):
+                continue
+            if excluded_context and re.search(excluded_context, context):
+                continue
+            for year, value, raw in zip(years, values, row[1:]):
+                found.setdefault((metric, year), (metric, year, value * unit, row[0], raw))
+            break
+
+    # only trust tables that carry a revenue line; this skips e.g. stock-based compensation by function
+    if not any(metric == "total_revenue" or metric.endswith("_revenue") for metric, _ in found):
+        return []
+    return list(found.values())
+
+def extract_facts_html(path, company, filing_year, filename):
+    """Parse the financial tables of one filing into fact dicts, streaming table by table."""
+    from lxml import etree
+    facts = {}
+    for _, table in etree.iterparse(str(path), events=("end",), tag="table", html=True,
+                                    recover=True, encoding="utf-8"):
+        for metric, year, value, label, raw in extract_table_facts(_table_rows(table)):
+            facts.setdefault((metric, year), {
+                "company": company,
+                "fiscal_year": str(year),
+                "metric": metric,
+                "value": value,
+                "label": label,
+                "raw": raw,
+                "filename": filename,
+                "filing_year": str(filing_year),
+                "chunk_position": None,
+                "chunk_id": None
+            })
+        table.clear()
+    return list(facts.values())
+
+def link_fact_chunks(facts, chunk_metas):
+    """Point each fact at the first chunk of its filing that contains its row label and value."""
+    for fact in facts:
+        for meta in chunk_metas:
+            if fact["raw"] in meta["text"] and fact["label"].lower() in meta["text"].lower():
+                fact["chunk_position"] = meta["chunk_id"]
+                break
+
+class FactStore:
+    """(company, fiscal year, metric) -> fact, preferring the most recent filing.
+
+    Facts are kept per source filing so removing a filing re-exposes the
+    values reported by older filings.
+    """
+
+    def __init__(self):
+        self.by_file = {}
+        self.facts = {}
+
+    def __len__(self):
+        return len(self.facts)
+
+    def _reindex(self):
+        self.facts = {}
+        order = sorted(self.by_file, key=lambda f: (self.by_file[f][0]["filing_year"] if self.by_file[f] else "", f))
+        for filename in order:
+            for fact in self.by_file[filename]:
+                self.facts[(fact["company"], fact["fiscal_year"], fact["metric"])] = fact
+
+    def add(self, facts):
+        for fact in facts:
+            self.by_file.setdefault(fact["filename"], []).append(fact)
+        self._reindex()
+
+    def remove_filings(self, filenames):
+        for filename in filenames:
+            self.by_file.pop(filename, None)
+        self._reindex()
+
+    def resolve_chunk_ids(self, chunk_store):
+        """Turn (filename, chunk position) links into vector-store chunk ids."""
+        pending = [f for facts in self.by_file.values() for f in facts
+                   if f["chunk_id"] is None and f["chunk_position"] is not None]
+        for filename in {f["filename"] for f in pending}:
+            by_position = chunk_store.ids_by_position(filename)
+            for fact in pending:
+                if fact["filename"] == filename:
+                    fact["chunk_id"] = by_position.get(fact["chunk_position"])
+
+    def get(self, company, fiscal_year, metric):
+        return self.facts.get((company, str(fiscal_year), metric))
+
+    def companies(self):
+        return sorted({company for company, _, _ in self.facts})
+
+    def save(self, path):
+        with open(Path(path) / FACTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.by_file, f)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(Path(path) / FACTS_FILE, "r", encoding="utf-8") as f:
+            store.by_file = json.load(f)
+        store._reindex()
+        return store
+
+# Query side: (metric, denominator or None) per question pattern, first match wins
+QUERY_METRICS = [
+    (r"operating margin", ("operating_income", "total_revenue")),
+    (r"gross margin", ("gross_profit", "total_revenue")),
+    (r"(r&d|research and development).*(percent\w*|%) of revenue", ("research_and_development", "total_revenue")),
+    (r"(r&d|research and development)", ("research_and_development", None)),
+    (r"percent\w* of .*revenue.* from (google )?cloud", ("google_cloud_revenue", "total_revenue")),
+    (r"percent\w* of .*revenue.* from advertising", ("google_advertising_revenue", "total_revenue")),
+    (r"data center revenue", ("data_center_revenue", None)),
+    (r"microsoft.*cloud revenue", ("microsoft_cloud_revenue", None)),
+    (r"google.*cloud revenue", ("google_cloud_revenue", None)),
+    (r"net income", ("net_income", None)),
+    (r"operating income", ("operating_income", None)),
+    (r"revenue", ("total_revenue", None)),
+]
+
+def _format_value(value, is_ratio):
+    if is_ratio:
+        return f"{value * 100:.1f}%"
+    if abs(value) >= 1e9:
+        return f"${value / 1e9:,.2f} billion"
+    return f"${value / 1e6:,.0f} million"
+
+# Metrics some filers do not report as a line item: metric -> (minuend, subtrahend)
+DERIVED_METRICS = {"gross_profit": ("total_revenue", "cost_of_revenue")}
+
+def _lookup(store, company, year, metric):
+    fact = store.get(company, year, metric)
+    if fact is not None or metric not in DERIVED_METRICS:
+        return fact
+    a, b = (store.get(company, year, m) for m in DERIVED_METRICS[metric])
+    if a is None or b is None:
+        return None
+    return dict(a, metric=metric, value=a["value"] - b["value"], label=f"{a['label']} - {b['label']}")
+
+def _metric_value(store, company, year, metric, denominator):
+    num = _lookup(store, company, year, metric)
+    if num is None:
+        return None, []
+    if denominator is None:
+        return num["value"], [num]
+    den = _lookup(store, company, year, denominator)
+    if den is None or not den["value"]:
+        return None, []
+    return num["value"] / den["value"], [num, den]
+
+def answer_from_facts(query, store):
+    """Answer lookup, growth and comparison questions from the fact table.
+
+    Returns {"answer", "reasoning", "facts"} or None when the question is not a
+    metric question or a needed fact is missing (the caller falls back to RAG).
+    """
+    if store is None or not len(store):
+        return None
+    q = query.lower()
+
+    metric = denominator = None
+    for pattern, (m, d) in QUERY_METRICS:
+        if re.search(pattern, q):
+            metric, denominator = m, d
+            break
+    if metric is None or any(w in q for w in ("risk", "strategy", "describe", "summarize", "investment")):
+        return None
+
+    # "all companies" means every company in the fact table, including filings fetched with --tickers
+    known = store.companies()
+    companies = [c for alias, c in COMPANY_ALIASES.items() if re.search(rf"\b{alias}\b", q)]
+    companies += [c for c in known if re.search(rf"(?<!\w){re.escape(c.lower())}(?!\w)", q)]
+    companies = list(dict.fromkeys(companies))
+    if not companies or re.search(r"which company|three companies|each company|all companies", q):
+        companies = known
+    years = list(dict.fromkeys(YEAR_RE.findall(q)))
+    if not years:
+        return None
+
+    is_ratio = denominator is not None
+    label = METRIC_LABELS[metric] if not is_ratio else {
+        "operating_income": "operating margin",
+        "gross_profit": "gross margin",
+        "research_and_development": "R&D as a percentage of revenue",
+    }.get(metric, f"{METRIC_LABELS[metric]} share of total revenue")
+
+    growth = len(years) >= 2 and re.search(r"grow|growth|increase|decrease|change", q)
+    if growth and len(companies) == 1:
+        company, (y0, y1) = companies[0], years[:2]
+        v0, f0 = _metric_value(store, company, y0, metric, denominator)
+        v1, f1 = _metric_value(store, company, y1, metric, denominator)
+        if v0 is None or v1 is None or not v0:
+            return None
+        change = (v1 - v0) / abs(v0)
+        return {
+            "answer": f"{company}'s {label} went from {_format_value(v0, is_ratio)} in fiscal {y0} to "
+                      f"{_format_value(v1, is_ratio)} in fiscal {y1} ({change * 100:+.1f}%).",
+            "reasoning": f"Computed year-over-year change from the {label} reported in the financial statement tables.",
+            "facts": f0 + f1
+        }
+
+    year = years[0]
+    values, used = {}, []
+    for company in companies:
+        value, facts = _metric_value(store, company, year, metric, denominator)
+        if value is None:
+            return None
+        values[company] = value
+        used.extend(facts)
+
+    if len(companies) == 1:
+        company = companies[0]
+        return {
+            "answer": f"{company}'s {label} in fiscal {year} was {_format_value(values[company], is_ratio)}.",
+            "reasoning": f"Looked up {label} in the financial statement tables.",
+            "facts": used
+        }
+
+    ranked = sorted(values.items(), key=lambda item: item[1], reverse="lowest" not in q)
+    listing = ", ".join(f"{c} {_format_value(v, is_ratio)}" for c, v in ranked)
+    if re.search(r"which|highest|lowest", q):
+        answer = (f"{ranked[0][0]} had the {'lowest' if 'lowest' in q else 'highest'} {label} "
+                  f"in fiscal {year} ({listing}).")
+    else:
+        answer = f"{label[0].upper() + label[1:]} in fiscal {year}: {listing}."
+    return {
+        "answer": answer,
+        "reasoning": f"Compared {label} across {len(companies)} companies using the financial statement tables.",
+        "facts": used
+    }
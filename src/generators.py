@@ -0,0 +1,199 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+HF_BATCH_SIZE = 8
+LLM_MODES = ("openai", "hf", "stub")
+
+_generators = {}
+load_times = {}
+
+class GenerationError(Exception):
+    """Stands in for the answer of a prompt the backend failed on; str() is the error message."""
+
+def _load(llm_mode, model_name):
+    if llm_mode == "openai":
+        import openai
+        return openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    if llm_mode == "hf":
+        from transformers import pipeline
+        return pipeline("summarization", model=model_name)
+    if llm_mode == "stub":
+        return None
+    raise ValueError(f"Unknown LLM mode: {llm_mode}")
+
+def get_generator(llm_mode, model_name):
+    """Load each (mode, model_name) backend once and reuse it across queries."""
+    key = (llm_mode, model_name)
+    if key not in _generators:
+        start = time.perf_counter()
+        _generators[key] = _load(llm_mode, model_name)
+        load_times[key] = time.perf_counter() - start
+        print(f"⏱️  Loaded {llm_mode} backend '{model_name}' in {load_times[key]:.2f}s")
+    return _generators[key]
+
+def _openai_request(model_name, system_prompt, user_prompt):
+    return dict(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        max_tokens=300,
+        temperature=0.1
+    )
+
+def _error_prefix(llm_mode):
+    return {"openai": "OpenAI API error", "hf": "HuggingFace model error"}.get(llm_mode, f"{llm_mode} error")
+
+def _generate_openai(client, prompts, model_name):
+    answers = []
+    for system_prompt, user_prompt in prompts:
+        try:
+            response = client.chat.completions.create(**_openai_request(model_name, system_prompt, user_prompt))
+            answers.append(response.choices[0].message.content.strip())
+        except Exception as e:
+            answers.append(GenerationError(f"OpenAI API error: {str(e)}"))
+    return answers
+
+async def _generate_openai_async(prompts, model_name, concurrency, on_answer):
+    import asyncio
+    import openai
+    answers = [None] * len(prompts)
+    seconds = [0.0] * len(prompts)
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def answer(i, client, system_prompt, user_prompt):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(
+                    **_openai_request(model_name, system_prompt, user_prompt))
+                answers[i] = response.choices[0].message.content.strip()
+            except Exception as e:
+                answers[i] = GenerationError(f"OpenAI API error: {str(e)}")
+            seconds[i] = time.perf_counter() - start
+        if on_answer:
+            on_answer(i, answers[i], seconds[i])
+    
+    try:
+        # the async client's connection pool belongs to this event loop, so it is not cached
+        client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    except Exception as e:
+        return _fail(prompts, GenerationError(f"OpenAI API error: {str(e)}"), on_answer)
+    async with client:
+        await asyncio.gather(*(answer(i, client, *prompt) for i, prompt in enumerate(prompts)))
+    return answers, seconds
+
+def _generate_hf(summarizer, prompts):
+    try:
+        # prompts are packed to the model's token limit in main.assemble_prompt; truncation is only a backstop
+        inputs = [user_prompt for _, user_prompt in prompts]
+        summaries = summarizer(inputs, max_length=150, min_length=40, do_sample=False, truncation=True,
+                               batch_size=HF_BATCH_SIZE)
+        return [s['summary_text'] for s in summaries]
+    except Exception as e:
+        return [GenerationError(f"HuggingFace model error: {str(e)}")] * len(prompts)
+
+def _generate_stub(prompts):
+    # canned answers after a fixed delay, for local testing without a model or API key
+    time.sleep(float(os.getenv("STUB_LLM_DELAY_MS", "50")) / 1000)
+    answers = []
+    for _, user_prompt in prompts:
+        question = user_prompt.split("\n", 1)[0].replace("Question: ", "")
+        answers.append(f"[stub answer] {question}")
+    return answers
+
+def _generate_hf_concurrent(summarizer, prompts, concurrency, on_answer):
+    # torch releases the GIL during inference, so shards of the batch overlap on one shared pipeline
+    shards = [list(range(i, len(prompts), concurrency)) for i in range(min(concurrency, len(prompts)))]
+    answers = [None] * len(prompts)
+    seconds = [0.0] * len(prompts)
+    
+    def run_shard(rows):
+        start = time.perf_counter()
+        shard_answers = _generate_hf(summarizer, [prompts[i] for i in rows])
+        elapsed = (time.perf_counter() - start) / len(rows)
+        for i, a in zip(rows, shard_answers):
+            answers[i], seconds[i] = a, elapsed
+            if on_answer:
+                on_answer(i, a, elapsed)
+    
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        list(pool.map(run_shard, shards))
+    return answers, seconds
+
+def _fail(prompts, error, on_answer=None):
+    """(answers, seconds) with every prompt failed with the same error."""
+    answers = [error] * len(prompts)
+    if on_answer:
+        for i, a in enumerate(answers):
+            on_answer(i, a, 0.0)
+    return answers, [0.0] * len(prompts)
+
+def _backend(llm_mode, model_name):
+    """(backend, None) or (None, GenerationError) if the mode is unknown or the backend fails to load."""
+    if llm_mode not in LLM_MODES:
+        return None, GenerationError(f"LLM mode not supported. Available modes: {', '.join(LLM_MODES)}")
+    try:
+        return get_generator(llm_mode, model_name), None
+    except Exception as e:
+        return None, GenerationError(f"{_error_prefix(llm_mode)}: {str(e)}")
+
+def generate_concurrent(prompts, llm_mode="hf", model_name="facebook/bart-large-cnn",
+                        concurrency=4, on_answer=None):
+    """generate() with up to `concurrency` requests in flight.
+
+    openai runs on an asyncio client bounded by a semaphore; hf splits the
+    prompts into shards run from a thread pool. on_answer(i, answer, seconds)
+    is called as each prompt finishes. Returns (answers, seconds per prompt)
+    with answers in prompt order; failed prompts get a GenerationError.
+    """
+    if not prompts:
+        return [], []
+    backend, error = _backend(llm_mode, model_name)
+    if error is not None:
+        return _fail(prompts, error, on_answer)
+    
+    with tracing.span("generation", mode=llm_mode, prompts=len(prompts), concurrency=concurrency):
+        if llm_mode == "openai":
+            import asyncio
+            answers, seconds = asyncio.run(_generate_openai_async(prompts, model_name, concurrency, on_answer))
+        elif llm_mode == "stub":
+            # the stub sleeps per call, so one call answers the whole batch
+            start = time.perf_counter()
+            answers = _generate_stub(prompts)
+            seconds = [time.perf_counter() - start] * len(answers)
+            for i, a in enumerate(answers):
+                if on_answer:
+                    on_answer(i, a, seconds[i])
+        else:
+            answers, seconds = _generate_hf_concurrent(backend, prompts, concurrency, on_answer)
+    tracing.count("generated_answers", len(prompts))
+    return answers, seconds
+
+def generate(prompts, llm_mode="hf", model_name="facebook/bart-large-cnn"):
+    """Answer a list of (system_prompt, user_prompt) pairs.
+
+    Returns (answers, seconds) where seconds excludes the one-off backend load.
+    A prompt the backend failed on gets a GenerationError instead of a string,
+    so callers can tell errors from answers. The hf backend runs all prompts
+    through a single batched pipeline call.
+    """
+    backend, error = _backend(llm_mode, model_name)
+    if error is not None:
+        return _fail(prompts, error)[0], 0.0
+    
+    with tracing.span("generation", mode=llm_mode, prompts=len(prompts)):
+        start = time.perf_counter()
+        if llm_mode == "openai":
+            answers = _generate_openai(backend, prompts, model_name)
+        elif llm_mode == "stub":
+            answers = _generate_stub(prompts)
+        else:
+            answers = _generate_hf(backend, prompts)
+        seconds = time.perf_counter() - start
+    tracing.count("generated_answers", len(prompts))
+    return answers, seconds
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from chunkstore import ChunkStore
+
+MANIFEST_VERSION = 10
+MANIFEST_FILE = "manifest.json"
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def hash_filings(data_dir):
+    hashes = {}
+    for fname in sorted(os.listdir(data_dir)):
+        if fname.endswith(".html"):
+            hashes[fname] = file_sha256(Path(data_dir) / fname)
+    return hashes
+
+def build_manifest(file_hashes, embedding_model, chunker_params, index_params=None):
+    return {
+        "version": MANIFEST_VERSION,
+        "embedding_model": embedding_model,
+        "chunker": dict(chunker_params),
+        "index": dict(index_params or {}),
+        "files": dict(file_hashes),
+    }
+
+def index_version(manifest):
+    """Short hash identifying the index contents a manifest describes."""
+    return hashlib.sha1(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def read_manifest(index_dir):
+    path = Path(index_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def manifest_compatible(manifest, expected):
+    """True if the saved index was built with the same model, chunker and index settings."""
+    if manifest is None:
+        return False
+    return all(manifest.get(key) == expected.get(key)
+               for key in ("version", "embedding_model", "chunker", "index"))
+
+def manifest_matches(manifest, expected):
+    return manifest_compatible(manifest, expected) and manifest.get("files") == expected.get("files")
+
+def diff_filings(old_files, new_files):
+    added = sorted(f for f in new_files if f not in old_files)
+    removed = sorted(f for f in old_files if f not in new_files)
+    changed = sorted(f for f in new_files if f in old_files and old_files[f] != new_files[f])
+    return added, changed, removed
+
+def save_index(vs, file_map, manifest, index_dir):
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    # Drop the old manifest first so an interrupted save is never mistaken for a valid index
+    manifest_path = index_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        manifest_path.unlink()
+    vs.save(index_dir)
+    file_map.save(index_dir)
+    tmp_path = index_dir / (MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    file_map.version = index_version(manifest)
+
+def load_index(index_dir, mmap=True, **search_params):
+    index_dir = Path(index_dir)
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        return None, None, None
+    from vectorstore import VectorStore
+    vs = VectorStore.load(index_dir, mmap=mmap, **search_params)
+    file_map = ChunkStore.load(index_dir, mmap_texts=mmap)
+    file_map.version = index_version(manifest)
+    return vs, file_map, manifest
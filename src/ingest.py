@@ -0,0 +1,151 @@
+import re
+import json
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from extractor import extract_text_html
+from chunker import smart_chunk_text
+from facts import extract_facts_html, link_fact_chunks
+import tracing
+
+CIK_TO_COMPANY = {
+    "GOOGL": "Google",
+    "MSFT": "Microsoft", 
+    "NVDA": "NVIDIA"
+}
+
+# Written by the downloader for tickers outside CIK_TO_COMPANY: {ticker: company name}
+COMPANY_NAMES_FILE = "companies.json"
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+MIN_CHUNK_CHARS = 50
+
+EMBED_BATCH_SIZE = 256
+
+_DONE = object()
+
+def extract_section_info(text):
+    section_patterns = {
+        "Item 1A": r"(?i)item\s+1a[\.\s]*risk\s+factors",
+        "Item 7": r"(?i)item\s+7[\.\s]*management[\'\s]*s\s+discussion",
+        "Item 8": r"(?i)item\s+8[\.\s]*financial\s+statements"
+    }
+    
+    for section, pattern in section_patterns.items():
+        if re.search(pattern, text):
+            return section
+    return None
+
+def company_name(data_dir, ticker):
+    if ticker in CIK_TO_COMPANY:
+        return CIK_TO_COMPANY[ticker]
+    path = Path(data_dir) / COMPANY_NAMES_FILE
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get(ticker, ticker)
+    return ticker
+
+def process_filing(data_dir, fname, engine="bs4"):
+    path = Path(data_dir) / fname
+    cik, year = fname.replace(".html", "").rsplit("_", 1)
+    company = company_name(data_dir, cik)
+    
+    print(f"Processing {company} {year}...")
+    with tracing.span("extract", file=fname, engine=engine) as attrs:
+        text = extract_text_html(path, engine=engine)
+        attrs["bytes"] = path.stat().st_size
+    tracing.count("extract_bytes", attrs["bytes"])
+    
+    with tracing.span("chunk", file=fname) as attrs:
+        chunks = smart_chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+        attrs["chunks"] = len(chunks)
+    
+    texts = []
+    metas = []
+    with tracing.span("section_tag", file=fname):
+        for idx, ch in enumerate(chunks):
+            if len(ch.strip()) < MIN_CHUNK_CHARS:
+                continue
+                
+            section = extract_section_info(ch)
+            metas.append({
+                "cik": cik,
+                "company": company,
+                "year": year,
+                "text": ch,
+                "section": section,
+                "chunk_id": idx,
+                "filename": fname
+            })
+            texts.append(ch)
+    tracing.count("chunks", len(texts))
+    
+    with tracing.span("facts", file=fname) as attrs:
+        facts = extract_facts_html(path, company, year, fname)
+        link_fact_chunks(facts, metas)
+        attrs["facts"] = len(facts)
+    return texts, metas, facts
+
+def _process_filing_traced(data_dir, fname, engine, trace):
+    # runs in a worker process: hand the spans and counters back to the parent
+    tracing.enable(trace)
+    result = process_filing(data_dir, fname, engine)
+    return result, tracing.drain()
+
+def iter_processed_filings(data_dir, fnames, workers=1, engine="bs4"):
+    """Yield (texts, metas, facts) per filing, in the order of fnames."""
+    if workers <= 1:
+        for fname in fnames:
+            yield process_filing(data_dir, fname, engine)
+        return
+    
+    # spawn keeps workers clear of the torch/faiss threads already running in the parent
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for result, (events, counter_values) in pool.map(_process_filing_traced, repeat(data_dir), fnames,
+                                                         repeat(engine), repeat(tracing.enabled())):
+            tracing.merge(events, counter_values)
+            yield result
+
+def iter_chunk_batches(data_dir, fnames, workers=1, queue_depth=4,
+                       batch_size=EMBED_BATCH_SIZE, engine="bs4"):
+    """Yield (texts, metas, facts) batches of up to batch_size chunks.
+
+    Extraction and chunking run in a background thread (and a process pool when
+    workers > 1) that stays at most queue_depth batches ahead of the consumer,
+    so parsing overlaps with embedding. Batches come out in fnames order.
+    """
+    q = queue.Queue(maxsize=max(1, queue_depth))
+    
+    def produce():
+        try:
+            buf_texts, buf_metas, buf_facts = [], [], []
+            for texts, metas, facts in iter_processed_filings(data_dir, fnames, workers, engine):
+                buf_texts.extend(texts)
+                buf_metas.extend(metas)
+                buf_facts.extend(facts)
+                while len(buf_texts) >= batch_size:
+                    q.put((buf_texts[:batch_size], buf_metas[:batch_size], buf_facts))
+                    buf_texts, buf_metas, buf_facts = buf_texts[batch_size:], buf_metas[batch_size:], []
+            if buf_texts or buf_facts:
+                q.put((buf_texts, buf_metas, buf_facts))
+        except BaseException as e:
+            q.put(e)
+        finally:
+            q.put(_DONE)
+    
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    while True:
+        item = q.get()
+        if item is _DONE:
+            break
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+    producer.join()
@@ -1,22 +1,95 @@
 import re
 import os
 import json
-from pathlib import Path
-from extractor import extract_text_html
-from chunker import smart_chunk_text
-from embeddings import embed_texts
-from vectorstore import VectorStore
-from agent import decompose_query
-import openai
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Ingestion modules, the vector index and the model backends are imported on first use,
+# so answering from a prebuilt index (see ask.py) never loads the ingestion stack
+from embeddings import embed_queries, query_cache_stats, MODEL_NAME
+from chunkstore import ChunkStore
+from agent import decompose_query, route_query
+from bm25 import reciprocal_rank_fusion
+from facts import answer_from_facts
+from context import get_token_counter, pack_context
+from answer_cache import ANSWER_CACHE_FILE, AnswerCache, config_key
+from generators import GenerationError, generate, generate_concurrent, load_times
+import tracing
+from index_store import (hash_filings, build_manifest, read_manifest, manifest_matches,
+                         manifest_compatible, diff_filings, save_index, load_index)
 from dotenv import load_dotenv
 
 load_dotenv()
 
-CIK_TO_COMPANY = {
-    "GOOGL": "Google",
-    "MSFT": "Microsoft", 
-    "NVDA": "NVIDIA"
-}
+INDEX_DIR = "index"
+# 0 = serial ingestion; N > 0 = N extraction processes pipelined into embedding
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+INGEST_QUEUE_DEPTH = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+# Chunk encoding: length-sorted batches of EMBED_ENCODE_BATCH; EMBED_WORKERS > 0 encodes in that many
+# processes with EMBED_THREADS threads each (0 = cores / workers), pinned to their own cores
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))
+EMBED_ENCODE_BATCH = int(os.getenv("EMBED_ENCODE_BATCH", "64"))
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))
+EMBED_PIN_CORES = os.getenv("EMBED_PIN_CORES", "1") != "0"
+# "bs4" (default) or "lxml" for the streaming extractor
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "bs4")
+# Store near-duplicate chunks (boilerplate repeated across filings) once, with their occurrences
+DEDUP = os.getenv("DEDUP", "1") != "0"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# Vector index: "flat" (exact), "hnsw" or "ivf"; EF_SEARCH / NPROBE trade recall for latency
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "256"))
+EF_SEARCH = int(os.getenv("EF_SEARCH", "64"))
+NPROBE = int(os.getenv("NPROBE", "8"))
+# Compressed vector codes: "none", "fp16", "int8" or "pq" (PQ_M bytes per vector); compressed
+# searches re-score RERANK x k candidates against the exact vectors
+INDEX_COMPRESSION = os.getenv("INDEX_COMPRESSION", "none")
+PQ_M = int(os.getenv("PQ_M", "48"))
+RERANK = int(os.getenv("RERANK", "4"))
+# "dense" (FAISS), "lexical" (BM25) or "hybrid" (both, merged with reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+# Metadata columns a query can be restricted to (see retrieve_for_query)
+FILTER_KEYS = ("company", "year", "section")
+# Prompt context: retrieved chunks packed by MMR into this many tokens of the target model
+CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKENS", "800"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+RRF_CANDIDATES = 20
+# Answer metric questions from the extracted financial fact table before falling back to RAG
+USE_FACTS = os.getenv("USE_FACTS", "1") != "0"
+# Batch runs: "hf", "openai" or "stub" (canned answers); QUERY_CONCURRENCY > 1 keeps that many generation calls in flight
+LLM_MODE = os.getenv("LLM_MODE", "hf")
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "hf": "facebook/bart-large-cnn", "stub": "stub"}
+LLM_MODEL = os.getenv("LLM_MODEL", DEFAULT_MODELS.get(LLM_MODE, "facebook/bart-large-cnn"))
+QUERY_CONCURRENCY = int(os.getenv("QUERY_CONCURRENCY", "1"))
+# Generated answers reused across runs for repeated and paraphrased questions (0 = off)
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "0") != "0"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", str(7 * 24 * 3600)))
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_MIN_OVERLAP = float(os.getenv("ANSWER_CACHE_MIN_OVERLAP", "0.8"))
+# Write a Chrome-format trace of every pipeline span to this file at the end of main()
+TRACE_FILE = os.getenv("TRACE_FILE")
+# cProfile + tracemalloc around index builds/updates, written to profiles/
+PROFILE_INGEST = os.getenv("PROFILE_INGEST", "0") == "1"
+
+TEST_QUERIES = [
+    "What was Microsoft's total revenue in 2023?",
+    "What was NVIDIA's total revenue in fiscal year 2024?",
+    "How did NVIDIA's data center revenue grow from 2022 to 2023?",
+    "How much did Microsoft's cloud revenue grow from 2022 to 2023?",
+    "Which company had the highest operating margin in 2023?",
+    "Which of the three companies had the highest gross margin in 2023?",
+    "What percentage of Google's revenue came from cloud in 2023?",
+    "What percentage of Google's 2023 revenue came from advertising?",
+    "Compare AI investments mentioned by all three companies in their 2024 10-Ks",
+    "Compare the R&D spending as a percentage of revenue across all three companies in 2023",
+    "What are the main AI risks mentioned by each company and how do they differ?"
+]
+
 def extract_metric(text):
     patterns = [
         r"\$?\d+(?:\.\d+)?\s?(?:billion|million|thousand|B|M|K)?",
@@ -52,174 +125,519 @@ def normalize_number(val):
     except:
         return None
 
-def extract_section_info(text):
-    section_patterns = {
-        "Item 1A": r"(?i)item\s+1a[\.\s]*risk\s+factors",
-        "Item 7": r"(?i)item\s+7[\.\s]*management[\'\s]*s\s+discussion",
-        "Item 8": r"(?i)item\s+8[\.\s]*financial\s+statements"
-    }
-    
-    for section, pattern in section_patterns.items():
-        if re.search(pattern, text):
-            return section
-    return None
+def add_chunks(vs, file_map, texts, metas, facts=(), encoder=None, untrained=None):
+    """Dedup, store and index one batch of chunks; returns the (possibly new) VectorStore.
 
-def build_index_from_all_filings(data_dir="data"):
-    all_chunks = []
-    file_map = []
+    Vectors go into the index batch by batch as they are encoded. An index that
+    still needs training (IVF, int8, PQ) cannot be trained on one batch, so its
+    (ids, embeddings) are appended to `untrained` for flush_untrained(); without
+    a list they are added at the end of this call.
+    """
+    flush = untrained is None
+    untrained = [] if flush else untrained
+    if DEDUP and texts:
+        with tracing.span("dedup", chunks=len(texts)) as attrs:
+            file_map.dedup.threshold = DEDUP_THRESHOLD
+            keep, canonical = file_map.dedup.split(texts, file_map.next_id)
+            dup_rows = [i for i, c in enumerate(canonical) if c >= 0]
+            file_map.add_duplicates([canonical[i] for i in dup_rows], [metas[i] for i in dup_rows])
+            texts, metas = [texts[i] for i in keep], [metas[i] for i in keep]
+            attrs["duplicates"] = len(dup_rows)
+        tracing.count("duplicate_chunks", len(dup_rows))
+    if texts:
+        ids = np.arange(file_map.next_id, file_map.next_id + len(texts))
+        with tracing.span("index_add", chunks=len(texts)):
+            file_map.add(ids, metas)
+        if encoder is None:
+            from embed_engine import EmbeddingEngine
+            encoder = EmbeddingEngine(batch_size=EMBED_ENCODE_BATCH, threads=EMBED_THREADS)
+        for rows, embeddings in encoder.embed(texts):
+            if vs is None:
+                from vectorstore import VectorStore
+                vs = VectorStore(embeddings.shape[1], INDEX_TYPE, hnsw_m=HNSW_M, nlist=IVF_NLIST,
+                                 compression=INDEX_COMPRESSION, pq_m=PQ_M, **search_params())
+            if vs.index.is_trained:
+                with tracing.span("index_add", chunks=len(rows)):
+                    vs.add(embeddings, ids[rows])
+            else:
+                untrained.append((ids[rows], embeddings))
+    file_map.facts.add(facts)
+    if flush:
+        flush_untrained(vs, untrained)
+    return vs
+
+def flush_untrained(vs, untrained):
+    """Train the index on every collected vector and add them in one call."""
+    if not untrained:
+        return
+    ids = np.concatenate([i for i, _ in untrained])
+    with tracing.span("index_add", chunks=len(ids)):
+        vs.add(np.vstack([e for _, e in untrained]), ids)
+    untrained.clear()
+
+def add_filings(vs, file_map, data_dir, fnames, workers=INGEST_WORKERS, queue_depth=INGEST_QUEUE_DEPTH):
+    from ingest import iter_chunk_batches, process_filing
+    from embed_engine import EmbeddingEngine
+    n_chunks = 0
+    encoder = EmbeddingEngine(EMBED_WORKERS, EMBED_ENCODE_BATCH, EMBED_THREADS, EMBED_PIN_CORES)
     
+    if workers > 0:
+        # Pipelined: extraction/chunking in a process pool feeding embedding batches; an untrained
+        # index is trained once on the vectors of every batch, so it matches a serial build
+        untrained = []
+        with encoder:
+            for texts, metas, facts in iter_chunk_batches(data_dir, fnames, workers, queue_depth,
+                                                          engine=HTML_EXTRACTOR):
+                vs = add_chunks(vs, file_map, texts, metas, facts, encoder, untrained)
+                n_chunks += len(texts)
+        flush_untrained(vs, untrained)
+    else:
+        all_chunks = []
+        metas = []
+        all_facts = []
+        for fname in fnames:
+            texts, file_metas, facts = process_filing(data_dir, fname, HTML_EXTRACTOR)
+            all_chunks.extend(texts)
+            metas.extend(file_metas)
+            all_facts.extend(facts)
+        
+        if not all_chunks:
+            return vs, 0
+        
+        with encoder:
+            vs = add_chunks(vs, file_map, all_chunks, metas, all_facts, encoder)
+        n_chunks = len(all_chunks)
+    
+    file_map.facts.resolve_chunk_ids(file_map)
+    return vs, n_chunks
+
+def remove_filings(vs, file_map, fnames):
+    stale_ids = file_map.remove_filings(fnames)
+    vs.remove(stale_ids)
+    file_map.facts.remove_filings(fnames)
+    return len(stale_ids)
+
+def build_index_from_all_filings(data_dir="data", workers=INGEST_WORKERS, queue_depth=INGEST_QUEUE_DEPTH):
     if not os.path.exists(data_dir):
         print(f"Data directory '{data_dir}' not found. Please run the downloader first.")
         return None, None
     
-    for fname in os.listdir(data_dir):
-        if fname.endswith(".html"):
-            path = Path(data_dir) / fname
-            cik, year = fname.replace(".html", "").split("_")
-            company = CIK_TO_COMPANY.get(cik, cik)
-            
-            print(f"Processing {company} {year}...")
-            text = extract_text_html(path)
-            
-            chunks = smart_chunk_text(text, chunk_size=800, overlap=100)
-            
-            for idx, ch in enumerate(chunks):
-                if len(ch.strip()) < 50:
-                    continue
-                    
-                section = extract_section_info(ch)
-                file_map.append({
-                    "cik": cik,
-                    "company": company,
-                    "year": year,
-                    "text": ch,
-                    "section": section,
-                    "chunk_id": idx,
-                    "filename": fname
-                })
-                all_chunks.append(ch)
-    
-    if not all_chunks:
+    fnames = sorted(f for f in os.listdir(data_dir) if f.endswith(".html"))
+    file_map = ChunkStore()
+    vs, n_chunks = add_filings(None, file_map, data_dir, fnames, workers, queue_depth)
+    
+    if not n_chunks:
         print("No chunks found. Please check your data files.")
         return None, None
         
-    print(f"Created {len(all_chunks)} chunks from {len(os.listdir(data_dir))} files")
-    embeddings = embed_texts(all_chunks)
-    vs = VectorStore(len(embeddings[0]))
-    vs.add(embeddings, all_chunks)
+    print(f"Created {n_chunks} chunks from {len(fnames)} files")
+    if DEDUP:
+        print(f"🧬 {n_chunks - len(file_map)} near-duplicate chunks stored once, {len(file_map)} indexed")
+    if tracing.enabled():
+        tracing.print_summary()
+    return vs, file_map
+
+def update_index(vs, file_map, data_dir, old_files, new_files):
+    added, changed, removed = diff_filings(old_files, new_files)
+    print(f"🔄 Incremental update: {len(added)} new, {len(changed)} changed, {len(removed)} removed filings")
+    
+    n_removed = remove_filings(vs, file_map, changed + removed)
+    vs, n_added = add_filings(vs, file_map, data_dir, added + changed)
+    print(f"   Removed {n_removed} chunks, added {n_added} chunks")
+    return vs, file_map
+
+def chunker_params():
+    from ingest import CHUNK_SIZE, CHUNK_OVERLAP, MIN_CHUNK_CHARS
+    return {"chunk_size": CHUNK_SIZE, "overlap": CHUNK_OVERLAP, "min_chunk_chars": MIN_CHUNK_CHARS,
+            "extractor": HTML_EXTRACTOR, "dedup_threshold": DEDUP_THRESHOLD if DEDUP else None}
+
+def index_params():
+    params = {"index_type": INDEX_TYPE}
+    if INDEX_TYPE == "hnsw":
+        params["hnsw_m"] = HNSW_M
+    elif INDEX_TYPE == "ivf":
+        params["nlist"] = IVF_NLIST
+    if INDEX_COMPRESSION != "none":
+        params["compression"] = INDEX_COMPRESSION
+        if INDEX_COMPRESSION == "pq":
+            params["pq_m"] = PQ_M
+    return params
+
+def search_params():
+    return {"ef_search": EF_SEARCH, "nprobe": NPROBE, "rerank": RERANK}
+
+def load_or_build_index(data_dir="data", index_dir=INDEX_DIR, rebuild=False):
+    if not os.path.exists(data_dir):
+        print(f"Data directory '{data_dir}' not found. Please run the downloader first.")
+        return None, None
+    
+    expected = build_manifest(hash_filings(data_dir), MODEL_NAME, chunker_params(), index_params())
+    manifest = None if rebuild else read_manifest(index_dir)
+    if manifest_matches(manifest, expected):
+        print(f"📂 Loading saved index from '{index_dir}'...")
+        vs, file_map, _ = load_index(index_dir, mmap=True, **search_params())
+        return vs, file_map
+    
+    vs = None
+    if manifest_compatible(manifest, expected):
+        vs, file_map, _ = load_index(index_dir, mmap=False, **search_params())
+        _, changed, removed = diff_filings(manifest["files"], expected["files"])
+        if (changed or removed) and not vs.supports_remove:
+            print(f"♻️  {INDEX_TYPE} index cannot remove vectors, rebuilding...")
+            vs = None
+    
+    with tracing.profile("ingest", enabled=PROFILE_INGEST):
+        if vs is not None:
+            vs, file_map = update_index(vs, file_map, data_dir, manifest["files"], expected["files"])
+        else:
+            vs, file_map = build_index_from_all_filings(data_dir)
+    
+    if vs is not None:
+        print(f"💾 Saving index to '{index_dir}'...")
+        save_index(vs, file_map, expected, index_dir)
     return vs, file_map
 
-def llm_answer(query, retrieved_texts, llm_mode="hf", model_name="facebook/bart-large-cnn"):
-    context = "\n\n".join(retrieved_texts[:3])
+def build_prompt(query, context_texts):
+    context = "\n\n".join(context_texts)
     
     system_prompt = """You are a financial analyst. Answer questions based only on the provided context from 10-K filings. 
     Be specific with numbers and cite the source information. If you cannot find the answer in the context, say so."""
     
     user_prompt = f"Question: {query}\n\nContext from 10-K filings:\n{context}\n\nAnswer:"
+    return system_prompt, user_prompt
+
+def assemble_prompt(query, retrieved, llm_mode="hf", model_name="facebook/bart-large-cnn", budget=None):
+    """Prompt with the retrieved texts (per sub-query) packed into budget (CONTEXT_TOKENS) tokens; returns (prompt, context stats)."""
+    with tracing.span("context_assembly") as attrs:
+        counter = get_token_counter(llm_mode, model_name)
+        budget = budget or CONTEXT_TOKENS
+        if counter.max_tokens:
+            # the question, instructions and chunk separators must fit the model's input limit too
+            budget = min(budget, counter.max_tokens - counter.count(build_prompt(query, [])[1]) - 16)
+        texts, stats = pack_context(retrieved, counter, budget, MMR_LAMBDA)
+        prompt = build_prompt(query, texts)
+        stats["prompt_tokens"] = counter.count(prompt[1])
+        if llm_mode == "openai":
+            stats["prompt_tokens"] += counter.count(prompt[0])
+        attrs.update(stats)
+    return prompt, stats
+
+def llm_answer(query, retrieved, llm_mode="hf", model_name="facebook/bart-large-cnn"):
+    prompt, _ = assemble_prompt(query, retrieved, llm_mode, model_name)
+    answers, _ = generate([prompt], llm_mode, model_name)
+    return str(answers[0])
+
+def set_answer(result, answer):
+    """Put a generated answer into result; False if generation failed (the error becomes the answer text)."""
+    result["answer"] = str(answer)
+    if isinstance(answer, GenerationError):
+        result["error"] = True
+        return False
+    return True
+
+def sub_query_mask(file_map, sq, query=None, filters=None, use_router=True):
+    """Allowed-chunk mask for a sub-query, or None to search everything."""
+    constraints = route_query(sq, query) if use_router else {}
+    constraints.update({key: val for key, val in (filters or {}).items() if val is not None})
+    if not any(val is not None for val in constraints.values()):
+        return None
     
-    if llm_mode == "openai":
-        try:
-            client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=300,
-                temperature=0.1
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"OpenAI API error: {str(e)}"
-    
-    elif llm_mode == "hf":
-        try:
-            from transformers import pipeline
-            summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-            if len(user_prompt) > 1000:
-                user_prompt = user_prompt[:1000] + "..."
-            summary = summarizer(user_prompt, max_length=150, min_length=40, do_sample=False)
-            return summary[0]['summary_text']
-        except Exception as e:
-            return f"HuggingFace model error: {str(e)}"
-    
-    return "LLM mode not supported. Available modes: 'openai', 'hf'"
-
-def run_query(vs, file_map, query, llm_mode="hf", model_name="facebook/bart-large-cnn"):
-    if vs is None or file_map is None:
-        return {
-            "query": query,
-            "answer": "No data available. Please run the downloader first.",
-            "reasoning": "Vector store not initialized",
-            "sub_queries": [],
-            "sources": []
-        }
+    mask = file_map.mask(**constraints)
+    if not mask.any():
+        # no filing matches the constraints (e.g. a year we have not indexed)
+        return None
+    return mask
+
+def search_sub_queries(vs, file_map, sub_qs, masks, k=5, retrieval_mode=RETRIEVAL_MODE):
+    """Top-k [(chunk_id, score), ...] per sub-query plus per-stage seconds ({"embed": ..., "dense_search": ...})."""
+    if retrieval_mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{retrieval_mode}'")
+    
+    n_candidates = RRF_CANDIDATES if retrieval_mode == "hybrid" else k
     
+    with tracing.collect() as stages:
+        if retrieval_mode in ("dense", "hybrid"):
+            with tracing.span("embed", queries=len(sub_qs)):
+                embs = embed_queries(sub_qs)
+            with tracing.span("dense_search", queries=len(sub_qs), k=n_candidates):
+                dense_hits = vs.search_batch(embs, k=n_candidates, allowed=masks)
+            if retrieval_mode == "dense":
+                return dense_hits, stages
+        
+        with tracing.span("lexical_search", queries=len(sub_qs), k=n_candidates):
+            lexical_hits = [file_map.bm25.search(sq, n_candidates, mask) for sq, mask in zip(sub_qs, masks)]
+        if retrieval_mode == "lexical":
+            return lexical_hits, stages
+        
+        with tracing.span("fusion"):
+            fused = [reciprocal_rank_fusion([dense, lexical])[:k] for dense, lexical in zip(dense_hits, lexical_hits)]
+    return fused, stages
+
+def retrieve_for_query(vs, file_map, query, llm_mode="hf", filters=None, use_router=True,
+                       retrieval_mode=RETRIEVAL_MODE):
+    """Run decomposition and retrieval; returns (result without answer, retrieved texts per sub-query).
+
+    filters restricts every sub-query to the given company/year/section values;
+    use_router additionally applies the company/year mentioned in each sub-query.
+    """
     print(f"\n🔍 Processing query: {query}")
     
-    sub_qs = decompose_query(query)
-    print(f"📋 Sub-queries: {sub_qs}")
+    with tracing.collect() as stages:
+        with tracing.span("decompose"):
+            sub_qs = decompose_query(query)
+        print(f"📋 Sub-queries: {sub_qs}")
     
-    all_results = []
-    all_retrieved = []
-    sources = []
+        all_retrieved = []
+        chunk_ids = []
+        sources = []
+    
+        with tracing.span("route"):
+            masks = [sub_query_mask(file_map, sq, query, filters, use_router) for sq in sub_qs]
+        hits_per_sq, _ = search_sub_queries(vs, file_map, sub_qs, masks, k=5, retrieval_mode=retrieval_mode)
     
-    for sq in sub_qs:
-        emb = embed_texts([sq])[0]
-        retrieved = vs.search(emb, k=5)
-        all_results.extend(retrieved)
-        all_retrieved.append(retrieved)
+        with tracing.span("metadata_lookup", sub_queries=len(sub_qs)):
+            for hits in hits_per_sq:
+                retrieved = [file_map.text(chunk_id) for chunk_id, _ in hits]
+                all_retrieved.append(retrieved)
+                chunk_ids.extend(chunk_id for chunk_id, _ in hits)
         
-        for r in retrieved:
-            for fm in file_map:
-                if fm["text"] == r:
-                    sources.append({
-                        "company": fm["company"],
-                        "year": fm["year"],
+                for (chunk_id, score), r in zip(hits, retrieved):
+                    source = {
+                        "company": file_map.value("company", chunk_id),
+                        "year": file_map.value("year", chunk_id),
                         "excerpt": r[:200] + "..." if len(r) > 200 else r,
-                        "section": fm.get("section"),
-                        "page": None
-                    })
-                    break
-    
-    unique_sources = []
-    seen_sources = set()
-    for src in sources:
-        key = (src["company"], src["year"], src["excerpt"][:50])
-        if key not in seen_sources:
-            seen_sources.add(key)
-            unique_sources.append(src)
-    
-    answer = ""
-    reasoning = ""
+                        "section": file_map.value("section", chunk_id),
+                        "page": None,
+                        "chunk_id": chunk_id,
+                        "score": score
+                    }
+                    occurrences = file_map.occurrences(chunk_id)
+                    if len(occurrences) > 1:
+                        source["occurrences"] = [{"company": c, "year": y} for c, y in occurrences]
+                    sources.append(source)
+    
+            unique_sources = []
+            seen_sources = set()
+            for src in sources:
+                key = (src["company"], src["year"], src["excerpt"][:50])
+                if key not in seen_sources:
+                    seen_sources.add(key)
+                    unique_sources.append(src)
     
     if len(sub_qs) > 1 or any(keyword in query.lower() for keyword in ["compare", "which", "highest", "lowest"]):
-        answer = llm_answer(query, all_results, llm_mode, model_name)
         reasoning = f"Used agent decomposition with {len(sub_qs)} sub-queries and {llm_mode} LLM for synthesis."
     
     elif any(keyword in query.lower() for keyword in ["grow", "growth", "increase", "decrease", "change"]):
-        answer = llm_answer(query, all_results, llm_mode, model_name)
         reasoning = "Retrieved financial data across years and calculated growth/change."
     
     elif any(keyword in query.lower() for keyword in ["strategy", "summarize", "describe", "risk", "investment", "ai"]):
-        answer = llm_answer(query, all_results, llm_mode, model_name)
         reasoning = f"Used {llm_mode} LLM to synthesize narrative answer from retrieved context."
     
     else:
-        answer = llm_answer(query, all_results, llm_mode, model_name)
         reasoning = "Retrieved relevant context and generated direct answer."
     
     result = {
         "query": query,
-        "answer": answer,
+        "answer": "",
         "reasoning": reasoning,
         "sub_queries": sub_qs,
-        "sources": unique_sources[:10]
+        "sources": unique_sources[:10],
+        "chunk_ids": chunk_ids,
+        "timings": tracing.as_timings(stages)
+    }
+    
+    return result, all_retrieved
+
+def no_index_result(query):
+    return {
+        "query": query,
+        "answer": "No data available. Please run the downloader first.",
+        "reasoning": "Vector store not initialized",
+        "sub_queries": [],
+        "sources": []
     }
+
+def fact_result(file_map, query):
+    """Result built straight from the fact table, or None if the facts cannot answer the query."""
+    with tracing.span("fact_lookup") as attrs:
+        start = time.perf_counter()
+        hit = answer_from_facts(query, file_map.facts)
+        elapsed = time.perf_counter() - start
+        attrs["hit"] = hit is not None
+    if hit is None:
+        return None
+    print(f"\n📊 Answered from fact table: {query}")
+    
+    sources = []
+    seen = set()
+    for fact in hit["facts"]:
+        key = (fact["company"], fact["fiscal_year"], fact["metric"])
+        if key in seen:
+            continue
+        seen.add(key)
+        chunk_id = fact.get("chunk_id")
+        if chunk_id is not None and chunk_id in file_map:
+            text = file_map.text(chunk_id)
+            excerpt = text[:200] + "..." if len(text) > 200 else text
+            section = file_map.value("section", chunk_id)
+        else:
+            excerpt, section = f"{fact['label']}: {fact['raw']}", None
+        sources.append({
+            "company": fact["company"],
+            "year": fact["filing_year"],
+            "excerpt": excerpt,
+            "section": section,
+            "page": None,
+            "chunk_id": chunk_id,
+            "metric": fact["metric"],
+            "fiscal_year": fact["fiscal_year"],
+            "value": fact["value"]
+        })
+    
+    return {
+        "query": query,
+        "answer": hit["answer"],
+        "reasoning": hit["reasoning"],
+        "sub_queries": [],
+        "sources": sources[:10],
+        "fact": True,
+        "timings": {"fact_lookup_s": round(elapsed, 6)}
+    }
+
+def open_answer_cache(index_dir=INDEX_DIR):
+    return AnswerCache(os.path.join(index_dir, ANSWER_CACHE_FILE), max_entries=ANSWER_CACHE_SIZE,
+                       ttl=ANSWER_CACHE_TTL_S, threshold=ANSWER_CACHE_THRESHOLD,
+                       min_overlap=ANSWER_CACHE_MIN_OVERLAP)
+
+def exact_cached(answer_cache, config, file_map, query):
+    """Cached result for a repeated question (no retrieval needed), or None."""
+    if answer_cache is None:
+        return None
+    with tracing.span("answer_cache", tier="exact") as attrs:
+        start = time.perf_counter()
+        result = answer_cache.get_exact(config, query, file_map)
+        attrs["hit"] = result is not None
+    if result is not None:
+        print(f"\n♻️  Cached answer: {query}")
+        result["timings"] = {"answer_cache_s": round(time.perf_counter() - start, 6)}
+    return result
+
+def semantic_cached(answer_cache, config, file_map, result):
+    """(query embedding, cached answer) for a retrieved result; the answer is None on a miss."""
+    if answer_cache is None:
+        return None, None
+    with tracing.span("answer_cache", tier="semantic") as attrs:
+        embedding = embed_queries([result["query"]])[0]
+        hit = answer_cache.get_semantic(config, embedding, result["chunk_ids"], file_map)
+        attrs["hit"] = hit is not None
+    if hit is None:
+        return embedding, None
+    print(f"\n♻️  Cached answer for a paraphrase: {result['query']}")
+    result["cache"] = "semantic"
+    return embedding, hit["answer"]
+
+def run_query(vs, file_map, query, llm_mode="hf", model_name="facebook/bart-large-cnn",
+              filters=None, use_router=True, retrieval_mode=RETRIEVAL_MODE, use_facts=USE_FACTS,
+              answer_cache=None):
+    if vs is None or file_map is None:
+        return no_index_result(query)
     
+    config = config_key(llm_mode, model_name, filters, retrieval_mode, use_router)
+    with tracing.collect() as stages:
+        with tracing.span("query"):
+            start = time.perf_counter()
+            result = fact_result(file_map, query) if use_facts else None
+            if result is None:
+                result = exact_cached(answer_cache, config, file_map, query)
+            if result is None:
+                result, retrieved = retrieve_for_query(vs, file_map, query, llm_mode, filters, use_router,
+                                                       retrieval_mode)
+                embedding, result["answer"] = semantic_cached(answer_cache, config, file_map, result)
+                if result["answer"] is None:
+                    prompt, result["context"] = assemble_prompt(query, retrieved, llm_mode, model_name)
+                    retrieval_s = time.perf_counter() - start
+                    answers, gen_time = generate([prompt], llm_mode, model_name)
+                    # a failed generation is not cached, or every later run would serve the error
+                    if set_answer(result, answers[0]) and answer_cache is not None:
+                        answer_cache.put(config, query, embedding, result, file_map, retrieval_s, gen_time)
+    result["timings"] = tracing.as_timings(stages)
     return result
 
+def run_queries(vs, file_map, queries, llm_mode="hf", model_name="facebook/bart-large-cnn",
+                filters=None, use_router=True, retrieval_mode=RETRIEVAL_MODE, use_facts=USE_FACTS,
+                concurrency=1, on_result=None, answer_cache=None):
+    """Answer fact-table and cached questions directly, then retrieve for the rest and generate their answers.
+
+    concurrency=1 generates in one batched call; above that up to `concurrency`
+    generation calls run at once. on_result(i, result) fires as soon as query i
+    is done; the returned list is always in query order.
+    """
+    if vs is None or file_map is None:
+        results = [no_index_result(q) for q in queries]
+        for i, result in enumerate(results):
+            if on_result:
+                on_result(i, result)
+        return results
+    
+    config = config_key(llm_mode, model_name, filters, retrieval_mode, use_router)
+    results = [fact_result(file_map, q) if use_facts else None for q in queries]
+    results = [result or exact_cached(answer_cache, config, file_map, q) for q, result in zip(queries, results)]
+    rag_rows = [i for i, result in enumerate(results) if result is None]
+    for i, result in enumerate(results):
+        if result is not None and on_result:
+            on_result(i, result)
+    if not rag_rows:
+        return results
+    
+    pending, retrieval_s, embeddings = [], [], []
+    for i in rag_rows:
+        start = time.perf_counter()
+        result, retrieved = retrieve_for_query(vs, file_map, queries[i], llm_mode, filters, use_router,
+                                               retrieval_mode)
+        embedding, answer = semantic_cached(answer_cache, config, file_map, result)
+        if answer is not None:
+            result["answer"] = answer
+            results[i] = result
+            if on_result:
+                on_result(i, result)
+            continue
+        pending.append((result, retrieved))
+        retrieval_s.append(time.perf_counter() - start)
+        embeddings.append(embedding)
+    rag_rows = [i for i in rag_rows if results[i] is None]
+    if not rag_rows:
+        return results
+    
+    prompts = []
+    for result, retrieved in pending:
+        with tracing.collect() as stages:
+            prompt, result["context"] = assemble_prompt(result["query"], retrieved, llm_mode, model_name)
+            prompts.append(prompt)
+        result["timings"].update(tracing.as_timings(stages))
+    
+    def finish(j, answer, seconds):
+        i, result = rag_rows[j], pending[j][0]
+        generated = set_answer(result, answer)
+        result["timings"]["generation_s"] = round(seconds, 4)
+        results[i] = result
+        if generated and answer_cache is not None:
+            answer_cache.put(config, queries[i], embeddings[j], result, file_map, retrieval_s[j], seconds)
+        if on_result:
+            on_result(i, result)
+    
+    if concurrency > 1:
+        generate_concurrent(prompts, llm_mode, model_name, concurrency, on_answer=finish)
+    else:
+        answers, gen_time = generate(prompts, llm_mode, model_name)
+        for j, answer in enumerate(answers):
+            # batched generation: per-query time is the batch time spread evenly
+            finish(j, answer, gen_time / len(rag_rows))
+    return results
+
+def write_json(path, obj):
+    with open(path, 'w') as f:
+        json.dump(obj, f, indent=2)
+
 def pretty_print(result):
     print(f"\n📌 Question: {result['query']}")
     print(f"✅ Answer: {result['answer']}\n")
@@ -233,48 +651,59 @@ def pretty_print(result):
 def main():
     print("🏦 Financial Q&A System with RAG + Agent Capabilities")
     print("=" * 60)
+    tracing.enable(bool(TRACE_FILE))
     
-    print("📊 Building index from 10-K filings...")
-    vs, file_map = build_index_from_all_filings("data")
+    print("📊 Loading index from 10-K filings...")
+    vs, file_map = load_or_build_index("data", INDEX_DIR)
     
     if vs is None:
         print("❌ Failed to build index. Please check your data files.")
         return
     
-    test_queries = [
-        "What was Microsoft's total revenue in 2023?",
-        "What was NVIDIA's total revenue in fiscal year 2024?",
-        "How did NVIDIA's data center revenue grow from 2022 to 2023?",
-        "How much did Microsoft's cloud revenue grow from 2022 to 2023?",
-        "Which company had the highest operating margin in 2023?",
-        "Which of the three companies had the highest gross margin in 2023?",
-        "What percentage of Google's revenue came from cloud in 2023?",
-        "What percentage of Google's 2023 revenue came from advertising?",
-        "Compare AI investments mentioned by all three companies in their 2024 10-Ks",
-        "Compare the R&D spending as a percentage of revenue across all three companies in 2023",
-        "What are the main AI risks mentioned by each company and how do they differ?"
-    ]
+    test_queries = TEST_QUERIES
+    answer_cache = open_answer_cache(INDEX_DIR) if ANSWER_CACHE else None
     
-    llm_mode = "hf"  
-    model_name = "facebook/bart-large-cnn"
+    llm_mode = LLM_MODE
+    model_name = LLM_MODEL
     
-    print(f"🤖 Using {llm_mode} with model {model_name}")
+    print(f"🤖 Using {llm_mode} with model {model_name} (concurrency {QUERY_CONCURRENCY})")
     print("=" * 60)
     
-    results = []
-    for i, query in enumerate(test_queries, 1):
+    # JSON files are written by a background thread as each query finishes
+    writer = ThreadPoolExecutor(max_workers=1)
+    def save_result(i, result):
+        writer.submit(write_json, f"query_{i + 1}_result.json", result)
+    
+    start = time.perf_counter()
+    results = run_queries(vs, file_map, test_queries, llm_mode=llm_mode, model_name=model_name,
+                          concurrency=QUERY_CONCURRENCY, on_result=save_result, answer_cache=answer_cache)
+    wall_time = time.perf_counter() - start
+    
+    for i, result in enumerate(results, 1):
         print(f"\n📝 Query {i}/{len(test_queries)}")
-        result = run_query(vs, file_map, query, llm_mode=llm_mode, model_name=model_name)
-        results.append(result)
         pretty_print(result)
-        
-        output_file = f"query_{i}_result.json"
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=2)
     
     print(f"\n💾 Saving all results to 'all_results.json'")
-    with open('all_results.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    writer.submit(write_json, 'all_results.json', results)
+    writer.shutdown(wait=True)
+    
+    load_time = load_times.get((llm_mode, model_name), 0.0)
+    gen_time = sum(r.get("timings", {}).get("generation_s", 0.0) for r in results)
+    print(f"\n⏱️  Model load: {load_time:.2f}s | Generation: {gen_time:.2f}s total, "
+          f"{gen_time / len(results):.2f}s per query")
+    print(f"⏱️  Query set wall time: {wall_time:.2f}s")
+    print(f"🧠 Query embedding cache: {query_cache_stats['hits']} hits, {query_cache_stats['misses']} misses")
+    if answer_cache is not None:
+        stats = answer_cache.metrics()
+        print(f"♻️  Answer cache: {stats['exact_hits']} exact + {stats['semantic_hits']} semantic hits, "
+              f"{stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['saved_s']:.2f}s saved, "
+              f"{stats['entries']} entries")
+        answer_cache.save()
+    
+    if TRACE_FILE:
+        n_events = tracing.export_trace(TRACE_FILE)
+        print(f"🧵 Wrote {n_events} spans to '{TRACE_FILE}'")
+        tracing.print_summary()
     
     print(f"\n✅ Completed processing {len(test_queries)} queries!")
     print("📁 Results saved in JSON format for further analysis.")
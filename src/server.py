@@ -0,0 +1,214 @@
+"""Local HTTP/JSON query service with the index and models kept warm.
+
+    python src/server.py [--port 8000] [--llm-mode hf|openai|stub]
+
+POST /query  {"query": "...", "filters": {"company": ..., "year": ...}, "retrieval_mode": "hybrid"}
+GET  /health
+GET  /metrics
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from main import (INDEX_DIR, LLM_MODE, DEFAULT_MODELS, RETRIEVAL_MODE, RETRIEVAL_MODES, FILTER_KEYS, TRACE_FILE,
+                  ANSWER_CACHE, load_or_build_index, open_answer_cache, run_query)
+from embeddings import embed_texts, enable_query_batching, query_cache_stats
+from generators import get_generator, load_times
+import tracing
+
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# Query embeddings from concurrent requests are coalesced up to this size / wait
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "64"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+LATENCY_WINDOW = 10000
+
+class QueryServer(ThreadingHTTPServer):
+    # the default backlog of 5 drops connections (1s SYN retries) under concurrent clients
+    request_queue_size = 128
+    daemon_threads = True
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.fact_answers = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds, result=None, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            # every query times its fact lookup, so only the result's flag marks a fact answer
+            if result is not None and result.get("fact"):
+                self.fact_answers += 1
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            snapshot = {
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "errors": self.errors,
+                "fact_answers": self.fact_answers,
+            }
+        if len(latencies):
+            snapshot["latency_ms"] = {f"p{p}": round(float(np.percentile(latencies, p)), 2) for p in (50, 95, 99)}
+        return snapshot
+
+def validate_payload(payload):
+    """Raise ValueError if a /query body is not a usable request."""
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    if not isinstance(payload.get("query"), str) or not payload["query"].strip():
+        raise ValueError("Request body needs a non-empty 'query' string")
+    filters = payload.get("filters")
+    if filters is not None:
+        if not isinstance(filters, dict):
+            raise ValueError("'filters' must be an object")
+        for key, val in filters.items():
+            if key not in FILTER_KEYS:
+                raise ValueError(f"Unknown filter '{key}'; use one of {', '.join(FILTER_KEYS)}")
+            if val is not None and not isinstance(val, str) and not (
+                    isinstance(val, list) and all(isinstance(v, str) for v in val)):
+                raise ValueError(f"Filter '{key}' must be a string or a list of strings")
+    mode = payload.get("retrieval_mode", RETRIEVAL_MODE)
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval_mode '{mode}'; use one of {', '.join(RETRIEVAL_MODES)}")
+
+class QueryService:
+    def __init__(self, vs, file_map, llm_mode, model_name, batcher, answer_cache=None):
+        self.vs = vs
+        self.file_map = file_map
+        self.llm_mode = llm_mode
+        self.model_name = model_name
+        self.batcher = batcher
+        self.answer_cache = answer_cache
+        self.metrics = Metrics()
+
+    def query(self, payload):
+        return run_query(self.vs, self.file_map, payload["query"], llm_mode=self.llm_mode,
+                         model_name=self.model_name, filters=payload.get("filters"),
+                         retrieval_mode=payload.get("retrieval_mode", RETRIEVAL_MODE),
+                         answer_cache=self.answer_cache)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "chunks": len(self.file_map),
+            "facts": len(self.file_map.facts),
+            "llm_mode": self.llm_mode,
+            "model": self.model_name,
+        }
+
+    def metrics_snapshot(self):
+        snapshot = self.metrics.snapshot()
+        stats = dict(self.batcher.stats)
+        stats["mean_batch"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        snapshot["embed_batching"] = stats
+        snapshot["query_cache"] = dict(query_cache_stats)
+        if self.answer_cache is not None:
+            snapshot["answer_cache"] = self.answer_cache.metrics()
+        snapshot["model_load_s"] = {f"{mode}:{name}": round(t, 3) for (mode, name), t in load_times.items()}
+        return snapshot
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, service.health())
+            elif self.path == "/metrics":
+                self._send(200, service.metrics_snapshot())
+            else:
+                self._send(404, {"error": f"Unknown path '{self.path}'"})
+
+        def do_POST(self):
+            if self.path != "/query":
+                self._send(404, {"error": f"Unknown path '{self.path}'"})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                validate_payload(payload)
+            except ValueError as e:
+                service.metrics.record(time.perf_counter() - start, error=True)
+                self._send(400, {"error": str(e)})
+                return
+            try:
+                result = service.query(payload)
+            except Exception as e:
+                service.metrics.record(time.perf_counter() - start, error=True)
+                self._send(500, {"error": str(e)})
+                return
+            if result.get("error"):
+                # the LLM backend failed; the error text is not an answer
+                service.metrics.record(time.perf_counter() - start, error=True)
+                self._send(502, {"error": result["answer"]})
+                return
+            service.metrics.record(time.perf_counter() - start, result)
+            self._send(200, result)
+
+        def log_message(self, format, *args):
+            pass  # one line per request drowns the console under load
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Local RAG query server")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--llm-mode", default=LLM_MODE, choices=sorted(DEFAULT_MODELS))
+    parser.add_argument("--model-name", default=None)
+    args = parser.parse_args()
+    model_name = args.model_name or os.getenv("LLM_MODEL") or DEFAULT_MODELS[args.llm_mode]
+    tracing.enable(bool(TRACE_FILE))
+
+    print("📊 Loading index from 10-K filings...")
+    vs, file_map = load_or_build_index(args.data_dir, args.index_dir)
+    if vs is None:
+        print("❌ Failed to build index. Please check your data files.")
+        return
+
+    # warm the encoder and the LLM backend before accepting requests
+    embed_texts(["warm up"])
+    get_generator(args.llm_mode, model_name)
+    batcher = enable_query_batching(EMBED_BATCH_MAX, EMBED_BATCH_WAIT_MS / 1000)
+
+    answer_cache = open_answer_cache(args.index_dir) if ANSWER_CACHE else None
+    service = QueryService(vs, file_map, args.llm_mode, model_name, batcher, answer_cache)
+    server = QueryServer((args.host, args.port), make_handler(service))
+    print(f"🚀 Serving on http://{args.host}:{args.port} ({args.llm_mode} / {model_name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if answer_cache is not None:
+            answer_cache.save()
+        if TRACE_FILE:
+            print(f"🧵 Wrote {tracing.export_trace(TRACE_FILE)} spans to '{TRACE_FILE}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import numpy as np
+
+MAX_EVENTS = 200_000
+PROFILE_DIR = "profiles"
+
+_lock = threading.Lock()
+_local = threading.local()
+_enabled = False
+_events = []
+counters = defaultdict(float)
+
+def enable(on=True):
+    """Record span events for export; span timings for collect() are always on."""
+    global _enabled
+    _enabled = on
+
+def enabled():
+    return _enabled
+
+@contextmanager
+def span(name, **attrs):
+    """Time a named pipeline stage. Yields attrs so the block can attach details (sizes, counts)."""
+    start_wall = time.time()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        seconds = time.perf_counter() - start
+        for timings in getattr(_local, "collectors", ()):
+            timings[name] = timings.get(name, 0.0) + seconds
+        if _enabled:
+            with _lock:
+                if len(_events) < MAX_EVENTS:
+                    _events.append({"name": name, "ts": start_wall, "dur": seconds, "pid": os.getpid(),
+                                    "tid": threading.get_ident(), "args": attrs})
+
+def count(name, n=1):
+    with _lock:
+        counters[name] += n
+
+@contextmanager
+def collect():
+    """Sum span seconds by name for spans closed on this thread inside the block."""
+    timings = {}
+    stack = _local.__dict__.setdefault("collectors", [])
+    stack.append(timings)
+    try:
+        yield timings
+    finally:
+        # by identity: list.remove() would match an outer collector with equal contents
+        del stack[next(i for i, t in enumerate(stack) if t is timings)]
+
+def as_timings(timings):
+    """{"embed": 0.01} -> {"embed_s": 0.01}, the key style used in query results."""
+    return {f"{name}_s": round(seconds, 6) for name, seconds in timings.items()}
+
+def drain():
+    """Remove and return (events, counters) recorded so far, e.g. to ship them out of a worker process."""
+    with _lock:
+        events, snapshot = list(_events), dict(counters)
+        _events.clear()
+        counters.clear()
+    return events, snapshot
+
+def merge(events, counter_values):
+    with _lock:
+        _events.extend(events[:max(0, MAX_EVENTS - len(_events))])
+        for name, n in counter_values.items():
+            counters[name] += n
+
+def summary():
+    """Per-span count, total and p50/p95 milliseconds over the recorded events."""
+    with _lock:
+        by_name = defaultdict(list)
+        for event in _events:
+            by_name[event["name"]].append(event["dur"])
+    stats = {}
+    for name, durations in sorted(by_name.items()):
+        ms = np.array(durations) * 1000
+        stats[name] = {"count": len(ms), "total_s": round(float(ms.sum()) / 1000, 4),
+                       "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                       "p95_ms": round(float(np.percentile(ms, 95)), 3)}
+    return stats
+
+def _jsonable(value):
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+def export_trace(path):
+    """Write recorded spans in Chrome trace-event format (chrome://tracing, Perfetto) plus counters and a summary."""
+    with _lock:
+        events = list(_events)
+        snapshot = dict(counters)
+    trace = {
+        "traceEvents": [{
+            "name": e["name"], "ph": "X", "ts": round(e["ts"] * 1e6), "dur": round(e["dur"] * 1e6, 1),
+            "pid": e["pid"], "tid": e["tid"], "args": {k: _jsonable(v) for k, v in e["args"].items()},
+        } for e in events],
+        "displayTimeUnit": "ms",
+        "otherData": {"counters": snapshot, "summary": summary()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace, f)
+    return len(events)
+
+def print_summary():
+    for name, s in summary().items():
+        print(f"   {name:<18} {s['count']:>6}x  total {s['total_s']:>8.3f}s  "
+              f"p50 {s['p50_ms']:>8.2f}ms  p95 {s['p95_ms']:>8.2f}ms")
+    for name, n in sorted(counters.items()):
+        print(f"   {name:<18} {n:,.0f}")
+
+@contextmanager
+def _profile(name, out_dir, top):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tracemalloc.start(10)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(out_dir / f"{name}.prof")
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        report.write(f"\ntracemalloc: peak {peak / 2**20:.1f} MiB, still allocated {current / 2**20:.1f} MiB\n")
+        report.write(f"Top {top} allocation sites:\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            report.write(f"  {stat}\n")
+        with open(out_dir / f"{name}_profile.txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        print(f"🔬 Profile of '{name}': peak Python memory {peak / 2**20:.1f} MiB, "
+              f"details in {out_dir / f'{name}_profile.txt'} and {out_dir / f'{name}.prof'}")
+
+def profile(name, enabled=True, out_dir=PROFILE_DIR, top=25):
+    """Opt-in cProfile + tracemalloc around a block (main process only); a no-op when not enabled."""
+    return _profile(name, out_dir, top) if enabled else nullcontext()
@@ -1,19 +1,243 @@
+import json
+import os
+from pathlib import Path
+
 import faiss
 import numpy as np
 
+INDEX_FILE = "index.faiss"
+STATE_FILE = "vectorstore.json"
+VECTORS_FILE = "vectors.npy"
+
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+COMPRESSIONS = ("none", "fp16", "int8", "pq")
+SQ_TYPES = {"fp16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+PQ_NBITS = 8
+
 class VectorStore:
-    def __init__(self, dim):
-        self.index = faiss.IndexFlatL2(dim)
-        self.texts = []
-
-    def add(self, embeddings, texts):
-        self.index.add(np.array(embeddings).astype('float32'))
-        self.texts.extend(texts)
-
-    def search(self, query_emb, k=3):
-        D, I = self.index.search(np.array([query_emb]).astype('float32'), k)
-        results = []
-        for idx in I[0]:
-            if idx < len(self.texts):
-                results.append(self.texts[idx])
+    """FAISS inner-product index over L2-normalized vectors (scores are cosine similarity).
+
+    index_type is "flat" (exact), "hnsw" (graph, tuned by ef_search) or "ivf"
+    (clustered, trained on the first add, tuned by nprobe). Build parameters:
+    hnsw_m for HNSW, nlist for IVF.
+
+    compression stores the vectors in the index as "fp16" or "int8" scalar
+    codes or "pq" product codes (pq_m bytes per vector) instead of float32.
+    Compressed searches fetch rerank * k candidates and re-score them exactly
+    against the float32 vectors, which are kept in vectors.npy and
+    memory-mapped on load so only the shortlisted rows are paged in. A store
+    that is being built holds those float32 vectors in memory as well, so
+    compression only saves memory once the index is saved and loaded again.
+    """
+
+    def __init__(self, dim, index_type="flat", hnsw_m=32, nlist=256, ef_search=64, nprobe=8,
+                 compression="none", pq_m=48, rerank=4):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        if compression == "pq" and dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+        self.dim = dim
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.nlist = nlist
+        self.compression = compression
+        self.pq_m = pq_m
+        self.pq_nbits = PQ_NBITS
+        self.ef_search = ef_search
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.next_id = 0
+        # exact copies for re-ranking, one row per chunk id (grown geometrically, rows past next_id unused)
+        self.vectors = np.zeros((0, dim), dtype='float32') if compression != "none" else None
+        # IDMap2 lets chunks be addressed (and removed) by a stable id
+        self.index = faiss.IndexIDMap2(self._make_index(nlist))
+
+    def _make_index(self, nlist):
+        ip = faiss.METRIC_INNER_PRODUCT
+        sq_type = SQ_TYPES.get(self.compression)
+        pq = self.compression == "pq"
+        if self.index_type == "hnsw":
+            if sq_type is not None:
+                index = faiss.IndexHNSWSQ(self.dim, sq_type, self.hnsw_m, ip)
+            elif pq:
+                index = faiss.IndexHNSWPQ(self.dim, self.pq_m, self.hnsw_m, self.pq_nbits, ip)
+            else:
+                index = faiss.IndexHNSWFlat(self.dim, self.hnsw_m, ip)
+        elif self.index_type == "ivf":
+            quantizer = faiss.IndexFlatIP(self.dim)
+            if sq_type is not None:
+                index = faiss.IndexIVFScalarQuantizer(quantizer, self.dim, nlist, sq_type, ip)
+            elif pq:
+                index = faiss.IndexIVFPQ(quantizer, self.dim, nlist, self.pq_m, self.pq_nbits, ip)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, ip)
+        elif sq_type is not None:
+            index = faiss.IndexScalarQuantizer(self.dim, sq_type, ip)
+        elif pq:
+            # an IVF with a single list scans every code like IndexPQ, but accepts ID selectors
+            index = faiss.IndexIVFPQ(faiss.IndexFlatIP(self.dim), self.dim, 1, self.pq_m, self.pq_nbits, ip)
+        else:
+            index = faiss.IndexFlatIP(self.dim)
+        if pq:
+            # a filing set gives far fewer than the 39 points per centroid k-means asks for; train anyway
+            product_quantizer = index.pq if hasattr(index, "pq") else faiss.downcast_index(index.storage).pq
+            product_quantizer.cp.min_points_per_centroid = 1
+        return index
+
+    @property
+    def supports_remove(self):
+        # HNSW graphs cannot drop vectors; callers rebuild instead
+        return self.index_type != "hnsw"
+
+    @staticmethod
+    def _normalize(embeddings):
+        x = np.array(embeddings, dtype='float32', copy=True)
+        if x.ndim == 1:
+            x = x[None, :]
+        faiss.normalize_L2(x)
+        return x
+
+    def config(self):
+        return {"index_type": self.index_type, "hnsw_m": self.hnsw_m, "nlist": self.nlist,
+                "compression": self.compression, "pq_m": self.pq_m}
+
+    @property
+    def reranks(self):
+        return self.vectors is not None and self.rerank > 0
+
+    def set_search_params(self, ef_search=None, nprobe=None, rerank=None):
+        if ef_search is not None:
+            self.ef_search = ef_search
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if rerank is not None:
+            self.rerank = rerank
+
+    def _search_params(self, sel=None):
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=sel, efSearch=self.ef_search)
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(sel=sel, nprobe=self.nprobe)
+        if self.compression == "pq":
+            return faiss.SearchParametersIVF(sel=sel, nprobe=1)
+        return faiss.SearchParameters(sel=sel) if sel is not None else None
+
+    def add(self, embeddings, ids=None):
+        embeddings = self._normalize(embeddings)
+        if ids is None:
+            ids = range(self.next_id, self.next_id + len(embeddings))
+        ids = np.array(list(ids), dtype='int64')
+        if len(ids) == 0:
+            return []
+        if not self.index.is_trained:
+            # IVF needs at least one training point per list, PQ one per centroid
+            nlist = min(self.nlist, len(embeddings))
+            nbits = max(1, min(PQ_NBITS, int(np.log2(len(embeddings)))))
+            if nlist != self.nlist or (self.compression == "pq" and nbits != self.pq_nbits):
+                self.pq_nbits = nbits
+                self.index = faiss.IndexIDMap2(self._make_index(nlist))
+            train = embeddings
+            if self.compression == "pq" and len(train) < 2 ** nbits:
+                # k-means needs a point per centroid; a single vector is repeated
+                train = np.repeat(train, 2 ** nbits, axis=0)
+            self.index.train(train)
+        self.index.add_with_ids(embeddings, ids)
+        self.next_id = max(self.next_id, int(ids.max()) + 1)
+        if self.vectors is not None:
+            if len(self.vectors) < self.next_id:
+                # double the capacity so a build of many small batches copies each row O(1) times
+                size = max(self.next_id, 2 * len(self.vectors))
+                grow = np.zeros((size - len(self.vectors), self.dim), dtype='float32')
+                self.vectors = np.concatenate([self.vectors, grow])
+            self.vectors[ids] = embeddings
+        return ids.tolist()
+
+    def remove(self, ids):
+        ids = np.array(list(ids), dtype='int64')
+        if len(ids) == 0:
+            return 0
+        return self.index.remove_ids(ids)
+
+    def search(self, query_emb, k=3, allowed=None):
+        """Return [(chunk_id, score), ...] for the k most similar chunks.
+
+        allowed is an optional boolean mask over chunk ids; only those chunks are scanned.
+        """
+        return self.search_batch([query_emb], k, [allowed])[0]
+
+    def search_batch(self, query_embs, k=3, allowed=None):
+        """search() for a matrix of queries; allowed is None or one mask (or None) per query.
+
+        Queries sharing the same mask go to FAISS in a single search call.
+        """
+        queries = self._normalize(query_embs)
+        if allowed is None:
+            allowed = [None] * len(queries)
+        
+        groups = {}
+        for i, mask in enumerate(allowed):
+            key = None if mask is None else np.packbits(np.asarray(mask, dtype=bool), bitorder='little').tobytes()
+            groups.setdefault(key, []).append(i)
+        
+        n_candidates = k * self.rerank if self.reranks else k
+        results = [None] * len(queries)
+        for key, rows in groups.items():
+            sel = bitmap = None
+            if key is not None:
+                bitmap = np.frombuffer(key, dtype='uint8')
+                sel = faiss.IDSelectorBitmap(len(allowed[rows[0]]), faiss.swig_ptr(bitmap))
+            D, I = self.index.search(queries[rows], n_candidates, params=self._search_params(sel))
+            for row, ids, scores in zip(rows, I, D):
+                hits = ids != -1
+                ids, scores = ids[hits], scores[hits]
+                if self.reranks and len(ids):
+                    scores = self.vectors[ids] @ queries[row]
+                    order = np.argsort(-scores, kind='stable')[:k]
+                    ids, scores = ids[order], scores[order]
+                results[row] = [(int(idx), float(score)) for idx, score in zip(ids, scores)]
         return results
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        # write aside and swap in: readers (server, ask.py) may have the old files memory-mapped
+        tmp_path = path / (INDEX_FILE + ".tmp")
+        faiss.write_index(self.index, str(tmp_path))
+        os.replace(tmp_path, path / INDEX_FILE)
+        if self.vectors is not None:
+            tmp_path = path / (VECTORS_FILE + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(self.vectors[:self.next_id]))
+            os.replace(tmp_path, path / VECTORS_FILE)
+        with open(path / STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"next_id": self.next_id, "dim": self.dim, **self.config()}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True, ef_search=64, nprobe=8, rerank=4):
+        path = Path(path)
+        flags = 0
+        if mmap:
+            # IO_FLAG_MMAP_IFC maps flat codes straight from disk (faiss >= 1.8);
+            # a mapped index is read-only, so load with mmap=False to update it
+            flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        with open(path / STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        vs = cls.__new__(cls)
+        vs.dim = state["dim"]
+        vs.index_type = state["index_type"]
+        vs.hnsw_m = state["hnsw_m"]
+        vs.nlist = state["nlist"]
+        vs.compression = state.get("compression", "none")
+        vs.pq_m = state.get("pq_m", 48)
+        vs.pq_nbits = PQ_NBITS
+        vs.ef_search = ef_search
+        vs.nprobe = nprobe
+        vs.rerank = rerank
+        vs.next_id = state["next_id"]
+        vs.index = faiss.read_index(str(path / INDEX_FILE), flags)
+        vs.vectors = None
+        if vs.compression != "none":
+            vs.vectors = np.load(path / VECTORS_FILE, mmap_mode="r" if mmap else None)
+        return vs
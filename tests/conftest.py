@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+@pytest.fixture
+def fake_edgar():
+    """Stand-in EDGAR server (benchmarks/fake_edgar.py) on a free localhost port."""
+    from fake_edgar import start_fake_edgar
+    server = start_fake_edgar(doc_size=2_000, n_companies=3)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,63 @@
+import numpy as np
+
+import main
+from answer_cache import AnswerCache, config_key
+from chunkstore import ChunkStore
+from vectorstore import VectorStore
+
+CONFIG = config_key("stub", "stub")
+
+def store(n=5, version="v1"):
+    file_map = ChunkStore()
+    file_map.add(range(n), [{"company": "NVIDIA", "year": "2024", "section": "MD&A", "filename": "NVDA_2024.html",
+                             "chunk_id": i, "text": f"NVIDIA data center revenue detail {i}"} for i in range(n)])
+    file_map.version = version
+    return file_map
+
+def result(query, chunk_ids):
+    return {"query": query, "answer": "Data center revenue grew.", "chunk_ids": list(chunk_ids)}
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache, file_map = AnswerCache(), store()
+    cache.put(CONFIG, "How did data center revenue grow?", None, result("q", [0, 1]), file_map, 0.2, 1.0)
+    hit = cache.get_exact(CONFIG, "how did data center revenue grow", file_map)
+    assert hit["answer"] == "Data center revenue grew."
+    assert hit["cache"] == "exact"
+    assert cache.get_exact(config_key("hf", "bart"), "How did data center revenue grow?", file_map) is None
+
+def test_semantic_hit_on_a_close_embedding():
+    cache, file_map = AnswerCache(threshold=0.95), store()
+    cache.put(CONFIG, "How did data center revenue grow?", [1.0, 0.0, 0.0], result("q", [0, 1, 2]), file_map, 0.2, 1.0)
+    hit = cache.get_semantic(CONFIG, [0.99, 0.05, 0.0], [0, 1, 2], file_map)
+    assert hit["cache"] == "semantic"
+    assert cache.get_semantic(CONFIG, [0.0, 1.0, 0.0], [0, 1, 2], file_map) is None
+
+def test_index_version_change_invalidates():
+    cache, file_map = AnswerCache(), store()
+    cache.put(CONFIG, "q", [1.0, 0.0], result("q", [0]), file_map, 0.2, 1.0)
+    file_map.version = "v2"
+    assert cache.get_exact(CONFIG, "q", file_map) is None
+    assert cache.get_semantic(CONFIG, [1.0, 0.0], [0], file_map) is None
+    assert cache.metrics()["invalidated"] == 1
+
+def test_semantic_miss_when_retrieved_chunks_differ():
+    cache, file_map = AnswerCache(min_overlap=0.8), store()
+    cache.put(CONFIG, "q", [1.0, 0.0], result("q", [0, 1, 2]), file_map, 0.2, 1.0)
+    assert cache.get_semantic(CONFIG, [1.0, 0.0], [2, 3, 4], file_map) is None
+
+def test_failed_generation_is_not_cached(monkeypatch):
+    monkeypatch.setattr(main, "embed_queries", lambda queries: np.ones((len(queries), 4), dtype='float32'))
+    monkeypatch.setenv("STUB_LLM_DELAY_MS", "0")
+    cache, file_map = AnswerCache(), store()
+    vs = VectorStore(4)
+    query = "How did NVIDIA data center revenue grow?"
+
+    failed = main.run_query(vs, file_map, query, llm_mode="unknown", model_name="none",
+                            retrieval_mode="lexical", use_facts=False, answer_cache=cache)
+    assert failed["error"]
+    assert len(cache.entries) == 0
+
+    answered = main.run_query(vs, file_map, query, llm_mode="stub", model_name="stub",
+                              retrieval_mode="lexical", use_facts=False, answer_cache=cache)
+    assert "error" not in answered
+    assert len(cache.entries) == 1
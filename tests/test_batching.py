@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batching import MicroBatcher
+
+def run_concurrently(batcher, requests):
+    results, errors = [None] * len(requests), [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = batcher.submit(requests[i])
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+def test_concurrent_submits_share_one_batch():
+    calls = []
+    def embed(items):
+        calls.append(list(items))
+        return np.array([[float(item)] for item in items])
+
+    # a long wait with max_batch equal to the total makes the batch flush once it is full
+    batcher = MicroBatcher(embed, max_batch=10, max_wait=2.0)
+    requests = [[1, 2], [3], [4, 5, 6], [7, 8, 9, 10]]
+    results, errors = run_concurrently(batcher, requests)
+    batcher.close()
+
+    assert errors == [None] * 4
+    assert len(calls) == 1 and sorted(calls[0]) == list(range(1, 11))
+    for items, rows in zip(requests, results):
+        assert rows[:, 0].tolist() == items
+    assert batcher.stats["batches"] == 1
+    assert batcher.stats["requests"] == 4
+
+def test_errors_reach_every_caller_in_the_batch():
+    def embed(items):
+        if "bad" in items:
+            raise RuntimeError("encoder failed")
+        return [len(item) for item in items]
+
+    batcher = MicroBatcher(embed, max_batch=3, max_wait=2.0)
+    results, errors = run_concurrently(batcher, [["a"], ["bad"], ["ccc"]])
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    # the worker keeps serving after a failed batch
+    batcher.max_wait = 0.01
+    assert batcher.submit(["dd"]) == [2]
+    batcher.close()
+
+def test_empty_submit_returns_immediately():
+    batcher = MicroBatcher(lambda items: pytest.fail("fn called"), max_wait=0.01)
+    assert batcher.submit([]) == []
+    batcher.close()
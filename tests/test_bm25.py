@@ -0,0 +1,34 @@
+import numpy as np
+
+from bm25 import BM25Index, reciprocal_rank_fusion
+
+def test_search_sees_documents_added_after_a_merge():
+    index = BM25Index()
+    index.add([0, 1], ["data center revenue grew", "gaming revenue declined"])
+    assert [i for i, _ in index.search("data center", 5)] == [0]
+    index.add([2], ["data center demand for accelerated computing"])
+    assert sorted(i for i, _ in index.search("data center", 5)) == [0, 2]
+
+def test_removed_documents_are_merged_out():
+    index = BM25Index()
+    index.add([0, 1, 2], ["cloud revenue", "cloud margin", "advertising revenue"])
+    index.remove([0])
+    assert sorted(i for i, _ in index.search("cloud revenue", 5)) == [1, 2]
+    index.add([3], ["cloud revenue again"])
+    assert 0 not in [i for i, _ in index.search("cloud revenue", 5)]
+
+def test_allowed_mask_restricts_results():
+    index = BM25Index()
+    index.add([0, 1], ["cloud revenue", "cloud revenue"])
+    allowed = np.array([False, True])
+    assert [i for i, _ in index.search("cloud", 5, allowed)] == [1]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index()
+    index.add([0, 1], ["operating income", "net income"])
+    index.save(tmp_path)
+    assert BM25Index.load(tmp_path).search("operating", 5) == index.search("operating", 5)
+
+def test_reciprocal_rank_fusion_favours_agreement():
+    fused = reciprocal_rank_fusion([[(1, 0.9), (2, 0.8)], [(2, 5.0), (3, 4.0)]])
+    assert fused[0][0] == 2
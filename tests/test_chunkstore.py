@@ -0,0 +1,52 @@
+from chunkstore import ChunkStore
+
+def meta(company, year, text, position=0):
+    return {"company": company, "year": year, "section": "Risk Factors", "cik": None,
+            "filename": f"{company}_{year}.html", "chunk_id": position, "text": text}
+
+def store_with_shared_chunk():
+    """Chunk 0 is stored from NVDA 2023 and also occurs in NVDA 2024; chunk 1 only in NVDA 2023."""
+    store = ChunkStore()
+    store.add([0, 1], [meta("NVDA", "2023", "shared supply chain risk", 0),
+                       meta("NVDA", "2023", "gaming demand fell", 1)])
+    store.add_duplicates([0], [meta("NVDA", "2024", "shared supply chain risk", 5)])
+    return store
+
+def test_mask_matches_through_duplicate_occurrences():
+    store = store_with_shared_chunk()
+    assert store.mask(year="2024").nonzero()[0].tolist() == [0]
+    assert store.occurrences(0) == [("NVDA", "2023"), ("NVDA", "2024")]
+
+def test_remove_filings_promotes_the_remaining_occurrence():
+    store = store_with_shared_chunk()
+    stale = store.remove_filings(["NVDA_2023.html"])
+
+    assert stale == [1]
+    assert 0 in store and 1 not in store
+    assert store.value("year", 0) == "2024"
+    assert store.value("filename", 0) == "NVDA_2024.html"
+    assert store.get(0)["chunk_id"] == 5
+    assert store.occurrences(0) == [("NVDA", "2024")]
+    assert store.ids_by_position("NVDA_2024.html") == {5: 0}
+    assert [i for i, _ in store.bm25.search("gaming demand", 5)] == []
+
+def test_remove_filings_drops_duplicate_occurrences_only():
+    store = store_with_shared_chunk()
+    assert store.remove_filings(["NVDA_2024.html"]) == []
+    assert store.value("year", 0) == "2023"
+    assert store.occurrences(0) == [("NVDA", "2023")]
+    assert not store.mask(year="2024").any()
+
+def test_save_swaps_files_under_a_mapped_reader(tmp_path):
+    store = ChunkStore()
+    store.add([0], [meta("NVDA", "2023", "first version")])
+    store.save(tmp_path)
+    reader = ChunkStore.load(tmp_path)
+
+    store = ChunkStore()
+    store.add([0, 1], [meta("NVDA", "2024", "second version"), meta("NVDA", "2024", "more", 1)])
+    store.save(tmp_path)
+
+    assert reader.text(0) == "first version"
+    assert ChunkStore.load(tmp_path).text(1) == "more"
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,34 @@
+from context import TokenCounter, pack_context
+
+COUNTER = TokenCounter("stub", "stub")  # CHARS_PER_TOKEN estimate
+
+def chunk(company, year, topic, n=40):
+    return " ".join(f"{company} {year} {topic} detail{i}" for i in range(n))
+
+def test_packed_context_stays_within_budget():
+    retrieved = [[chunk("NVIDIA", 2024, f"topic{t}") for t in range(6)]]
+    texts, stats = pack_context(retrieved, COUNTER, budget=400)
+    assert texts
+    assert sum(COUNTER.count(t) for t in texts) == stats["tokens"] <= 400
+    assert stats["chunks"] < 6
+
+def test_near_duplicates_are_dropped():
+    original = chunk("NVIDIA", 2024, "supply")
+    near_copy = original.replace("detail39", "item39")
+    other = chunk("NVIDIA", 2024, "gaming")
+    texts, stats = pack_context([[original, near_copy, other]], COUNTER, budget=10_000)
+    assert texts == [original, other]
+    assert stats["unique"] == 3
+
+def test_every_sub_query_keeps_a_chunk():
+    # one sub-query per company/year; the first has many strong hits that would fill the budget alone
+    retrieved = [
+        [chunk("Microsoft", 2023, f"cloud{t}") for t in range(8)],
+        [chunk("Google", 2023, "cloud")],
+        [chunk("NVIDIA", 2023, "cloud")],
+    ]
+    budget = 3 * COUNTER.count(retrieved[0][0])
+    texts, stats = pack_context(retrieved, COUNTER, budget)
+    assert stats["sub_queries_covered"] == 3
+    for company in ("Microsoft", "Google", "NVIDIA"):
+        assert any(t.startswith(company) for t in texts)
@@ -0,0 +1,47 @@
+from dedup import NearDuplicateIndex
+
+BOILERPLATE = (
+    "Our operations could be disrupted by natural disasters, pandemics, geopolitical conflict, power "
+    "outages, cyberattacks or other events beyond our control. Any such event could damage our data "
+    "centers, interrupt our supply chain, delay shipments to customers and harm our reputation. We "
+    "maintain business continuity plans, but they may not be sufficient to prevent a material adverse "
+    "effect on our business, results of operations and financial condition. Insurance may not cover "
+    "all losses, and a significant portion of our manufacturing is concentrated in a few locations."
+)
+
+def test_exact_duplicate_maps_to_first_occurrence():
+    index = NearDuplicateIndex(0.8)
+    keep, canonical = index.split([BOILERPLATE, "Something else entirely about revenue growth.", BOILERPLATE], 10)
+    assert keep == [0, 1]
+    assert canonical == [-1, -1, 10]
+
+def test_near_duplicate_matches_a_stored_chunk():
+    index = NearDuplicateIndex(0.8)
+    index.split([BOILERPLATE], 0)
+    edited = BOILERPLATE.replace("pandemics", "epidemics")
+    keep, canonical = index.split([edited], 1)
+    assert keep == []
+    assert canonical == [0]
+
+def test_different_figures_are_never_merged():
+    index = NearDuplicateIndex(0.8)
+    index.split([BOILERPLATE + " Revenue was $60,922 million."], 0)
+    keep, canonical = index.split([BOILERPLATE + " Revenue was $26,974 million."], 1)
+    assert keep == [0]
+    assert canonical == [-1]
+
+def test_removed_chunk_is_no_longer_matched():
+    index = NearDuplicateIndex(0.8)
+    index.split([BOILERPLATE], 0)
+    index.remove([0])
+    keep, canonical = index.split([BOILERPLATE], 1)
+    assert keep == [0]
+    assert canonical == [-1]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = NearDuplicateIndex(0.9)
+    index.split([BOILERPLATE], 0)
+    index.save(tmp_path)
+    loaded = NearDuplicateIndex.load(tmp_path)
+    assert loaded.threshold == 0.9
+    assert loaded.split([BOILERPLATE], 1) == ([], [0])
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from downloader import Fetcher, TokenBucket
+
+DOC_PATH = "/Archives/edgar/data/1000/0000001000230000001/doc0000001000230000001.htm"
+
+def test_token_bucket_caps_the_rate_across_threads():
+    bucket = TokenBucket(rate=50)
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(10)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 40 acquisitions at 50/s: the first is free, the other 39 wait their turn
+    assert time.monotonic() - start >= 39 / 50 - 0.05
+
+def test_fetcher_requests_stay_under_the_rate(fake_edgar):
+    fetcher = Fetcher(fake_edgar.base_url, rate=20, workers=4)
+    threads = [threading.Thread(target=lambda: [fetcher.fetch_page(fetcher.url(DOC_PATH)) for _ in range(5)])
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    times = sorted(fake_edgar.request_times)
+    assert len(times) == 20
+    assert times[-1] - times[0] >= 19 / 20 - 0.1
+
+def test_unchanged_file_is_revalidated_with_304(fake_edgar, tmp_path):
+    fetcher = Fetcher(fake_edgar.base_url, rate=100, cache_dir=tmp_path / "cache")
+    path = tmp_path / "T000_2023.html"
+    assert fetcher.fetch_to_file(fetcher.url(DOC_PATH), path, as_text=True)
+    first = path.read_bytes()
+
+    # validators survive a restart through cache_dir
+    fetcher = Fetcher(fake_edgar.base_url, rate=100, cache_dir=tmp_path / "cache")
+    assert not fetcher.fetch_to_file(fetcher.url(DOC_PATH), path, as_text=True)
+    assert fake_edgar.counts["not_modified"] == 1
+    assert fetcher.stats["not_modified"] == 1
+    assert path.read_bytes() == first
+
+def test_failed_download_leaves_the_existing_file(fake_edgar, tmp_path):
+    path = tmp_path / "T000_2023.html"
+    path.write_text("previous download")
+    fake_edgar.fail_rate = 1.0
+    fetcher = Fetcher(fake_edgar.base_url, rate=100, max_retries=0)
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetcher.fetch_to_file(fetcher.url(DOC_PATH), path)
+    assert path.read_text() == "previous download"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["T000_2023.html"]
+
+def test_download_replaces_the_file_without_leftovers(fake_edgar, tmp_path):
+    path = tmp_path / "T000_2023.html"
+    path.write_text("stale")
+    fetcher = Fetcher(fake_edgar.base_url, rate=100)
+    assert fetcher.fetch_to_file(fetcher.url(DOC_PATH), path, as_text=True)
+    assert path.read_text().startswith("<html>")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["T000_2023.html"]
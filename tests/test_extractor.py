@@ -0,0 +1,21 @@
+from extractor import iter_text_blocks_html
+
+def blocks(tmp_path, html):
+    path = tmp_path / "filing.html"
+    path.write_text(html, encoding="utf-8")
+    return list(iter_text_blocks_html(path))
+
+def test_void_and_break_tags_separate_words(tmp_path):
+    html = "<html><body><p>After<img src='logo.png'>tail and<input type='checkbox'>more</p><p>Line one<br>Line two</p></body></html>"
+    assert blocks(tmp_path, html) == ["After tail and more", "Line one", "Line two"]
+
+def test_cells_rows_and_hidden_text(tmp_path):
+    html = ("<html><head><title>x</title></head><body><table><tr><td>Revenue</td><td>$60,922</td></tr></table>"
+            "<div style='display: none'>hidden</div><ix:header>facts</ix:header><p>Visible</p></body></html>")
+    assert blocks(tmp_path, html) == ["Revenue $60,922", "Visible"]
+
+def test_blocks_split_across_read_chunks(tmp_path):
+    html = "<html><body>" + "".join(f"<p>Paragraph {i} text</p>" for i in range(200)) + "</body></html>"
+    path = tmp_path / "filing.html"
+    path.write_text(html, encoding="utf-8")
+    assert list(iter_text_blocks_html(path, read_size=64)) == [f"Paragraph {i} text" for i in range(200)]
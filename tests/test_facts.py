@@ -0,0 +1,76 @@
+from facts import FactStore, answer_from_facts, extract_table_facts
+
+INCOME_STATEMENT = [
+    ["(In millions, except per share data)"],
+    ["Jan 28, 2024", "Jan 29, 2023", "Jan 30, 2022"],
+    ["Revenue", "60,922", "26,974", "26,914"],
+    ["Cost of revenue", "16,621", "11,618", "9,439"],
+    ["Operating expenses"],
+    ["Research and development", "8,675", "7,339", "5,268"],
+    ["Operating income", "32,972", "4,224", "10,041"],
+    ["Other income (expense)", "(50)", "—", "107"],
+    ["Net income", "29,760", "4,368", "9,752"],
+]
+
+def by_key(facts):
+    return {(metric, year): value for metric, year, value, _, _ in facts}
+
+def test_extract_statement_rows_in_dollars():
+    facts = by_key(extract_table_facts(INCOME_STATEMENT))
+    assert facts[("total_revenue", 2024)] == 60_922e6
+    assert facts[("research_and_development", 2023)] == 7_339e6
+    assert facts[("operating_income", 2022)] == 10_041e6
+    assert facts[("net_income", 2024)] == 29_760e6
+
+def test_negative_and_dash_cells():
+    rows = [["Jan 28, 2024", "Jan 29, 2023"], ["Revenue", "100", "90"], ["Net income", "(5)", "—"]]
+    facts = by_key(extract_table_facts(rows))
+    assert facts[("net_income", 2024)] == -5e6
+    assert facts[("net_income", 2023)] == 0.0
+
+def test_skips_percentage_and_revenue_less_tables():
+    percent = [["2024", "2023"], ["Revenue", "100%", "100%"], ["Net income", "49%", "16%"]]
+    assert extract_table_facts(percent) == []
+    compensation = [["2024", "2023"], ["Research and development", "2,532", "1,590"]]
+    assert extract_table_facts(compensation) == []
+
+def test_segment_rows_outside_revenue_context_are_ignored():
+    rows = [["2024", "2023"], ["Revenue by segment"], ["Data Center", "47,525", "15,005"],
+            ["Operating income by segment"], ["Data Center", "32,016", "5,083"], ["Revenue", "60,922", "26,974"]]
+    facts = by_key(extract_table_facts(rows))
+    assert facts[("data_center_revenue", 2024)] == 47_525e6
+
+def fact(company, year, metric, value, filename=None):
+    return {"company": company, "fiscal_year": year, "metric": metric, "value": value, "label": metric,
+            "raw": str(value), "filename": filename or f"{company}_{year}.html", "filing_year": year,
+            "chunk_position": None, "chunk_id": None}
+
+def test_percentage_of_revenue_question_is_a_ratio():
+    store = FactStore()
+    store.add([fact("Google", "2023", "research_and_development", 45.43e9),
+               fact("Google", "2023", "total_revenue", 307.39e9)])
+    hit = answer_from_facts("Google's R&D spending as a percentage of revenue in 2023", store)
+    assert hit["answer"] == "Google's R&D as a percentage of revenue in fiscal 2023 was 14.8%."
+
+def test_all_companies_come_from_the_fact_table():
+    store = FactStore()
+    store.add([fact("Google", "2023", "total_revenue", 307.39e9),
+               fact("Apple Inc.", "2023", "total_revenue", 383.29e9)])
+    hit = answer_from_facts("Which company had the highest revenue in 2023?", store)
+    assert hit["answer"].startswith("Apple Inc. had the highest total revenue in fiscal 2023")
+
+def test_comparison_with_a_missing_fact_falls_back():
+    store = FactStore()
+    store.add([fact("Google", "2023", "total_revenue", 307.39e9),
+               fact("Apple Inc.", "2023", "total_revenue", 383.29e9),
+               fact("Microsoft", "2022", "total_revenue", 198.27e9)])
+    assert answer_from_facts("Which company had the highest revenue in 2023?", store) is None
+
+def test_newer_filing_wins_until_it_is_removed():
+    store = FactStore()
+    store.add([fact("NVIDIA", "2023", "total_revenue", 26.97e9, "NVDA_2023.html")])
+    restated = dict(fact("NVIDIA", "2023", "total_revenue", 27.0e9, "NVDA_2024.html"), filing_year="2024")
+    store.add([restated])
+    assert store.get("NVIDIA", "2023", "total_revenue")["value"] == 27.0e9
+    store.remove_filings(["NVDA_2024.html"])
+    assert store.get("NVIDIA", "2023", "total_revenue")["value"] == 26.97e9
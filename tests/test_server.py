@@ -0,0 +1,25 @@
+from chunkstore import ChunkStore
+from main import fact_result
+from server import Metrics
+
+def fact(company, year, metric, value):
+    return {"company": company, "fiscal_year": year, "metric": metric, "value": value, "label": metric,
+            "raw": str(value), "filename": f"{company}_{year}.html", "filing_year": year,
+            "chunk_position": None, "chunk_id": None}
+
+def test_metrics_count_only_fact_answers():
+    store = ChunkStore()
+    store.facts.add([fact("NVIDIA", "2024", "total_revenue", 60.9e9)])
+    metrics = Metrics()
+
+    hit = fact_result(store, "What was NVIDIA's total revenue in fiscal year 2024?")
+    assert hit is not None
+    metrics.record(0.01, hit)
+    # RAG answers time their (missed) fact lookup too
+    metrics.record(0.5, {"answer": "...", "timings": {"fact_lookup_s": 0.0001, "generation_s": 0.4}})
+    metrics.record(0.01, error=True)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["errors"] == 1
+    assert snapshot["fact_answers"] == 1
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from vectorstore import COMPRESSIONS, INDEX_TYPES, VectorStore
+
+DIM = 16
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype('float32')
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_filtered_search(index_type, compression):
+    x = vectors(300)
+    vs = VectorStore(DIM, index_type, nlist=4, nprobe=4, compression=compression, pq_m=4)
+    vs.add(x)
+    allowed = np.arange(300) % 2 == 0
+
+    hits = vs.search_batch(x[[10, 11]], k=5, allowed=[allowed, None])
+    assert len(hits[0]) == 5
+    assert all(allowed[chunk_id] for chunk_id, _ in hits[0])
+    assert 10 in [chunk_id for chunk_id, _ in hits[0]]
+    assert 11 in [chunk_id for chunk_id, _ in hits[1]]
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_pq_trains_on_a_single_vector(index_type):
+    vs = VectorStore(DIM, index_type, nlist=4, compression="pq", pq_m=4)
+    assert vs.add(vectors(1)) == [0]
+    assert vs.search(vectors(1)[0], k=1)[0][0] == 0
+
+def test_compressed_store_grows_and_saves_only_used_rows(tmp_path):
+    x = vectors(40)
+    vs = VectorStore(DIM, "flat", compression="int8")
+    for start in range(0, 40, 3):
+        vs.add(x[start:start + 3], range(start, min(start + 3, 40)))
+    assert len(vs.vectors) >= 40
+    vs.save(tmp_path)
+
+    loaded = VectorStore.load(tmp_path)
+    assert loaded.vectors.shape == (40, DIM)
+    assert loaded.search(x[7], k=1)[0][0] == 7
+
+def test_save_swaps_the_index_under_a_mapped_reader(tmp_path):
+    x = vectors(50)
+    vs = VectorStore(DIM)
+    vs.add(x[:20])
+    vs.save(tmp_path)
+    reader = VectorStore.load(tmp_path, mmap=True)
+
+    vs.add(x[20:], range(20, 50))
+    vs.save(tmp_path)
+
+    assert reader.index.ntotal == 20
+    assert reader.search(x[5], k=1)[0][0] == 5
+    assert VectorStore.load(tmp_path).index.ntotal == 50
+    assert not list(tmp_path.glob("*.tmp"))